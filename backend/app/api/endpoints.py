@@ -1,18 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, UploadFile, File, Form, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+import anyio
 from typing import List, Optional
 import os
 import json
-from datetime import datetime
+import shutil
+import uuid
+from datetime import datetime, timedelta
 
-from ..db.database import get_db
+from ..core import config
+from ..db.database import SessionLocal, get_db
 from ..models import models
-from ..recorder.recorder import WebRecorder
-from ..test_generator.generator import TestGenerator
+from ..runner.runner import step_to_dict
+from ..runner.profiles import PRESETS, load_profile, resolve_profile
+from ..runner.result_buffer import get_result_buffer
+from ..engine.engine import BROWSER_TYPES, get_engine
+from ..engine.admission import AdmissionRejected, tenant_for_owner
+from ..engine.matrix import MatrixCell, MatrixJob, SharedSetup, expand_matrix, load_mocks, matrix_status, parse_list, parse_viewport
+from ..imports.uploads import UploadError, get_upload_store
 from . import schemas
 
+# Subsystems that pull in heavy dependencies (Playwright, pyarrow, ijson, Pillow)
+# or are rarely used are imported inside their routes, keeping server startup fast
+
 router = APIRouter()
 
+def _validate_run_profile(run_profile):
+    try:
+        load_profile(run_profile)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid run profile: {e}")
+
+def _admission_error(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=503, detail=e.message, headers={"Retry-After": str(e.retry_after)})
+
+def _test_case_tenant(test_case) -> str:
+    project = test_case.project
+    return tenant_for_owner(project.owner_id if project else None)
+
+def _project_tenant(project_id: Optional[int]) -> str:
+    if project_id is None:
+        return tenant_for_owner(None)
+    db = SessionLocal()
+    try:
+        project = db.query(models.Project).filter(models.Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return tenant_for_owner(project.owner_id)
+    finally:
+        db.close()
+
 @router.post("/users/", response_model=schemas.User)
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(models.User).filter(models.User.email == user.email).first()
@@ -33,6 +72,7 @@ def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
 
 @router.post("/projects/", response_model=schemas.Project)
 def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)):
+    _validate_run_profile(project.run_profile)
     db_project = models.Project(**project.dict())
     db.add(db_project)
     db.commit()
@@ -46,6 +86,7 @@ def read_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
 
 @router.post("/test-cases/", response_model=schemas.TestCase)
 def create_test_case(test_case: schemas.TestCaseCreate, db: Session = Depends(get_db)):
+    _validate_run_profile(test_case.run_profile)
     db_test_case = models.TestCase(**test_case.dict())
     db.add(db_test_case)
     db.commit()
@@ -57,32 +98,248 @@ def read_test_cases(skip: int = 0, limit: int = 100, db: Session = Depends(get_d
     test_cases = db.query(models.TestCase).offset(skip).limit(limit).all()
     return test_cases
 
+# Declared ahead of any /test-cases/{test_case_id} route so "search" is not taken for an id
+@router.get("/test-cases/search")
+def search_test_cases(
+    q: str,
+    project_id: Optional[int] = None,
+    action_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    exact: bool = False,
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """Ranked test cases whose name, description, base URL or step selectors/values match the query"""
+    from ..search.service import get_test_case_search
+    
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    if skip < 0 or not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="skip must be >= 0 and limit between 1 and 500")
+    
+    try:
+        return get_test_case_search().search(
+            db,
+            q,
+            fields=parse_list(fields) or None,
+            project_id=project_id,
+            action_type=action_type,
+            exact=exact,
+            skip=skip,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/run-profiles")
+def list_run_profiles():
+    return {name: profile.dict() for name, profile in PRESETS.items()}
+
+@router.put("/projects/{project_id}/run-profile", response_model=schemas.Project)
+def set_project_run_profile(project_id: int, data: schemas.RunProfileUpdate, db: Session = Depends(get_db)):
+    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    _validate_run_profile(data.run_profile)
+    project.run_profile = data.run_profile
+    db.commit()
+    db.refresh(project)
+    return project
+
+@router.put("/test-cases/{test_case_id}/run-profile", response_model=schemas.TestCase)
+def set_test_case_run_profile(test_case_id: int, data: schemas.RunProfileUpdate, db: Session = Depends(get_db)):
+    test_case = db.query(models.TestCase).filter(models.TestCase.id == test_case_id).first()
+    if not test_case:
+        raise HTTPException(status_code=404, detail="Test case not found")
+    
+    _validate_run_profile(data.run_profile)
+    test_case.run_profile = data.run_profile
+    db.commit()
+    db.refresh(test_case)
+    return test_case
+
+@router.post("/test-cases/{test_case_id}/bindings", response_model=List[schemas.TestStep])
+def bind_test_case_steps(test_case_id: int, data: schemas.DataBindings, db: Session = Depends(get_db)):
+    from ..data_driven.bindings import bind_steps
+    
+    steps = db.query(models.TestStep).filter(models.TestStep.test_case_id == test_case_id).all()
+    if not steps:
+        raise HTTPException(status_code=404, detail="Test case has no steps")
+    
+    by_order = {step.order: step for step in steps}
+    unknown = set(data.bindings) - set(by_order)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown step orders: {sorted(unknown)}")
+    
+    # Persist ${column} placeholders in place of the recorded values
+    for bound in bind_steps([step_to_dict(step) for step in steps], data.bindings):
+        by_order[bound["order"]].value = bound["value"]
+    db.commit()
+    
+    return sorted(steps, key=lambda step: step.order)
+
+@router.post("/test-cases/{test_case_id}/data-runs")
+def start_data_driven_run(
+    test_case_id: int,
+    background_tasks: BackgroundTasks,
+    dataset: Optional[UploadFile] = File(None),
+    dataset_upload_id: Optional[str] = Form(None),
+    browser_type: str = Form("chromium"),
+    workers: int = Form(4, ge=1, le=config.DATA_RUN_MAX_WORKERS),
+    batch_size: int = Form(50, ge=1, le=10000),
+    isolation: str = Form("page"),
+    limit: Optional[int] = Form(None, ge=1),
+    profile: Optional[str] = Form(None),
+    db: Session = Depends(get_db)
+):
+    from ..data_driven.bindings import referenced_columns
+    from ..data_driven.datasets import detect_format, iter_dataset_rows
+    from ..data_driven.runner import ISOLATION_LEVELS
+    from ..data_driven.tasks import execute_admitted_data_run
+    
+    test_case = db.query(models.TestCase).filter(models.TestCase.id == test_case_id).first()
+    if not test_case:
+        raise HTTPException(status_code=404, detail="Test case not found")
+    
+    try:
+        run_profile = resolve_profile(test_case, profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if browser_type not in BROWSER_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported browser type: {browser_type}")
+    if isolation not in ISOLATION_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unsupported isolation level: {isolation}")
+    
+    steps = [step_to_dict(step) for step in sorted(test_case.steps, key=lambda step: step.order)]
+    columns = sorted(referenced_columns(steps))
+    if not columns:
+        raise HTTPException(status_code=400, detail="Test case has no steps bound to dataset columns")
+    
+    # Datasets are staged as uploads, either in this request or beforehand through
+    # the chunked /uploads API (kind "dataset"). The run deletes the ones it staged;
+    # those staged beforehand stay for later runs.
+    store = get_upload_store()
+    try:
+        if dataset is not None:
+            meta = store.create("dataset", dataset.filename or "dataset.csv")
+            # Stream the upload to disk rather than reading it into memory
+            with open(store.data_path(meta["upload_id"]), "wb") as f:
+                shutil.copyfileobj(dataset.file, f, length=1024 * 1024)
+            meta = store.complete(meta["upload_id"])
+        elif dataset_upload_id:
+            meta = store.status(dataset_upload_id)
+            if meta["kind"] != "dataset" or meta["status"] != "complete":
+                raise UploadError(f"Upload is not a completed dataset (kind {meta['kind']}, status {meta['status']})", status_code=409)
+        else:
+            raise HTTPException(status_code=400, detail="Provide a dataset upload or dataset_upload_id")
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    upload_id = meta["upload_id"]
+    store.update(upload_id, status="importing")
+    
+    def release_dataset():
+        # Uploads staged by this request are removed; one uploaded beforehand can be used again
+        if dataset is not None:
+            store.delete(upload_id)
+        else:
+            store.update(upload_id, status="complete")
+    
+    dataset_format = detect_format(meta["filename"])
+    try:
+        next(iter_dataset_rows(store.data_path(upload_id), columns=columns, limit=1, dataset_format=dataset_format), None)
+    except (ValueError, FileNotFoundError, ImportError) as e:
+        release_dataset()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    test_run = models.TestRun(
+        test_case_id=test_case_id,
+        status="running",
+        browser=browser_type
+    )
+    db.add(test_run)
+    db.commit()
+    db.refresh(test_run)
+    
+    # Every worker launches a browser, so the run is admitted as `workers` sessions at once
+    tenant = _test_case_tenant(test_case)
+    try:
+        ticket = anyio.from_thread.run_sync(lambda: get_engine().admission.check(tenant, size=workers, families=[browser_type]).take())
+    except AdmissionRejected as e:
+        release_dataset()
+        db.delete(test_run)
+        db.commit()
+        raise _admission_error(e)
+    
+    background_tasks.add_task(
+        execute_admitted_data_run,
+        ticket,
+        upload_id,
+        test_run.id,
+        steps,
+        test_case.base_url,
+        delete_upload=dataset is not None,
+        dataset_format=dataset_format,
+        limit=limit,
+        browser_type=browser_type,
+        workers=workers,
+        batch_size=batch_size,
+        isolation=isolation,
+        profile=run_profile,
+    )
+    
+    return {
+        "test_run_id": test_run.id,
+        "test_case_id": test_case_id,
+        "status": "running",
+        "browser": browser_type,
+        "columns": columns,
+        "workers": workers,
+        "batch_size": batch_size,
+        "isolation": isolation,
+        "profile": run_profile.name if run_profile else None
+    }
+
 @router.post("/recordings/start")
-def start_recording(url: str = Form(...), browser_type: str = Form("chromium")):
-    # Create recordings directory if it doesn't exist
-    os.makedirs("recordings", exist_ok=True)
+async def start_recording(
+    url: str = Form(...),
+    browser_type: str = Form("chromium"),
+    headless: bool = Form(False),
+    project_id: Optional[int] = Form(None),
+    queue: bool = Form(False)
+):
+    if browser_type not in BROWSER_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported browser type: {browser_type}")
     
-    # Initialize recorder
-    recorder = WebRecorder(base_url=url)
-    recording_id = recorder.start_recording(browser_type=browser_type, headless=False)
+    # Recordings run as supervised tasks on the engine's event loop, so a live
+    # recording no longer pins a server thread
+    tenant = await anyio.to_thread.run_sync(_project_tenant, project_id)
+    try:
+        session = await get_engine().start_recording(url, browser_type=browser_type, headless=headless, tenant=tenant, queue=queue)
+    except AdmissionRejected as e:
+        raise _admission_error(e)
     
-    return {"recording_id": recording_id, "status": "recording", "url": url}
+    return {"recording_id": session.id, "status": "recording", "url": url, "session_status": session.status}
 
 @router.post("/recordings/stop")
-def stop_recording(recording_id: str = Form(...)):
-    # This is a simplified version. In a real app, you would store the recorder instance
-    # in a database or cache and retrieve it here.
-    recorder = WebRecorder(base_url="", output_dir="recordings")
-    recorder.recording_id = recording_id
-    recorder.recording_path = os.path.join("recordings", recording_id)
+async def stop_recording(recording_id: str = Form(...)):
+    try:
+        session = await get_engine().stop(recording_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Recording session not found")
     
-    result = recorder.stop_recording()
+    if session.status == "error":
+        raise HTTPException(status_code=500, detail=session.error)
     
+    result = session.result or {}
     return {
         "recording_id": recording_id,
         "status": "stopped",
-        "actions_count": result["actions_count"],
-        "actions_file": result["actions_file"]
+        "session_status": session.status,
+        "actions_count": result.get("actions_count", 0),
+        "actions_file": result.get("actions_file")
     }
 
 @router.post("/test-generator/generate")
@@ -90,21 +347,35 @@ def generate_test(
     recording_id: str = Form(...),
     test_name: str = Form(...),
     test_type: str = Form("playwright"),
+    profile: Optional[str] = Form(None),
+    compact: bool = Form(True),
     db: Session = Depends(get_db)
 ):
-    recording_path = os.path.join("recordings", recording_id)
+    from ..recorder.compaction import compact_recording
+    from ..test_generator.generator import TestGenerator
+    
+    recording_path = os.path.join(config.RECORDINGS_DIR, recording_id)
     
-    if not os.path.exists(recording_path):
+    if not os.path.exists(os.path.join(recording_path, "actions.json")):
         raise HTTPException(status_code=404, detail="Recording not found")
+    if test_type not in ("playwright", "pytest"):
+        raise HTTPException(status_code=400, detail=f"Unsupported test type: {test_type}")
+    
+    try:
+        run_profile = load_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Only once every input is valid: collapse repeated inputs and click-driven
+    # navigations (a recording is compacted once; later calls reuse it)
+    compaction = compact_recording(recording_path) if compact else None
     
     generator = TestGenerator(recording_path)
     
     if test_type == "playwright":
-        output_file = generator.generate_playwright_test(test_name=test_name)
-    elif test_type == "pytest":
-        output_file = generator.generate_pytest_test(test_name=test_name)
+        output_file = generator.generate_playwright_test(test_name=test_name, profile=run_profile)
     else:
-        raise HTTPException(status_code=400, detail=f"Unsupported test type: {test_type}")
+        output_file = generator.generate_pytest_test(test_name=test_name, profile=run_profile)
     
     # Generate test steps for database storage
     test_steps = generator.generate_test_steps()
@@ -116,21 +387,33 @@ def generate_test(
         "test_name": test_name,
         "test_type": test_type,
         "output_file": output_file,
-        "steps_count": len(test_steps)
+        "steps_count": len(test_steps),
+        "profile": run_profile.name if run_profile else None,
+        "compaction": compaction
     }
 
 @router.post("/test-runs/start")
 def start_test_run(
     test_case_id: int = Form(...),
     browser_type: str = Form("chromium"),
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = None
+    profile: Optional[str] = Form(None),
+    use_auth_cache: bool = Form(True),
+    db: Session = Depends(get_db)
 ):
+    if browser_type not in BROWSER_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported browser type: {browser_type}")
+    
     # Get the test case
     test_case = db.query(models.TestCase).filter(models.TestCase.id == test_case_id).first()
     if not test_case:
         raise HTTPException(status_code=404, detail="Test case not found")
     
+    # Explicit profile, else the test case's, else its project's
+    try:
+        run_profile = resolve_profile(test_case, profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Create a new test run
     test_run = models.TestRun(
         test_case_id=test_case_id,
@@ -141,27 +424,445 @@ def start_test_run(
     db.commit()
     db.refresh(test_run)
     
-    # In a real app, you would run the test in the background
-    # background_tasks.add_task(run_test, test_case, test_run.id, db)
+    # Hand the run to the async engine; this route runs in a worker thread, so
+    # schedule onto the server's event loop and return immediately
+    steps = [step_to_dict(step) for step in sorted(test_case.steps, key=lambda step: step.order)]
+    tenant = _test_case_tenant(test_case)
+    try:
+        session = anyio.from_thread.run(
+            lambda: get_engine().start_run(test_run.id, steps, test_case.base_url, browser_type=browser_type, profile=run_profile, use_auth_cache=use_auth_cache, tenant=tenant)
+        )
+    except AdmissionRejected as e:
+        db.delete(test_run)
+        db.commit()
+        raise _admission_error(e)
     
     return {
         "test_run_id": test_run.id,
         "test_case_id": test_case_id,
         "status": "running",
-        "browser": browser_type
+        "browser": browser_type,
+        "session_id": session.id,
+        "profile": run_profile.name if run_profile else None
     }
 
+@router.post("/test-runs/matrix")
+def start_matrix_run(
+    test_case_id: int = Form(...),
+    browsers: str = Form(",".join(BROWSER_TYPES)),
+    viewports: Optional[str] = Form(None),
+    mocks: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None),
+    use_auth_cache: bool = Form(True),
+    db: Session = Depends(get_db)
+):
+    """Run a test case across browser families x viewports as one job"""
+    browser_types = parse_list(browsers)
+    if not browser_types:
+        raise HTTPException(status_code=400, detail="At least one browser is required")
+    unsupported = [browser_type for browser_type in browser_types if browser_type not in BROWSER_TYPES]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported browser type: {', '.join(unsupported)}")
+    viewport_labels = parse_list(viewports)
+    try:
+        for viewport in viewport_labels:
+            parse_viewport(viewport)
+        network_mocks = load_mocks(mocks)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    test_case = db.query(models.TestCase).filter(models.TestCase.id == test_case_id).first()
+    if not test_case:
+        raise HTTPException(status_code=404, detail="Test case not found")
+    
+    try:
+        run_profile = resolve_profile(test_case, profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Browser-independent setup happens once for the whole job
+    steps = [step_to_dict(step) for step in sorted(test_case.steps, key=lambda step: step.order)]
+    shared = SharedSetup(steps, test_case.base_url, network_mocks)
+    
+    # One test run per cell, created in a single transaction
+    job_id = f"matrix_{uuid.uuid4().hex[:12]}"
+    test_runs = [
+        models.TestRun(
+            test_case_id=test_case_id,
+            status="running",
+            browser=cell["browser"],
+            viewport=cell["viewport"],
+            matrix_job_id=job_id
+        )
+        for cell in expand_matrix(browser_types, viewport_labels)
+    ]
+    db.add_all(test_runs)
+    db.commit()
+    
+    job = MatrixJob(job_id, test_case_id, [MatrixCell(test_run.id, test_run.browser, test_run.viewport) for test_run in test_runs])
+    tenant = _test_case_tenant(test_case)
+    try:
+        anyio.from_thread.run(
+            lambda: get_engine().start_matrix(job, shared, profile=run_profile, use_auth_cache=use_auth_cache, tenant=tenant)
+        )
+    except AdmissionRejected as e:
+        for test_run in test_runs:
+            db.delete(test_run)
+        db.commit()
+        raise _admission_error(e)
+    
+    return {
+        **job.to_dict(),
+        "profile": run_profile.name if run_profile else None
+    }
+
+@router.get("/test-runs/matrix/{matrix_job_id}")
+def get_matrix_run(matrix_job_id: str, db: Session = Depends(get_db)):
+    test_runs = (
+        db.query(models.TestRun)
+        .filter(models.TestRun.matrix_job_id == matrix_job_id)
+        .order_by(models.TestRun.id)
+        .all()
+    )
+    if not test_runs:
+        raise HTTPException(status_code=404, detail="Matrix job not found")
+    
+    # Live session details are only known while the engine still tracks the job
+    job = get_engine().matrix_jobs.get(matrix_job_id)
+    cells = {cell.test_run_id: cell for cell in job.cells} if job else {}
+    
+    return {
+        "matrix_job_id": matrix_job_id,
+        "test_case_id": test_runs[0].test_case_id,
+        "status": matrix_status([test_run.status for test_run in test_runs]),
+        "manifest": job.manifest if job else None,
+        "artifacts": job.artifacts if job else None,
+        "upload": job.upload if job else None,
+        "runs": [
+            {
+                "test_run_id": test_run.id,
+                "browser": test_run.browser,
+                "viewport": test_run.viewport,
+                "status": test_run.status,
+                "session_id": cells[test_run.id].session.id if test_run.id in cells else None,
+                "start_time": test_run.start_time,
+                "end_time": test_run.end_time
+            }
+            for test_run in test_runs
+        ]
+    }
+
+@router.post("/test-runs/matrix/{matrix_job_id}/stop")
+async def stop_matrix_run(matrix_job_id: str):
+    try:
+        job = await get_engine().stop_matrix(matrix_job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Matrix job not found")
+    return job.to_dict()
+
 @router.get("/test-runs/{test_run_id}")
 def get_test_run(test_run_id: int, db: Session = Depends(get_db)):
     test_run = db.query(models.TestRun).filter(models.TestRun.id == test_run_id).first()
     if not test_run:
         raise HTTPException(status_code=404, detail="Test run not found")
     
+    # A finished run's status may still be waiting in the result buffer
+    live = get_result_buffer().live(test_run_id)
+    
     return {
         "test_run_id": test_run.id,
         "test_case_id": test_run.test_case_id,
-        "status": test_run.status,
+        "status": (live and live["status"]) or test_run.status,
         "browser": test_run.browser,
+        "viewport": test_run.viewport,
+        "matrix_job_id": test_run.matrix_job_id,
         "start_time": test_run.start_time,
         "end_time": test_run.end_time
     }
+
+@router.get("/test-runs/{test_run_id}/live")
+def get_test_run_progress(test_run_id: int, db: Session = Depends(get_db)):
+    """Step results as they arrive, including those not yet written to the database"""
+    live = get_result_buffer().live(test_run_id)
+    if live is not None:
+        return {"test_run_id": test_run_id, "source": "buffer", **live}
+    
+    # Nothing buffered: everything the run produced is in the database
+    test_run = db.query(models.TestRun).filter(models.TestRun.id == test_run_id).first()
+    if not test_run:
+        raise HTTPException(status_code=404, detail="Test run not found")
+    
+    counts = dict(
+        db.query(models.TestResult.status, func.count(models.TestResult.id))
+        .filter(models.TestResult.test_run_id == test_run_id)
+        .group_by(models.TestResult.status)
+    )
+    recent = (
+        db.query(models.TestResult)
+        .filter(models.TestResult.test_run_id == test_run_id)
+        .order_by(models.TestResult.id.desc())
+        .limit(config.RESULT_LIVE_WINDOW)
+        .all()
+    )
+    return {
+        "test_run_id": test_run_id,
+        "source": "database",
+        "total": sum(counts.values()),
+        "counts": counts,
+        "pending": 0,
+        "status": test_run.status,
+        "results": [
+            {
+                "step_order": result.step_order,
+                "status": result.status,
+                "error_message": result.error_message,
+                "screenshot": result.screenshot,
+                "execution_time": result.execution_time,
+                "data_row": result.data_row
+            }
+            for result in reversed(recent)
+        ]
+    }
+
+@router.get("/test-runs/{test_run_id}/failure-clusters")
+def get_failure_clusters(
+    test_run_id: int,
+    scope: str = "run",
+    use_screenshots: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Failed steps of a run (or of its whole matrix job) grouped by likely cause"""
+    from ..triage.clustering import FailureTriage, load_failures
+    
+    test_run = db.query(models.TestRun).filter(models.TestRun.id == test_run_id).first()
+    if not test_run:
+        raise HTTPException(status_code=404, detail="Test run not found")
+    if scope not in ("run", "matrix"):
+        raise HTTPException(status_code=400, detail="scope must be 'run' or 'matrix'")
+    
+    test_run_ids = [test_run_id]
+    if scope == "matrix" and test_run.matrix_job_id:
+        test_run_ids = [
+            run_id for run_id, in db.query(models.TestRun.id).filter(models.TestRun.matrix_job_id == test_run.matrix_job_id)
+        ]
+    
+    failures = load_failures(db, test_run_ids=test_run_ids)
+    clusters = FailureTriage(use_screenshots=use_screenshots).cluster(failures)
+    return {
+        "test_run_id": test_run_id,
+        "failures": len(failures),
+        "clusters": clusters
+    }
+
+@router.get("/failure-clusters")
+def get_recent_failure_clusters(
+    hours: int = 24,
+    project_id: Optional[int] = None,
+    limit: int = 20000,
+    use_screenshots: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Failures across all runs started in the last hours, grouped by likely cause"""
+    from ..triage.clustering import FailureTriage, load_failures
+    
+    failures = load_failures(db, since=datetime.now() - timedelta(hours=hours), project_id=project_id, limit=limit)
+    clusters = FailureTriage(use_screenshots=use_screenshots).cluster(failures)
+    return {
+        "failures": len(failures),
+        "clusters": clusters
+    }
+
+@router.post("/history/compact")
+def compact_history(
+    older_than_days: int = Form(config.ARCHIVE_AFTER_DAYS),
+    db: Session = Depends(get_db)
+):
+    from ..history.archive import HistoryArchive
+    
+    if older_than_days < 0:
+        raise HTTPException(status_code=400, detail="older_than_days must be non-negative")
+    
+    try:
+        return HistoryArchive().compact(db, older_than_days=older_than_days)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+@router.get("/history/trend")
+def get_history_trend(days: int = 30, test_case_id: Optional[int] = None, db: Session = Depends(get_db)):
+    from ..history.query import HistoryQuery
+    
+    return HistoryQuery(db).trend(days=days, test_case_id=test_case_id)
+
+@router.get("/history/flakiness")
+def get_history_flakiness(
+    days: int = 30,
+    test_case_id: Optional[int] = None,
+    min_runs: int = 2,
+    db: Session = Depends(get_db)
+):
+    from ..history.query import HistoryQuery
+    
+    return HistoryQuery(db).flakiness(days=days, test_case_id=test_case_id, min_runs=min_runs)
+
+@router.get("/history/errors")
+def get_history_errors(days: int = 30, test_case_id: Optional[int] = None, limit: int = 20, db: Session = Depends(get_db)):
+    from ..history.query import HistoryQuery
+    
+    return HistoryQuery(db).top_errors(days=days, test_case_id=test_case_id, limit=limit)
+
+@router.get("/engine/admission")
+async def get_admission_state():
+    return get_engine().admission.state()
+
+@router.get("/engine/sessions")
+async def list_engine_sessions(include_finished: bool = True):
+    engine = get_engine()
+    return {"stats": engine.stats(), "sessions": engine.list_sessions(include_finished=include_finished)}
+
+@router.get("/engine/sessions/{session_id}")
+async def get_engine_session(session_id: str):
+    session = get_engine().get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session.to_dict()
+
+@router.post("/engine/sessions/{session_id}/stop")
+async def stop_engine_session(session_id: str):
+    try:
+        session = await get_engine().stop(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session.to_dict()
+
+@router.get("/auth-cache/prefixes")
+def get_shared_login_prefixes(min_cases: int = 2, project_id: Optional[int] = None, db: Session = Depends(get_db)):
+    from ..runner.auth_cache import find_shared_prefixes
+    
+    query = db.query(models.TestCase)
+    if project_id is not None:
+        query = query.filter(models.TestCase.project_id == project_id)
+    
+    steps_by_case = {}
+    step_query = db.query(models.TestStep).join(models.TestCase).order_by(models.TestStep.test_case_id, models.TestStep.order)
+    if project_id is not None:
+        step_query = step_query.filter(models.TestCase.project_id == project_id)
+    for step in step_query:
+        steps_by_case.setdefault(step.test_case_id, []).append(step_to_dict(step))
+    
+    test_cases = [
+        {"id": test_case.id, "base_url": test_case.base_url, "steps": steps_by_case.get(test_case.id, [])}
+        for test_case in query
+    ]
+    return find_shared_prefixes(test_cases, min_cases=min_cases)
+
+@router.get("/auth-cache")
+async def get_auth_cache():
+    return get_engine().auth_cache.stats()
+
+@router.delete("/auth-cache")
+async def clear_auth_cache():
+    return {"removed": get_engine().auth_cache.clear()}
+
+@router.post("/uploads")
+def create_upload(
+    kind: str = Form(...),
+    filename: str = Form(...),
+    total_size: Optional[int] = Form(None),
+    project_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db)
+):
+    options = {}
+    if kind == "suite":
+        if project_id is None or not db.query(models.Project).filter(models.Project.id == project_id).first():
+            raise HTTPException(status_code=400, detail="Suite imports need an existing project_id")
+        options["project_id"] = project_id
+    
+    try:
+        meta = get_upload_store().create(kind, filename, total_size=total_size, options=options)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    return {**meta, "chunk_size": config.UPLOAD_CHUNK_SIZE}
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: Optional[int] = Header(None),
+    content_range: Optional[str] = Header(None)
+):
+    # The chunk's position comes from Upload-Offset or "Content-Range: bytes <start>-<end>/<total>"
+    offset = upload_offset
+    if offset is None and content_range:
+        try:
+            offset = int(content_range.split()[1].split("-")[0])
+        except (IndexError, ValueError):
+            raise HTTPException(status_code=400, detail="Malformed Content-Range header")
+    if offset is None:
+        raise HTTPException(status_code=400, detail="Upload-Offset or Content-Range header required")
+    
+    try:
+        meta = await get_upload_store().append(upload_id, offset, request.stream())
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    return {"upload_id": upload_id, "offset": meta["offset"], "total_size": meta["total_size"]}
+
+@router.get("/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    try:
+        return get_upload_store().status(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.post("/uploads/{upload_id}/complete")
+def complete_upload(upload_id: str, background_tasks: BackgroundTasks, sha256: Optional[str] = Form(None)):
+    from ..imports.tasks import run_import
+    
+    store = get_upload_store()
+    try:
+        meta = store.complete(upload_id, sha256=sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    # Parsing happens in the background; poll GET /uploads/{id} for the result.
+    # Datasets are read by the data-driven run they are passed to instead.
+    if meta["kind"] != "dataset":
+        background_tasks.add_task(run_import, store, upload_id)
+    return meta
+
+@router.delete("/uploads/{upload_id}")
+def delete_upload(upload_id: str):
+    try:
+        get_upload_store().delete(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return {"upload_id": upload_id, "status": "deleted"}
+
+@router.get("/uploads/{upload_id}/items")
+def get_upload_items(upload_id: str, skip: int = 0, limit: int = 100):
+    from ..imports.streaming import iter_ndjson
+    from ..imports.tasks import items_path
+    
+    store = get_upload_store()
+    try:
+        meta = store.status(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    if meta["kind"] not in ("postman", "swagger") or meta["status"] != "imported":
+        raise HTTPException(status_code=409, detail="Upload has no imported requests")
+    return list(iter_ndjson(items_path(store, upload_id), offset=skip, limit=limit))
+
+@router.get("/projects/{project_id}/export")
+def export_project_suite(project_id: int, db: Session = Depends(get_db)):
+    from ..imports.suites import iter_test_suite_export
+    
+    if not db.query(models.Project).filter(models.Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    return StreamingResponse(
+        iter_test_suite_export(db, project_id),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="project_{project_id}_suite.json"'}
+    )
@@ -21,6 +21,7 @@ class ProjectBase(BaseModel):
     name: str
     description: Optional[str] = None
     owner_id: int
+    run_profile: Optional[Dict[str, Any]] = None
 
 class ProjectCreate(ProjectBase):
     pass
@@ -39,6 +40,7 @@ class TestCaseBase(BaseModel):
     description: Optional[str] = None
     base_url: str
     project_id: int
+    run_profile: Optional[Dict[str, Any]] = None
 
 class TestCaseCreate(TestCaseBase):
     pass
@@ -83,6 +85,8 @@ class TestRun(TestRunBase):
     start_time: datetime
     end_time: Optional[datetime] = None
     status: str
+    viewport: Optional[str] = None
+    matrix_job_id: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -94,6 +98,7 @@ class TestResultBase(BaseModel):
     error_message: Optional[str] = None
     screenshot: Optional[str] = None
     execution_time: Optional[int] = None
+    data_row: Optional[int] = None
     test_run_id: int
 
 class TestResultCreate(TestResultBase):
@@ -105,6 +110,16 @@ class TestResult(TestResultBase):
     class Config:
         orm_mode = True
 
+# Run profile schemas
+class RunProfileUpdate(BaseModel):
+    # Preset name under "preset" plus overrides, or null to clear
+    run_profile: Optional[Dict[str, Any]] = None
+
+# Data-driven schemas
+class DataBindings(BaseModel):
+    # Maps step order -> dataset column name
+    bindings: Dict[int, str]
+
 # DOM element schemas
 class DOMElementBase(BaseModel):
     test_case_id: int
@@ -0,0 +1 @@
+# Data-driven testing package initialization
@@ -0,0 +1,44 @@
+import re
+from typing import List, Dict, Any, Set
+
+# Step values reference dataset columns as ${column_name}
+PLACEHOLDER_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_ .-]*)\}")
+
+def placeholder(column: str) -> str:
+    """Return the placeholder that binds a step value to a dataset column"""
+    return f"${{{column}}}"
+
+def bind_steps(steps: List[Dict[str, Any]], bindings: Dict[int, str]) -> List[Dict[str, Any]]:
+    """Replace the recorded value of the given steps (by order) with column placeholders"""
+    bound = []
+    for step in steps:
+        column = bindings.get(step.get("order"))
+        if column is not None:
+            step = {**step, "value": placeholder(column)}
+        bound.append(step)
+    return bound
+
+def referenced_columns(steps: List[Dict[str, Any]]) -> Set[str]:
+    """Return the dataset columns referenced by the steps' values"""
+    columns = set()
+    for step in steps:
+        columns.update(PLACEHOLDER_PATTERN.findall(step.get("value") or ""))
+    return columns
+
+def render_steps(steps: List[Dict[str, Any]], row: Dict[str, str], strict: bool = True) -> List[Dict[str, Any]]:
+    """Substitute a dataset row into the steps' placeholders"""
+    def substitute(match):
+        column = match.group(1)
+        if column not in row:
+            if strict:
+                raise KeyError(f"Dataset row has no column '{column}'")
+            return match.group(0)
+        return row[column]
+
+    rendered = []
+    for step in steps:
+        value = step.get("value")
+        if value and "${" in value:
+            step = {**step, "value": PLACEHOLDER_PATTERN.sub(substitute, value)}
+        rendered.append(step)
+    return rendered
@@ -0,0 +1,55 @@
+import csv
+import os
+from typing import Dict, Iterator, List, Optional
+
+SUPPORTED_FORMATS = ("csv", "parquet")
+
+def detect_format(path: str) -> str:
+    """Detect the dataset format from the file extension"""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    if extension in ("csv", "txt"):
+        return "csv"
+    raise ValueError(f"Unsupported dataset format: {extension or path}")
+
+def iter_csv_rows(path: str, columns: Optional[List[str]] = None) -> Iterator[Dict[str, str]]:
+    """Stream rows from a CSV file with a header row, one dict per row"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = set(columns or []) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"Dataset is missing columns: {', '.join(sorted(missing))}")
+        for row in reader:
+            if columns:
+                row = {column: row[column] for column in columns}
+            yield row
+
+def iter_parquet_rows(path: str, columns: Optional[List[str]] = None, batch_size: int = 1024) -> Iterator[Dict[str, str]]:
+    """Stream rows from a Parquet file one record batch at a time"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet datasets requires pyarrow: pip install pyarrow")
+
+    parquet_file = pq.ParquetFile(path)
+    missing = set(columns or []) - set(parquet_file.schema_arrow.names)
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {', '.join(sorted(missing))}")
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        for row in batch.to_pylist():
+            yield {key: "" if value is None else str(value) for key, value in row.items()}
+
+def iter_dataset_rows(path: str, columns: Optional[List[str]] = None, limit: Optional[int] = None, dataset_format: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """Stream dataset rows without loading the whole file into memory; the format defaults to the path's extension"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset not found: {path}")
+
+    dataset_format = dataset_format or detect_format(path)
+    rows = iter_parquet_rows(path, columns) if dataset_format == "parquet" else iter_csv_rows(path, columns)
+
+    for index, row in enumerate(rows):
+        if limit is not None and index >= limit:
+            return
+        yield row
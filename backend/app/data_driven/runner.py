@@ -0,0 +1,204 @@
+import queue
+import threading
+import time
+from typing import Iterable, List, Dict, Any, Optional, Callable, Tuple
+
+from ..runner.runner import TestRunner
+from ..runner.profiles import RunProfile
+from .bindings import render_steps
+
+# How rows share browser state within a worker:
+#   "page"    - reuse one warm page, clearing cookies/storage between rows
+#   "context" - fresh browser context per row (same browser process)
+ISOLATION_LEVELS = ("page", "context")
+
+_SENTINEL = None
+
+class DataDrivenRunner:
+    """Run a test case's steps once per dataset row, batched across worker browsers.
+
+    Each worker launches a single browser and keeps a warm page for the rows it
+    is handed. Rows are pulled from the dataset iterator lazily and fed through a
+    bounded queue, so only ``workers * 2`` batches are ever held in memory.
+    """
+
+    def __init__(
+        self,
+        steps: List[Dict[str, Any]],
+        base_url: str,
+        browser_type: str = "chromium",
+        workers: int = 4,
+        batch_size: int = 50,
+        isolation: str = "page",
+        headless: bool = True,
+        step_timeout: Optional[float] = 10000,
+        profile: Optional[RunProfile] = None,
+    ):
+        if isolation not in ISOLATION_LEVELS:
+            raise ValueError(f"Unsupported isolation level: {isolation}")
+        if workers < 1 or batch_size < 1:
+            raise ValueError("workers and batch_size must be at least 1")
+
+        self.steps = sorted(steps, key=lambda step: step.get("order") or 0)
+        self.base_url = base_url
+        self.browser_type = browser_type
+        self.workers = workers
+        self.batch_size = batch_size
+        self.isolation = isolation
+        self.headless = headless
+        self.profile = profile
+        self.runner = TestRunner(step_timeout=step_timeout)
+
+        self._batches: "queue.Queue[Optional[List[Tuple[int, Dict[str, str]]]]]" = queue.Queue(maxsize=workers * 2)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._counts = {"passed": 0, "failed": 0, "error": 0}
+        self._worker_errors: List[str] = []
+
+    def stop(self):
+        """Stop handing out new batches; rows already in progress finish"""
+        self._stop.set()
+
+    def run(self, rows: Iterable[Dict[str, str]], on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Run every row and return a summary. on_result is called (from worker threads) per row."""
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(on_result,), name=f"data-runner-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        batch = []
+        for index, row in enumerate(rows):
+            if self._stop.is_set():
+                break
+            batch.append((index, row))
+            if len(batch) >= self.batch_size:
+                self._put(batch, threads)
+                batch = []
+        if batch and not self._stop.is_set():
+            self._put(batch, threads)
+
+        for _ in threads:
+            self._put(_SENTINEL, threads)
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - start
+        total = sum(self._counts.values())
+        return {
+            "rows": total,
+            **self._counts,
+            "duration_seconds": round(elapsed, 3),
+            "rows_per_second": round(total / elapsed, 2) if elapsed else 0.0,
+            "stopped": self._stop.is_set(),
+            "worker_errors": self._worker_errors,
+        }
+
+    def _put(self, item, threads: List[threading.Thread]):
+        # Never block forever: if every worker died there is nobody left to consume
+        while any(thread.is_alive() for thread in threads):
+            try:
+                self._batches.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        self._stop.set()
+
+    def _worker(self, on_result: Optional[Callable[[Dict[str, Any]], None]]):
+        from playwright.sync_api import sync_playwright
+
+        try:
+            with sync_playwright() as playwright:
+                browser = getattr(playwright, self.browser_type).launch(headless=self.headless)
+                try:
+                    self._process_batches(browser, on_result)
+                finally:
+                    browser.close()
+        except Exception as e:
+            with self._lock:
+                self._worker_errors.append(f"{type(e).__name__}: {e}")
+            self._stop.set()
+
+    def _process_batches(self, browser, on_result):
+        context, page = self._new_page(browser)
+
+        while True:
+            batch = self._batches.get()
+            if batch is _SENTINEL:
+                break
+            if self._stop.is_set():
+                continue
+
+            for index, row in batch:
+                try:
+                    if self.isolation == "context":
+                        context, page = self._replace_page(browser, context)
+                    else:
+                        self._reset_page(context, page)
+                except Exception as e:
+                    # The row never ran; it is counted as an error and the next row gets a fresh page
+                    result = {"data_row": index, "status": "error", "step_order": None, "error_message": f"{type(e).__name__}: {e}", "execution_time": 0}
+                else:
+                    result = self._run_row(page, index, row)
+                with self._lock:
+                    self._counts[result["status"]] += 1
+                if on_result:
+                    on_result(result)
+
+                # A failed row leaves the page in an unknown state; don't reuse it
+                if result["status"] != "passed" and self.isolation == "page":
+                    context, page = self._replace_page(browser, context)
+
+        context.close()
+
+    def _new_page(self, browser):
+        if self.profile:
+            context = browser.new_context(**self.profile.context_options())
+            self.profile.apply(context, self.base_url)
+        else:
+            context = browser.new_context()
+        return context, context.new_page()
+
+    def _replace_page(self, browser, context):
+        try:
+            context.close()
+        except Exception:
+            pass  # Already closed, or its page crashed; a fresh one is made either way
+        return self._new_page(browser)
+
+    def _reset_page(self, context, page):
+        """Clear per-row state from a warm page so rows cannot leak into each other"""
+        context.clear_cookies()
+        if page.url.startswith("http"):
+            page.evaluate("() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }")
+
+    def _run_row(self, page, index: int, row: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            steps = render_steps(self.steps, row)
+        except KeyError as e:
+            return {"data_row": index, "status": "error", "step_order": None, "error_message": str(e), "execution_time": 0}
+
+        start = time.perf_counter()
+        try:
+            page.goto(self.base_url)
+            step_results = self.runner.run_steps(page, steps)
+        except Exception as e:
+            return {
+                "data_row": index,
+                "status": "error",
+                "step_order": None,
+                "error_message": f"{type(e).__name__}: {e}",
+                "execution_time": int((time.perf_counter() - start) * 1000),
+            }
+
+        failed = next((result for result in step_results if result["status"] != "passed"), None)
+        last = failed or (step_results[-1] if step_results else None)
+        return {
+            "data_row": index,
+            "status": "failed" if failed else "passed",
+            "step_order": last["step_order"] if last else None,
+            "error_message": failed["error_message"] if failed else None,
+            "execution_time": int((time.perf_counter() - start) * 1000),
+        }
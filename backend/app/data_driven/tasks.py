@@ -0,0 +1,71 @@
+import functools
+from typing import List, Dict, Any, Optional
+
+import anyio
+
+from ..engine.admission import Ticket
+from ..engine.engine import get_engine
+from ..imports.uploads import get_upload_store
+from ..runner.result_buffer import get_result_buffer
+from .bindings import referenced_columns
+from .datasets import iter_dataset_rows
+from .runner import DataDrivenRunner
+
+def execute_data_run(
+    test_run_id: int,
+    steps: List[Dict[str, Any]],
+    base_url: str,
+    dataset_path: str,
+    limit: Optional[int] = None,
+    dataset_format: Optional[str] = None,
+    **runner_options,
+):
+    """Background task: run a data-driven test run and persist one TestResult per row"""
+    # Row results go through the shared write-behind buffer, written in bulk
+    buffer = get_result_buffer()
+
+    def on_result(result: Dict[str, Any]):
+        buffer.add(test_run_id, result)
+
+    try:
+        rows = iter_dataset_rows(dataset_path, columns=sorted(referenced_columns(steps)) or None, limit=limit, dataset_format=dataset_format)
+        runner = DataDrivenRunner(steps, base_url, **runner_options)
+        summary = runner.run(rows, on_result=on_result)
+
+        if summary["worker_errors"]:
+            status = "error"
+        else:
+            status = "passed" if summary["failed"] == 0 and summary["error"] == 0 else "failed"
+    except Exception:
+        status = "error"
+
+    buffer.finish(test_run_id, status)
+
+async def execute_admitted_data_run(
+    ticket: Ticket,
+    upload_id: str,
+    test_run_id: int,
+    steps: List[Dict[str, Any]],
+    base_url: str,
+    delete_upload: bool = True,
+    **kwargs,
+):
+    """Background task: wait for the run's admission, execute it in a worker thread, then release its dataset upload.
+
+    An upload the run staged itself is deleted (delete_upload); one staged
+    beforehand through the uploads API is made available to later runs again.
+    """
+    store = get_upload_store()
+    started = False
+    try:
+        async with get_engine().admission.slot(ticket.tenant, ticket):
+            started = True
+            await anyio.to_thread.run_sync(functools.partial(execute_data_run, test_run_id, steps, base_url, store.data_path(upload_id), **kwargs))
+    finally:
+        if not started:
+            # Cancelled while queued (e.g. at shutdown)
+            get_result_buffer().finish(test_run_id, "cancelled")
+        if delete_upload:
+            store.delete(upload_id)
+        else:
+            store.update(upload_id, status="complete")
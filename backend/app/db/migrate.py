@@ -0,0 +1,71 @@
+"""Create or upgrade the database schema.
+
+Run as a separate deployment step (or an init container) before starting the
+API, so server processes never touch the schema:
+
+    python -m app.db.migrate
+
+Missing tables are created. Columns added to existing tables since they were
+created (all nullable) are added in place, and missing indexes are built.
+"""
+import logging
+import sys
+from typing import List, Dict, Any
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from .database import Base, engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+def migrate(bind=None) -> Dict[str, List[str]]:
+    """Bring the schema in line with the models; returns what was created"""
+    from ..models import models  # noqa: F401 - registers the tables on Base.metadata
+
+    bind = bind or default_engine
+    existing = set(inspect(bind).get_table_names())
+    created_tables = [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+    Base.metadata.create_all(bind=bind)
+
+    added_columns = []
+    added_indexes = []
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                added_columns.append(f"{table.name}.{column.name}")
+            present_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in present_indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+                    added_indexes.append(index.name)
+
+    if bind.dialect.name == "postgresql":
+        from ..search.postgres import create_search_indexes
+        create_search_indexes(bind)
+
+    for name in created_tables:
+        logger.info("Created table %s", name)
+    for name in added_columns:
+        logger.info("Added column %s", name)
+    for name in added_indexes:
+        logger.info("Created index %s", name)
+    return {"tables": created_tables, "columns": added_columns, "indexes": added_indexes}
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    changes = migrate()
+    if not any(changes.values()):
+        print("Schema is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
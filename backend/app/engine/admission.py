@@ -0,0 +1,374 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import Counter, deque
+from typing import List, Dict, Any, Optional, Deque
+
+from ..core import config
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_TENANT = "anonymous"
+
+def tenant_for_owner(owner_id: Optional[int]) -> str:
+    """Fair-share key of a session: the owner of the project it belongs to"""
+    return f"owner:{owner_id}" if owner_id is not None else ANONYMOUS_TENANT
+
+class AdmissionRejected(Exception):
+    """Raised when a session can neither start now nor wait in the queue"""
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+class Ticket:
+    """A place in admission for one session, granted at once or queued.
+
+    size is the number of browser contexts the session holds at once; they are
+    admitted together so a multi-worker session never waits holding part of them.
+    family is the browser type they are launched from, if it has a pool limit.
+    """
+
+    def __init__(self, tenant: str, size: int, waiter: asyncio.Future, family: Optional[str] = None):
+        self.tenant = tenant
+        self.size = size
+        self.waiter = waiter
+        self.family = family
+        self.released = False
+
+    @property
+    def granted(self) -> bool:
+        return self.waiter.done() and not self.waiter.cancelled()
+
+class Reservation:
+    """Tickets reserved by AdmissionController.check(), handed to the sessions that use them"""
+
+    def __init__(self, controller: "AdmissionController", tickets: List[Ticket]):
+        self.controller = controller
+        self.tickets = deque(tickets)
+
+    def take(self) -> Ticket:
+        return self.tickets.popleft()
+
+    def cancel(self):
+        """Give back the tickets no session has taken"""
+        while self.tickets:
+            self.controller.drop(self.tickets.popleft())
+
+class ResourceMonitor:
+    """Samples memory and CPU of the browser processes this server spawned.
+
+    Playwright drivers and browsers are children of this process, so the whole
+    child tree is summed. Requires psutil; without it only session counts are
+    enforced.
+    """
+
+    def __init__(self):
+        self._psutil = None
+        self._checked = False
+        # Process objects are kept between samples; cpu_percent() measures since the previous call
+        self._processes: Dict[int, Any] = {}
+
+    def _module(self):
+        # Imported on first use rather than at server startup
+        if not self._checked:
+            self._checked = True
+            try:
+                import psutil
+                self._psutil = psutil
+            except ImportError:
+                pass
+        return self._psutil
+
+    @property
+    def available(self) -> bool:
+        return self._module() is not None
+
+    def sample(self) -> Optional[Dict[str, Any]]:
+        psutil = self._module()
+        if psutil is None:
+            return None
+
+        children = {}
+        for child in psutil.Process(os.getpid()).children(recursive=True):
+            children[child.pid] = self._processes.get(child.pid, child)
+        self._processes = children
+
+        rss = 0
+        cpu = 0.0
+        for process in children.values():
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        memory = psutil.virtual_memory()
+        return {
+            "browser_processes": len(children),
+            "browser_memory_mb": rss // (1024 * 1024),
+            "browser_cpu_percent": round(cpu, 1),
+            "system_available_mb": memory.available // (1024 * 1024),
+            "system_cpu_percent": psutil.cpu_percent(None),
+            "sampled_at": time.time(),
+        }
+
+class AdmissionController:
+    """Decides when a browser session may start.
+
+    A session is admitted while fewer than max_sessions are live and the last
+    resource sample, plus an estimate for every session admitted since, leaves
+    memory_reserve_mb of system memory free, stays within the optional browser
+    memory budget and keeps system CPU under cpu_limit. Otherwise it waits in a
+    per-tenant queue. check() takes the slot or queue place synchronously, so
+    requests arriving together cannot overfill the queue; freed capacity goes to the tenant with the fewest live
+    sessions, so one owner's batch cannot starve another's. One session is
+    always admitted when none are live, so an over-budget host still drains.
+
+    family_limits caps the live contexts per browser family. A session whose
+    family is at its limit stays queued without holding any capacity, and
+    sessions of other families are admitted past it.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = config.MAX_CONCURRENT_SESSIONS,
+        max_queue: int = config.ADMISSION_MAX_QUEUE,
+        memory_reserve_mb: int = config.ADMISSION_MEMORY_RESERVE_MB,
+        browser_memory_mb: int = config.ADMISSION_BROWSER_MEMORY_MB,
+        cpu_limit: float = config.ADMISSION_CPU_LIMIT,
+        session_memory_mb: int = config.ADMISSION_SESSION_MEMORY_MB,
+        sample_interval: float = 1.0,
+        monitor: Optional[ResourceMonitor] = None,
+        family_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.max_queue = max_queue
+        self.memory_reserve_mb = memory_reserve_mb
+        self.browser_memory_mb = browser_memory_mb
+        self.cpu_limit = cpu_limit
+        self.session_memory_mb = session_memory_mb
+        self.sample_interval = sample_interval
+        self.monitor = monitor or ResourceMonitor()
+        self.family_limits = family_limits or {}
+        self.active: Counter = Counter()
+        self.family_active: Counter = Counter()
+        self.queues: Dict[str, Deque[Ticket]] = {}
+        self.admitted = 0
+        self.rejected = 0
+        self.usage: Optional[Dict[str, Any]] = None
+        self._live_at_sample = 0
+        self._sampler: Optional[asyncio.Task] = None
+
+    @property
+    def live(self) -> int:
+        return sum(self.active.values())
+
+    @property
+    def queued(self) -> int:
+        return sum(ticket.size for queue in self.queues.values() for ticket in queue)
+
+    def _estimate_mb(self) -> int:
+        # Observed memory per live session once there is something to observe
+        if self.usage and self._live_at_sample and self.usage["browser_memory_mb"]:
+            return max(self.usage["browser_memory_mb"] // self._live_at_sample, 1)
+        return self.session_memory_mb
+
+    def blocked_by(self, extra: int = 1) -> List[str]:
+        """Reasons admitting `extra` more sessions now would exceed the budget"""
+        live = self.live
+        if not live:
+            return []
+        reasons = []
+        if live + extra > self.max_sessions:
+            reasons.append("sessions")
+        if self.usage is None:
+            return reasons
+
+        # Sessions admitted since the last sample have not shown up in it yet
+        pending = max(live - self._live_at_sample, 0) + extra
+        projected = pending * self._estimate_mb()
+        if self.memory_reserve_mb and self.usage["system_available_mb"] - projected < self.memory_reserve_mb:
+            reasons.append("memory")
+        if self.browser_memory_mb and self.usage["browser_memory_mb"] + projected > self.browser_memory_mb:
+            reasons.append("browser_memory")
+        if self.cpu_limit and self.usage["system_cpu_percent"] >= self.cpu_limit:
+            reasons.append("cpu")
+        return reasons
+
+    def family_full(self, family: Optional[str], size: int = 1) -> bool:
+        """Whether `size` more contexts of a browser family would exceed its pool limit"""
+        limit = self.family_limits.get(family)
+        live = self.family_active.get(family, 0)
+        # Like the host budget, a family with nothing live always admits one session
+        return bool(limit) and live > 0 and live + size > limit
+
+    def _contended(self) -> bool:
+        # Queued sessions waiting only for their family's limit do not hold back others
+        return any(not self.family_full(ticket.family, ticket.size) for queue in self.queues.values() for ticket in queue)
+
+    def check(
+        self,
+        tenant: str,
+        count: int = 1,
+        queue: bool = True,
+        size: int = 1,
+        families: Optional[List[Optional[str]]] = None,
+    ) -> Reservation:
+        """Reserve `count` sessions of `size` browser contexts each: admitted now or queued.
+
+        families, when given, is the browser family of each session (and sets
+        count). Must be called on the event loop. Raises AdmissionRejected if
+        they could neither start nor queue; with queue=False they are admitted
+        now or rejected.
+        """
+        families = list(families) if families is not None else [None] * count
+        count = len(families)
+        total = count * size
+        full = [family for family, sessions in Counter(families).items() if self.family_full(family, sessions * size)]
+        if self._contended() or self.blocked_by(total) or full:
+            if not queue:
+                self.rejected += count
+                reasons = ", ".join(self.blocked_by(total) + [f"{family} pool" for family in full]) or "queue"
+                raise AdmissionRejected(f"Host is at capacity ({reasons}); try again shortly")
+            if self.queued + total > self.max_queue:
+                self.rejected += count
+                raise AdmissionRejected(f"Admission queue is full ({self.queued} waiting)", retry_after=30)
+        self._ensure_sampler()
+        return Reservation(self, [self._reserve(tenant, size, family) for family in families])
+
+    def _reserve(self, tenant: str, size: int = 1, family: Optional[str] = None) -> Ticket:
+        ticket = Ticket(tenant, size, asyncio.get_running_loop().create_future(), family)
+        if not self._contended() and not self.blocked_by(size) and not self.family_full(family, size):
+            self._grant(ticket)
+        else:
+            self.queues.setdefault(tenant, deque()).append(ticket)
+        return ticket
+
+    @contextlib.asynccontextmanager
+    async def slot(self, tenant: str, ticket: Optional[Ticket] = None):
+        """Hold an admitted session for the duration of the block, waiting for it if queued"""
+        if ticket is None:
+            ticket = self._reserve(tenant)
+        self._ensure_sampler()
+        try:
+            await ticket.waiter
+            yield
+        finally:
+            self.drop(ticket)
+
+    def drop(self, ticket: Ticket):
+        """Give a ticket back: frees its sessions if admitted, leaves the queue otherwise"""
+        if ticket.released:
+            return
+        if ticket.granted:
+            self.release(ticket)
+            return
+        ticket.released = True
+        ticket.waiter.cancel()
+        queue = self.queues.get(ticket.tenant)
+        if queue is not None:
+            with contextlib.suppress(ValueError):
+                queue.remove(ticket)
+            if not queue:
+                del self.queues[ticket.tenant]
+        # A large ticket at the head of the queue may have held back smaller ones
+        self._dispatch()
+
+    def release(self, ticket: Ticket):
+        if ticket.released:
+            return
+        ticket.released = True
+        self.active[ticket.tenant] -= ticket.size
+        if self.active[ticket.tenant] <= 0:
+            del self.active[ticket.tenant]
+        if ticket.family is not None:
+            self.family_active[ticket.family] -= ticket.size
+            if self.family_active[ticket.family] <= 0:
+                del self.family_active[ticket.family]
+        self._dispatch()
+
+    def _grant(self, ticket: Ticket):
+        self.active[ticket.tenant] += ticket.size
+        if ticket.family is not None:
+            self.family_active[ticket.family] += ticket.size
+        self.admitted += 1
+        ticket.waiter.set_result(True)
+
+    def _next(self) -> Optional[Ticket]:
+        # Oldest ticket of the tenant with the fewest live sessions, passing over those
+        # whose family is at its limit; tickets cancelled while waiting are dropped
+        for tenant in sorted(self.queues, key=lambda name: self.active.get(name, 0)):
+            queue = self.queues[tenant]
+            for ticket in [ticket for ticket in queue if ticket.waiter.done()]:
+                queue.remove(ticket)
+            ticket = next((ticket for ticket in queue if not self.family_full(ticket.family, ticket.size)), None)
+            if not queue:
+                del self.queues[tenant]
+            if ticket is not None:
+                return ticket
+        return None
+
+    def _dispatch(self):
+        """Hand freed capacity to waiting tenants, fewest live sessions first"""
+        while self.queues:
+            ticket = self._next()
+            # Queues are served in order, so a large ticket is not overtaken indefinitely
+            if ticket is None or self.blocked_by(ticket.size):
+                return
+            queue = self.queues[ticket.tenant]
+            queue.remove(ticket)
+            if not queue:
+                del self.queues[ticket.tenant]
+            self._grant(ticket)
+
+    def _ensure_sampler(self):
+        if self.monitor.available and (self._sampler is None or self._sampler.done()):
+            self._sampler = asyncio.create_task(self._sample_loop(), name="engine-admission-sampler")
+
+    async def _sample_loop(self):
+        while True:
+            try:
+                live = self.live
+                self.usage = await asyncio.to_thread(self.monitor.sample)
+                self._live_at_sample = live
+                # Freed memory or CPU may let queued sessions in
+                self._dispatch()
+            except Exception:
+                logger.exception("Resource sampling failed")
+            await asyncio.sleep(self.sample_interval)
+
+    async def close(self):
+        if self._sampler is not None:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+            self._sampler = None
+
+    def state(self) -> Dict[str, Any]:
+        tenants = sorted(set(self.active) | set(self.queues))
+        return {
+            "live": self.live,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "blocked_by": self.blocked_by() if self.queued else [],
+            "limits": {
+                "max_sessions": self.max_sessions,
+                "max_queue": self.max_queue,
+                "memory_reserve_mb": self.memory_reserve_mb,
+                "browser_memory_mb": self.browser_memory_mb or None,
+                "cpu_limit": self.cpu_limit or None,
+                "session_memory_estimate_mb": self._estimate_mb(),
+                "family_limits": self.family_limits,
+            },
+            "families": dict(self.family_active),
+            "usage": self.usage,
+            "resource_monitoring": self.monitor.available,
+            "tenants": [
+                {"tenant": tenant, "live": self.active.get(tenant, 0), "queued": len(self.queues.get(tenant, ()))}
+                for tenant in tenants
+            ],
+        }
@@ -0,0 +1,155 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+# Injected into every page of a recording context. Forwards user clicks and
+# inputs to the Python side through the exposed __recordEvent binding.
+RECORDER_SCRIPT = """
+(() => {
+    if (window.__recorderInstalled) return;
+    window.__recorderInstalled = true;
+
+    const cssPath = (el) => {
+        const parts = [];
+        while (el && el.nodeType === 1 && el !== document.documentElement) {
+            let part = el.tagName.toLowerCase();
+            const parent = el.parentElement;
+            if (parent) {
+                const siblings = Array.from(parent.children).filter(c => c.tagName === el.tagName);
+                if (siblings.length > 1) part += `:nth-of-type(${siblings.indexOf(el) + 1})`;
+            }
+            parts.unshift(part);
+            el = parent;
+        }
+        return parts.join(' > ');
+    };
+
+    const describe = (el) => {
+        if (!el || el.nodeType !== 1) return {};
+        const className = typeof el.className === 'string' ? el.className.trim() : '';
+        return { id: el.id || null, class: className || null, path: cssPath(el) };
+    };
+
+    document.addEventListener('click', (e) => {
+        window.__recordEvent({ type: 'click', target: describe(e.target) });
+    }, true);
+    document.addEventListener('input', (e) => {
+        window.__recordEvent({ type: 'input', target: describe(e.target), value: e.target.value ?? '' });
+    }, true);
+})();
+"""
+
+class AsyncWebRecorder:
+    """Record user interactions with playwright.async_api.
+
+    Unlike WebRecorder, the browser is owned by the caller (the session engine
+    shares one browser per type between sessions); each recording gets its own
+    browser context. Actions are written in the same actions.json format, so
+    TestGenerator works on either recorder's output.
+    """
+
+    def __init__(self, base_url: str, output_dir: str = "recordings", recording_id: Optional[str] = None):
+        self.base_url = base_url
+        self.output_dir = output_dir
+        self.recording_id = recording_id or f"recording_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        self.recording_path = os.path.join(output_dir, self.recording_id)
+        self.actions: List[Dict[str, Any]] = []
+        self.context = None
+        self.page = None
+
+        # Create output directory if it doesn't exist
+        os.makedirs(self.recording_path, exist_ok=True)
+
+    async def start_recording(self, browser, context_options: Optional[Dict[str, Any]] = None):
+        """Open a recording context on the given browser and navigate to the base URL"""
+        self.context = await browser.new_context(**(context_options or {}))
+        await self.context.expose_binding("__recordEvent", self._on_page_event)
+        await self.context.add_init_script(RECORDER_SCRIPT)
+
+        self.page = await self.context.new_page()
+        self.page.on("framenavigated", self._on_frame_navigated)
+        await self.page.goto(self.base_url)
+
+        return self.recording_id
+
+    def _reserve_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        # Reserve the slot synchronously so actions keep event order even when
+        # their screenshots complete out of order
+        index = len(self.actions)
+        action["screenshot"] = os.path.join(self.recording_path, f"step_{index}.png")
+        self.actions.append(action)
+        return action
+
+    async def _screenshot(self, action: Dict[str, Any]):
+        try:
+            await self.page.screenshot(path=action["screenshot"])
+        except Exception:
+            # The page may be navigating or closing; keep the action without a screenshot
+            action["screenshot"] = None
+
+    async def _on_page_event(self, source, event: Dict[str, Any]):
+        """Handle a click/input event forwarded from the page"""
+        if not self.page or source.get("frame") is not self.page.main_frame:
+            return
+
+        action = self._reserve_action({
+            "type": event.get("type"),
+            "timestamp": time.time(),
+            "url": self.page.url,
+            "selector": self._get_best_selector(event.get("target") or {}),
+        })
+        if event.get("type") == "input":
+            action["value"] = event.get("value", "")
+        await self._screenshot(action)
+
+    async def _on_frame_navigated(self, frame):
+        """Record a main-frame navigation"""
+        if frame != self.page.main_frame:
+            return
+
+        action = self._reserve_action({
+            "type": "navigation",
+            "timestamp": time.time(),
+            "url": frame.url,
+        })
+        await self._screenshot(action)
+
+    def _get_best_selector(self, element: Dict[str, Any]) -> Optional[str]:
+        """Get the best selector for an element described by the page script"""
+        # Try to get a unique ID
+        element_id = element.get("id")
+        if element_id:
+            return f"#{element_id}"
+
+        # Try to get a unique class
+        element_class = element.get("class")
+        if element_class:
+            return f".{'.'.join(element_class.split())}"
+
+        # Fall back to the structural CSS path
+        return element.get("path")
+
+    async def stop_recording(self) -> Dict[str, Any]:
+        """Close the recording context and save the recorded actions"""
+        if self.context:
+            try:
+                await self.context.close()
+            finally:
+                self.context = None
+                self.page = None
+
+        return self.save_actions()
+
+    def save_actions(self) -> Dict[str, Any]:
+        """Save actions to actions.json"""
+        actions_file = os.path.join(self.recording_path, "actions.json")
+        with open(actions_file, "w") as f:
+            json.dump(self.actions, f, indent=2)
+
+        return {
+            "recording_id": self.recording_id,
+            "actions_count": len(self.actions),
+            "actions_file": actions_file
+        }
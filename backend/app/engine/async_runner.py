@@ -0,0 +1,83 @@
+import os
+import time
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from ..runner.runner import INPUT_ACTIONS, NAVIGATION_ACTIONS, StepExecutionError
+
+async def execute_step(page, step: Dict[str, Any], timeout: Optional[float] = None):
+    """Execute a single test step on an async Playwright page"""
+    action_type = step.get("action_type")
+    selector = step.get("selector")
+    value = step.get("value") or ""
+
+    if action_type in NAVIGATION_ACTIONS:
+        await page.goto(value, timeout=timeout)
+    elif action_type == "click":
+        await page.click(selector, timeout=timeout)
+    elif action_type in INPUT_ACTIONS:
+        await page.fill(selector, value, timeout=timeout)
+    elif action_type == "assert":
+        if selector:
+            text = await page.text_content(selector, timeout=timeout) or ""
+            if value not in text:
+                raise StepExecutionError(step, f"Expected '{value}' in text of {selector}, got '{text}'")
+        elif page.url != value:
+            raise StepExecutionError(step, f"Expected URL '{value}', got '{page.url}'")
+    else:
+        raise StepExecutionError(step, f"Unsupported action type: {action_type}")
+
+class AsyncTestRunner:
+    """Async counterpart of runner.TestRunner"""
+
+    def __init__(self, step_timeout: Optional[float] = 10000, stop_on_failure: bool = True, screenshot_dir: Optional[str] = None):
+        self.step_timeout = step_timeout
+        self.stop_on_failure = stop_on_failure
+        self.screenshot_dir = screenshot_dir  # Failed steps are captured here for triage
+
+    async def run_steps(
+        self,
+        page,
+        steps: List[Dict[str, Any]],
+        on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run steps in order, returning one result dict per executed step"""
+        results = []
+
+        for step in steps:
+            start = time.perf_counter()
+            status = "passed"
+            error_message = None
+
+            try:
+                await execute_step(page, step, timeout=self.step_timeout)
+            except Exception as e:
+                status = "failed"
+                error_message = f"{type(e).__name__}: {e}"
+
+            result = {
+                "step_order": step.get("order"),
+                "status": status,
+                "error_message": error_message,
+                "execution_time": int((time.perf_counter() - start) * 1000),
+                "screenshot": await self._screenshot(page, step) if status != "passed" else None,
+            }
+            results.append(result)
+            if on_result:
+                await on_result(result)
+
+            if status != "passed" and self.stop_on_failure:
+                break
+
+        return results
+
+    async def _screenshot(self, page, step: Dict[str, Any]) -> Optional[str]:
+        if not self.screenshot_dir:
+            return None
+        os.makedirs(self.screenshot_dir, exist_ok=True)
+        path = os.path.join(self.screenshot_dir, f"step_{step.get('order')}.png")
+        try:
+            await page.screenshot(path=path)
+        except Exception:
+            # The page may have crashed or closed; the failure is still recorded
+            return None
+        return path
@@ -0,0 +1,470 @@
+import asyncio
+import inspect
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from ..core import config
+from .async_recorder import AsyncWebRecorder
+from .async_runner import AsyncTestRunner
+from .admission import ANONYMOUS_TENANT, AdmissionController, Reservation, Ticket
+from .matrix import MatrixJob, SharedSetup
+from ..runner.profiles import RunProfile
+from ..runner.result_buffer import get_result_buffer
+from ..runner.auth_cache import AuthStateCache, detect_login_prefix, prefix_key, session_expired
+
+logger = logging.getLogger(__name__)
+
+BROWSER_TYPES = ("chromium", "firefox", "webkit")
+
+# How long a stopped recording may take to flush before its task is cancelled
+STOP_TIMEOUT = 30.0
+
+def parse_pool_limits(value: str) -> Dict[str, int]:
+    """Parse per browser family limits such as chromium=16,firefox=4,webkit=4"""
+    limits: Dict[str, int] = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        browser_type, _, limit = item.partition("=")
+        browser_type = browser_type.strip()
+        if browser_type not in BROWSER_TYPES:
+            raise ValueError(f"Unsupported browser type in pool limits: {browser_type}")
+        limits[browser_type] = max(1, int(limit))
+    return limits
+
+class EngineSession:
+    """A supervised recording or test run executing on the engine's event loop"""
+
+    def __init__(self, session_id: str, kind: str, browser_type: str, tenant: str = ANONYMOUS_TENANT, test_run_id: Optional[int] = None):
+        self.id = session_id
+        self.kind = kind  # recording, run
+        self.test_run_id = test_run_id
+        self.browser_type = browser_type
+        self.tenant = tenant  # Fair-share key for admission control
+        self.status = "queued"  # queued, active, stopping, completed, cancelled, error
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.ticket: Optional[Ticket] = None  # Admission reserved when the session was requested
+        self.stop_event = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "cancelled", "error")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "kind": self.kind,
+            "test_run_id": self.test_run_id,
+            "browser": self.browser_type,
+            "tenant": self.tenant,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+class SessionEngine:
+    """Hosts many recordings and test runs concurrently on one asyncio event loop.
+
+    One Playwright driver and one browser per browser type are shared by every
+    session; each session gets its own browser context. The admission controller
+    decides how many sessions hold a context at once from session counts and
+    browser memory/CPU, the rest wait as "queued"; optional per browser family
+    limits keep e.g. webkit from starving chromium. Every session runs
+    in its own task, supervised so failures are captured on the session rather
+    than lost, and stop() cancels it.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = config.MAX_CONCURRENT_SESSIONS,
+        recordings_dir: str = config.RECORDINGS_DIR,
+        pool_limits: Optional[Dict[str, int]] = None,
+        admission: Optional[AdmissionController] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.pool_limits = parse_pool_limits(config.BROWSER_POOL_LIMITS) if pool_limits is None else pool_limits
+        self.admission = admission or AdmissionController(max_sessions=max_concurrent, family_limits=self.pool_limits)
+        self.recordings_dir = recordings_dir
+        self.sessions: Dict[str, EngineSession] = {}
+        self.matrix_jobs: Dict[str, MatrixJob] = {}
+        self.auth_cache = AuthStateCache()
+        self._playwright = None
+        self._browsers: Dict[tuple, Any] = {}
+        self._launch_lock: Optional[asyncio.Lock] = None
+
+    async def start(self):
+        """Start the Playwright driver (idempotent)"""
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+
+            self._launch_lock = asyncio.Lock()
+            self._playwright = await async_playwright().start()
+
+    async def warm(self, browser_types: List[str], headless: bool = True):
+        """Start the driver and launch browsers ahead of the first session"""
+        for browser_type in browser_types:
+            await self._get_browser(browser_type, headless)
+
+    async def shutdown(self):
+        """Cancel every live session and close all browsers"""
+        live = [session.task for session in self.sessions.values() if session.task and not session.task.done()]
+        live += [job.task for job in self.matrix_jobs.values() if job.task and not job.task.done()]
+        for task in live:
+            task.cancel()
+        await asyncio.gather(*live, return_exceptions=True)
+
+        for browser in self._browsers.values():
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self._browsers.clear()
+        await self.admission.close()
+
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _get_browser(self, browser_type: str, headless: bool):
+        if browser_type not in BROWSER_TYPES:
+            raise ValueError(f"Unsupported browser type: {browser_type}")
+        await self.start()
+
+        key = (browser_type, headless)
+        async with self._launch_lock:
+            browser = self._browsers.get(key)
+            if browser is None or not browser.is_connected():
+                browser = await getattr(self._playwright, browser_type).launch(headless=headless)
+                self._browsers[key] = browser
+            return browser
+
+    def _spawn(self, session: EngineSession, coro) -> EngineSession:
+        self.sessions[session.id] = session
+        session.task = asyncio.create_task(self._supervise(session, coro), name=f"engine-{session.kind}-{session.id}")
+        # Also runs when the task is cancelled before _supervise starts
+        session.task.add_done_callback(lambda task: self._settle(session, coro))
+        return session
+
+    async def _supervise(self, session: EngineSession, coro):
+        try:
+            await self.start()
+            # Admission was reserved up front; it is only granted once the browser family has room
+            async with self.admission.slot(session.tenant, session.ticket):
+                session.status = "active"
+                session.started_at = datetime.now()
+                session.result = await coro
+            session.status = "completed"
+        except asyncio.CancelledError:
+            session.status = "cancelled"
+        except Exception as e:
+            logger.exception("Engine session %s failed", session.id)
+            session.status = "error"
+            session.error = f"{type(e).__name__}: {e}"
+
+    def _settle(self, session: EngineSession, coro):
+        if not session.done:
+            session.status = "cancelled"
+        session.finished_at = datetime.now()
+        if session.ticket is not None:
+            self.admission.drop(session.ticket)
+        never_started = inspect.getcoroutinestate(coro) == inspect.CORO_CREATED
+        coro.close()
+        self.prune()
+        if never_started and session.test_run_id is not None:
+            # Cancelled or failed while queued: the run never got to record its own status
+            get_result_buffer().finish(session.test_run_id, session.status)
+
+    def get(self, session_id: str) -> Optional[EngineSession]:
+        return self.sessions.get(session_id)
+
+    def list_sessions(self, include_finished: bool = True) -> List[Dict[str, Any]]:
+        return [
+            session.to_dict()
+            for session in self.sessions.values()
+            if include_finished or not session.done
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for session in self.sessions.values():
+            by_status[session.status] = by_status.get(session.status, 0) + 1
+        return {
+            "max_concurrent": self.max_concurrent,
+            "pool_limits": self.pool_limits,
+            "browsers": [f"{browser_type}{'' if headless else ' (headed)'}" for browser_type, headless in self._browsers],
+            "sessions": by_status,
+            "matrix_jobs": len(self.matrix_jobs),
+            "admission": self.admission.state(),
+            "result_buffer": get_result_buffer().stats(),
+            "auth_cache": self.auth_cache.stats(),
+        }
+
+    def prune(self, retention: float = config.ENGINE_SESSION_RETENTION):
+        """Forget sessions and matrix jobs that finished more than retention seconds ago"""
+        cutoff = datetime.now() - timedelta(seconds=retention)
+        for session_id in [session.id for session in self.sessions.values() if session.done and session.finished_at and session.finished_at < cutoff]:
+            del self.sessions[session_id]
+        for job_id in [job.id for job in self.matrix_jobs.values() if job.finished_at and job.finished_at < cutoff]:
+            del self.matrix_jobs[job_id]
+
+    async def start_recording(
+        self,
+        url: str,
+        browser_type: str = "chromium",
+        headless: bool = False,
+        tenant: str = ANONYMOUS_TENANT,
+        queue: bool = False,
+    ) -> EngineSession:
+        """Start a recording session; it records until stop() is called.
+
+        Someone is waiting in front of the browser, so by default a recording
+        is rejected (AdmissionRejected) rather than queued when over budget.
+        """
+        reservation = self.admission.check(tenant, queue=queue, families=[browser_type])
+        recorder = AsyncWebRecorder(base_url=url, output_dir=self.recordings_dir)
+        session = EngineSession(recorder.recording_id, "recording", browser_type, tenant)
+        session.ticket = reservation.take()
+        return self._spawn(session, self._record(session, recorder, headless))
+
+    async def _record(self, session: EngineSession, recorder: AsyncWebRecorder, headless: bool) -> Dict[str, Any]:
+        browser = await self._get_browser(session.browser_type, headless)
+        try:
+            await recorder.start_recording(browser)
+            await session.stop_event.wait()
+        finally:
+            # Flush whatever was captured, also when the session is cancelled
+            result = await asyncio.shield(recorder.stop_recording())
+        return result
+
+    async def start_run(
+        self,
+        test_run_id: int,
+        steps: List[Dict[str, Any]],
+        base_url: str,
+        browser_type: str = "chromium",
+        headless: bool = True,
+        profile: Optional[RunProfile] = None,
+        use_auth_cache: bool = True,
+        viewport: Optional[Dict[str, int]] = None,
+        shared: Optional[SharedSetup] = None,
+        tenant: str = ANONYMOUS_TENANT,
+        reservation: Optional[Reservation] = None,
+    ) -> EngineSession:
+        """Execute a test run's steps and persist one TestResult per step.
+
+        With use_auth_cache, a detected login prefix is replaced by a cached
+        storage_state (its steps are recorded with status "cached"). viewport
+        overrides the profile's; shared carries a matrix job's network mocks.
+        reservation, when given, is one taken by the caller (e.g. for a whole
+        matrix job). Raises AdmissionRejected when the admission queue is full.
+        """
+        if reservation is None:
+            reservation = self.admission.check(tenant, families=[browser_type])
+        session = EngineSession(f"run_{test_run_id}_{uuid.uuid4().hex[:8]}", "run", browser_type, tenant, test_run_id)
+        session.ticket = reservation.take()
+        return self._spawn(session, self._run(session, test_run_id, steps, base_url, headless, profile, use_auth_cache, viewport, shared))
+
+    async def _run(
+        self,
+        session: EngineSession,
+        test_run_id: int,
+        steps,
+        base_url: str,
+        headless: bool,
+        profile: Optional[RunProfile],
+        use_auth_cache: bool,
+        viewport: Optional[Dict[str, int]] = None,
+        shared: Optional[SharedSetup] = None,
+    ) -> Dict[str, Any]:
+        status = "error"
+        buffer = get_result_buffer()
+
+        async def save_result(result):
+            # Journaled and visible to live progress at once; written in bulk later
+            buffer.add(test_run_id, result)
+        try:
+            browser = await self._get_browser(session.browser_type, headless)
+            context_options = profile.context_options() if profile else {}
+            start_url = base_url
+            remaining = steps
+            cache_key = None
+            state = None
+
+            # A profile with its own storage_state already skips the login
+            prefix_length = detect_login_prefix(steps) if use_auth_cache and "storage_state" not in context_options else 0
+            if prefix_length:
+                cache_key = prefix_key(base_url, steps[:prefix_length], session.browser_type)
+                state = await self._login_state(browser, cache_key, steps[:prefix_length], base_url, profile)
+            if state:
+                context_options["storage_state"] = state["storage_state"]
+                start_url = state["url"]
+                remaining = steps[prefix_length:]
+
+            if viewport:
+                context_options["viewport"] = dict(viewport)
+            context, page = await self._open_page(browser, context_options, start_url, base_url, profile, shared)
+            try:
+                if state and session_expired(page.url, state["url"]):
+                    # The cached session expired server-side: drop it and replay the full test
+                    self.auth_cache.invalidate(cache_key)
+                    state = None
+                    await context.close()
+                    context_options.pop("storage_state")
+                    remaining = steps
+                    context, page = await self._open_page(browser, context_options, base_url, base_url, profile, shared)
+                if state:
+                    for step in steps[:prefix_length]:
+                        await save_result({"step_order": step.get("order"), "status": "cached", "error_message": None, "execution_time": 0})
+                runner = AsyncTestRunner(screenshot_dir=os.path.join(self.recordings_dir, "runs", str(test_run_id)))
+                results = await runner.run_steps(page, remaining, on_result=save_result)
+            finally:
+                await context.close()
+            status = "passed" if all(result["status"] == "passed" for result in results) else "failed"
+
+            return {
+                "test_run_id": test_run_id,
+                "status": status,
+                "steps_executed": len(results),
+                "login_steps_cached": prefix_length if state else 0,
+            }
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            buffer.finish(test_run_id, status)
+
+    async def _open_page(self, browser, context_options: Dict[str, Any], url: str, base_url: str, profile: Optional[RunProfile], shared: Optional[SharedSetup]):
+        context = await browser.new_context(**context_options)
+        try:
+            if profile:
+                await profile.apply_async(context, base_url)
+            if shared:
+                # Registered after the profile's blocking so mocked URLs take precedence
+                await shared.install(context)
+            page = await context.new_page()
+            await page.goto(url)
+        except BaseException:
+            await context.close()
+            raise
+        return context, page
+
+    async def _login_state(self, browser, key: str, prefix: List[Dict[str, Any]], base_url: str, profile: Optional[RunProfile]) -> Optional[Dict[str, Any]]:
+        """Return cached storage_state for a login prefix, running the prefix once if needed"""
+        entry = self.auth_cache.get(key)
+        if entry is None:
+            async with self.auth_cache.lock(key):
+                # Another session may have logged in while we waited
+                entry = self.auth_cache.get(key)
+                if entry is None:
+                    self.auth_cache.misses += 1
+                    return await self._capture_login_state(browser, key, prefix, base_url, profile)
+        self.auth_cache.hits += 1
+        return entry
+
+    async def _capture_login_state(self, browser, key: str, prefix, base_url: str, profile: Optional[RunProfile]) -> Optional[Dict[str, Any]]:
+        context = await browser.new_context(**(profile.context_options() if profile else {}))
+        try:
+            if profile:
+                await profile.apply_async(context, base_url)
+            page = await context.new_page()
+            await page.goto(base_url)
+            results = await AsyncTestRunner().run_steps(page, prefix)
+            if len(results) < len(prefix) or any(result["status"] != "passed" for result in results):
+                # Fall back to replaying the full test so the failure is reported normally
+                return None
+            state = await context.storage_state()
+            return self.auth_cache.put(key, state, page.url, len(prefix))
+        finally:
+            await context.close()
+
+    async def start_matrix(
+        self,
+        job: MatrixJob,
+        shared: SharedSetup,
+        headless: bool = True,
+        profile: Optional[RunProfile] = None,
+        use_auth_cache: bool = True,
+        tenant: str = ANONYMOUS_TENANT,
+    ) -> MatrixJob:
+        """Run every cell of a matrix job, then publish its artifacts once.
+
+        Cells are ordinary run sessions sharing the job's steps, profile and
+        network mocks; the browser per family and, through the auth cache, the
+        login per family are shared across viewports. Admission is checked
+        for the whole job up front so it is never left half started.
+        """
+        reservation = self.admission.check(tenant, families=[cell.browser_type for cell in job.cells])
+        try:
+            for cell in job.cells:
+                cell.session = await self.start_run(
+                    cell.test_run_id,
+                    shared.steps,
+                    shared.base_url,
+                    browser_type=cell.browser_type,
+                    headless=headless,
+                    profile=profile,
+                    use_auth_cache=use_auth_cache,
+                    viewport=cell.viewport_size,
+                    shared=shared,
+                    tenant=tenant,
+                    reservation=reservation,
+                )
+        finally:
+            reservation.cancel()
+        self.matrix_jobs[job.id] = job
+        job.task = asyncio.create_task(self._finish_matrix(job), name=f"engine-matrix-{job.id}")
+        return job
+
+    async def _finish_matrix(self, job: MatrixJob):
+        try:
+            await asyncio.gather(*(cell.session.task for cell in job.cells), return_exceptions=True)
+        finally:
+            job.finished_at = datetime.now()
+            await asyncio.shield(asyncio.to_thread(job.publish, self.recordings_dir))
+
+    async def stop_matrix(self, job_id: str) -> MatrixJob:
+        """Cancel every unfinished cell of a matrix job"""
+        job = self.matrix_jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        await asyncio.gather(*(self.stop(cell.session.id) for cell in job.cells if not cell.session.done))
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    async def stop(self, session_id: str, timeout: float = STOP_TIMEOUT) -> EngineSession:
+        """Stop a session: recordings flush their actions, runs are cancelled"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        if session.done:
+            return session
+
+        if session.kind == "recording" and session.status == "active":
+            session.status = "stopping"
+            session.stop_event.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(session.task), timeout)
+            except asyncio.TimeoutError:
+                session.task.cancel()
+        else:
+            session.task.cancel()
+
+        await asyncio.gather(session.task, return_exceptions=True)
+        return session
+
+# Process-wide engine; started lazily on first use inside the server's event loop
+engine = SessionEngine()
+
+def get_engine() -> SessionEngine:
+    return engine
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import re
+import urllib.request
+import zipfile
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
+
+from pydantic import BaseModel
+
+from ..core import config
+
+logger = logging.getLogger(__name__)
+
+VIEWPORT_PATTERN = re.compile(r"^\s*(\d+)\s*[xX]\s*(\d+)\s*$")
+
+def parse_viewport(value: str) -> Dict[str, int]:
+    """Parse a "1280x720" viewport label"""
+    match = VIEWPORT_PATTERN.match(value or "")
+    if not match:
+        raise ValueError(f"Invalid viewport: {value!r} (expected WIDTHxHEIGHT)")
+    width, height = int(match.group(1)), int(match.group(2))
+    if not width or not height:
+        raise ValueError(f"Invalid viewport: {value!r}")
+    return {"width": width, "height": height}
+
+def parse_list(value: Optional[str]) -> List[str]:
+    """Split a comma separated form value, dropping blanks and duplicates"""
+    items: List[str] = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if item and item not in items:
+            items.append(item)
+    return items
+
+class NetworkMock(BaseModel):
+    """A canned response served for every request matching a URL glob"""
+    url: str
+    status: int = 200
+    body: Optional[Union[str, Dict[str, Any], List[Any]]] = None
+    content_type: Optional[str] = None
+    headers: Dict[str, str] = {}
+
+    def fulfill_options(self) -> Dict[str, Any]:
+        """Keyword arguments for route.fulfill()"""
+        options: Dict[str, Any] = {"status": self.status}
+        if self.headers:
+            options["headers"] = dict(self.headers)
+        if isinstance(self.body, (dict, list)):
+            options["body"] = json.dumps(self.body)
+            options["content_type"] = self.content_type or "application/json"
+        else:
+            if self.body is not None:
+                options["body"] = self.body
+            if self.content_type:
+                options["content_type"] = self.content_type
+        return options
+
+class SharedSetup:
+    """Browser-independent work done once per matrix job and reused by every cell"""
+
+    def __init__(self, steps: List[Dict[str, Any]], base_url: str, mocks: Optional[List[NetworkMock]] = None):
+        self.steps = steps
+        self.base_url = base_url
+        # Responses are serialized here once instead of per browser context
+        self.mocks = [(mock.url, mock.fulfill_options()) for mock in mocks or []]
+
+    async def install(self, context):
+        """Install the network mocks on an async_api BrowserContext"""
+        for pattern, options in self.mocks:
+            async def handler(route, options=options):
+                await route.fulfill(**options)
+
+            await context.route(pattern, handler)
+
+def load_mocks(value: Union[None, str, List[Any]]) -> List[NetworkMock]:
+    """Build network mocks from a JSON list (or an already decoded one)"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        if not value.strip():
+            return []
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError("Network mocks must be a JSON list")
+    if not isinstance(value, list):
+        raise ValueError("Network mocks must be a JSON list")
+    return [NetworkMock(**mock) for mock in value]
+
+class MatrixCell:
+    """One browser family x viewport combination of a matrix job"""
+
+    def __init__(self, test_run_id: int, browser_type: str, viewport: Optional[str] = None):
+        self.test_run_id = test_run_id
+        self.browser_type = browser_type
+        self.viewport = viewport  # None keeps the profile's (or browser's) default
+        self.session = None
+
+    @property
+    def status(self) -> str:
+        session = self.session
+        if session is None:
+            return "queued"
+        if session.result:
+            return session.result["status"]
+        return session.status
+
+    @property
+    def viewport_size(self) -> Optional[Dict[str, int]]:
+        return parse_viewport(self.viewport) if self.viewport else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        session = self.session
+        return {
+            "test_run_id": self.test_run_id,
+            "browser": self.browser_type,
+            "viewport": self.viewport,
+            "session_id": session.id if session else None,
+            "status": self.status,
+            "result": session.result if session else None,
+            "error": session.error if session else None,
+        }
+
+class MatrixJob:
+    """A test case scheduled across browser families and viewports as one job"""
+
+    def __init__(self, job_id: str, test_case_id: int, cells: List[MatrixCell]):
+        self.id = job_id
+        self.test_case_id = test_case_id
+        self.cells = cells
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.manifest: Optional[str] = None
+        self.artifacts: Optional[str] = None
+        self.upload: Optional[Dict[str, Any]] = None
+        self.task = None
+
+    @property
+    def status(self) -> str:
+        return matrix_status([cell.status for cell in self.cells])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "matrix_job_id": self.id,
+            "test_case_id": self.test_case_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "manifest": self.manifest,
+            "artifacts": self.artifacts,
+            "upload": self.upload,
+            "cells": [cell.to_dict() for cell in self.cells],
+        }
+
+    def publish(self, output_dir: str, upload_url: str = config.MATRIX_ARTIFACT_UPLOAD_URL) -> str:
+        """Publish the job's artifacts once, after every cell has finished.
+
+        The manifest and each cell's failure screenshots (output_dir/runs/<test
+        run id>) are bundled into one archive, which is uploaded with a single
+        PUT when upload_url is set. Returns the archive path.
+        """
+        job_dir = os.path.join(output_dir, "matrix", self.id)
+        os.makedirs(job_dir, exist_ok=True)
+        self.manifest = os.path.join(job_dir, "manifest.json")
+        self.artifacts = os.path.join(job_dir, "artifacts.zip")
+        with open(self.manifest, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+        with zipfile.ZipFile(self.artifacts, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(self.manifest, "manifest.json")
+            for cell in self.cells:
+                run_dir = os.path.join(output_dir, "runs", str(cell.test_run_id))
+                if os.path.isdir(run_dir):
+                    for name in sorted(os.listdir(run_dir)):
+                        archive.write(os.path.join(run_dir, name), f"runs/{cell.test_run_id}/{name}")
+
+        if upload_url:
+            self.upload = upload_artifacts(self.artifacts, upload_url.replace("{job_id}", self.id))
+        return self.artifacts
+
+def upload_artifacts(path: str, url: str, timeout: float = config.MATRIX_ARTIFACT_UPLOAD_TIMEOUT) -> Dict[str, Any]:
+    """PUT an artifact archive to url; failures are reported, not raised"""
+    try:
+        with open(path, "rb") as f:
+            request = urllib.request.Request(
+                url,
+                data=f,
+                method="PUT",
+                headers={"Content-Type": "application/zip", "Content-Length": str(os.path.getsize(path))},
+            )
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return {"url": url, "status": response.status}
+    except Exception as e:
+        logger.warning("Uploading matrix artifacts %s to %s failed: %s", path, url, e)
+        return {"url": url, "error": f"{type(e).__name__}: {e}"}
+
+def expand_matrix(browser_types: List[str], viewports: List[str]) -> List[Dict[str, Any]]:
+    """All browser x viewport combinations, grouped by browser family"""
+    return [
+        {"browser": browser_type, "viewport": viewport}
+        for browser_type in browser_types
+        for viewport in (viewports or [None])
+    ]
+
+def matrix_status(statuses: List[str]) -> str:
+    """Overall status of a matrix job from its cells' run statuses"""
+    if any(status in ("queued", "active", "running") for status in statuses):
+        return "running"
+    if statuses and all(status == "passed" for status in statuses):
+        return "passed"
+    if any(status == "failed" for status in statuses):
+        return "failed"
+    if any(status == "cancelled" for status in statuses):
+        return "cancelled"
+    return "error"
@@ -0,0 +1 @@
+# History package initialization
@@ -0,0 +1,226 @@
+import hashlib
+import os
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy.orm import Session
+
+from ..core import config
+from ..models import models
+
+# Archive layout (hive-style day partitions, one directory per table):
+#   <archive_dir>/runs/day=YYYY-MM-DD/part-<uuid>.parquet
+#   <archive_dir>/results/day=YYYY-MM-DD/part-<uuid>.parquet
+#   <archive_dir>/errors/day=YYYY-MM-DD/part-<uuid>.parquet
+TABLES = ("runs", "results", "errors")
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.dataset
+    except ImportError:
+        raise ImportError("The history archive requires pyarrow: pip install pyarrow")
+    return pyarrow
+
+def error_id(message: str) -> int:
+    """Stable 63-bit id for an error message, so duplicates collapse across partitions"""
+    digest = hashlib.blake2b(message.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+def _schemas(pa) -> Dict[str, Any]:
+    status = pa.dictionary(pa.int8(), pa.string())
+    return {
+        "runs": pa.schema([
+            ("test_run_id", pa.int64()),
+            ("test_case_id", pa.int64()),
+            ("status", status),
+            ("browser", pa.dictionary(pa.int8(), pa.string())),
+            ("viewport", pa.dictionary(pa.int8(), pa.string())),
+            ("matrix_job_id", pa.string()),
+            ("start_time", pa.timestamp("us")),
+            ("end_time", pa.timestamp("us")),
+        ]),
+        "results": pa.schema([
+            ("test_run_id", pa.int64()),
+            ("test_case_id", pa.int64()),
+            ("step_order", pa.int32()),
+            ("status", status),
+            ("error_id", pa.int64()),
+            ("screenshot", pa.string()),
+            ("execution_time", pa.int32()),
+            ("data_row", pa.int64()),
+        ]),
+        "errors": pa.schema([
+            ("error_id", pa.int64()),
+            ("message", pa.string()),
+        ]),
+    }
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    # Parquet timestamps are stored as naive UTC-agnostic values, like the SQLite backend
+    if value is not None and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+class HistoryArchive:
+    """Compacts finished test runs into day-partitioned Parquet files and reads them back"""
+
+    def __init__(self, archive_dir: str = config.ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+
+    def table_dir(self, table: str) -> str:
+        return os.path.join(self.archive_dir, table)
+
+    def has_data(self, table: str = "runs") -> bool:
+        return os.path.isdir(self.table_dir(table)) and any(
+            name.startswith("day=") for name in os.listdir(self.table_dir(table))
+        )
+
+    def compact(self, db: Session, older_than_days: int = config.ARCHIVE_AFTER_DAYS, batch_size: int = 1000) -> Dict[str, Any]:
+        """Move finished runs older than older_than_days (and their results) into the archive"""
+        pa = _pyarrow()
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        archived_runs = 0
+        archived_results = 0
+        days = set()
+
+        while True:
+            runs = (
+                db.query(models.TestRun)
+                .filter(models.TestRun.start_time < cutoff, models.TestRun.status != "running")
+                .order_by(models.TestRun.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not runs:
+                break
+
+            run_ids = [run.id for run in runs]
+            results = (
+                db.query(models.TestResult)
+                .filter(models.TestResult.test_run_id.in_(run_ids))
+                .all()
+            )
+            written = self._write_batch(pa, runs, results)
+
+            try:
+                db.query(models.TestResult).filter(models.TestResult.test_run_id.in_(run_ids)).delete(synchronize_session=False)
+                db.query(models.TestRun).filter(models.TestRun.id.in_(run_ids)).delete(synchronize_session=False)
+                self._publish(written)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._discard(written)
+                raise
+
+            archived_runs += len(runs)
+            archived_results += len(results)
+            days.update(day for day, _, _ in written)
+
+        return {
+            "archived_runs": archived_runs,
+            "archived_results": archived_results,
+            "days": sorted(str(day) for day in days),
+            "cutoff": cutoff.isoformat(),
+        }
+
+    def _write_batch(self, pa, runs, results) -> List[tuple]:
+        """Write one batch to temporary files; returns (day, table, tmp_path) triples"""
+        schemas = _schemas(pa)
+        run_day = {run.id: run.start_time.date() for run in runs}
+        run_case = {run.id: run.test_case_id for run in runs}
+
+        rows = {table: defaultdict(list) for table in TABLES}
+        for run in runs:
+            rows["runs"][run_day[run.id]].append({
+                "test_run_id": run.id,
+                "test_case_id": run.test_case_id,
+                "status": run.status,
+                "browser": run.browser,
+                "viewport": run.viewport,
+                "matrix_job_id": run.matrix_job_id,
+                "start_time": _naive(run.start_time),
+                "end_time": _naive(run.end_time),
+            })
+
+        seen_errors = defaultdict(set)
+        for result in results:
+            day = run_day[result.test_run_id]
+            message_id = None
+            if result.error_message:
+                message_id = error_id(result.error_message)
+                # Each distinct message is stored once per partition file
+                if message_id not in seen_errors[day]:
+                    seen_errors[day].add(message_id)
+                    rows["errors"][day].append({"error_id": message_id, "message": result.error_message})
+            rows["results"][day].append({
+                "test_run_id": result.test_run_id,
+                "test_case_id": run_case[result.test_run_id],
+                "step_order": result.step_order,
+                "status": result.status,
+                "error_id": message_id,
+                "screenshot": result.screenshot,
+                "execution_time": result.execution_time,
+                "data_row": result.data_row,
+            })
+
+        written = []
+        part = uuid.uuid4().hex
+        for table in TABLES:
+            for day, table_rows in rows[table].items():
+                partition_dir = os.path.join(self.table_dir(table), f"day={day.isoformat()}")
+                os.makedirs(partition_dir, exist_ok=True)
+                tmp_path = os.path.join(partition_dir, f".part-{part}.parquet.tmp")
+                pa.parquet.write_table(pa.Table.from_pylist(table_rows, schema=schemas[table]), tmp_path, compression="zstd")
+                written.append((day, table, tmp_path))
+        return written
+
+    @staticmethod
+    def _final_path(tmp_path: str) -> str:
+        # ".part-<uuid>.parquet.tmp" -> "part-<uuid>.parquet"
+        directory, name = os.path.split(tmp_path)
+        return os.path.join(directory, name[1:-len(".tmp")])
+
+    def _publish(self, written: List[tuple]):
+        # Dot-prefixed temporary files are ignored by readers until renamed
+        for _, _, tmp_path in written:
+            os.replace(tmp_path, self._final_path(tmp_path))
+
+    def _discard(self, written: List[tuple]):
+        for _, _, tmp_path in written:
+            for path in (tmp_path, self._final_path(tmp_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def read(self, table: str, since: Optional[date] = None, until: Optional[date] = None, columns: Optional[List[str]] = None, filter=None):
+        """Read an archived table as a pyarrow Table, pruning day partitions outside [since, until]"""
+        pa = _pyarrow()
+        if not self.has_data(table):
+            return _schemas(pa)[table].empty_table()
+
+        # Read with the current schema so files written before a column was added still load (as nulls)
+        schema = _schemas(pa)[table].append(pa.field("day", pa.string()))
+        dataset = pa.dataset.dataset(
+            self.table_dir(table),
+            schema=schema,
+            format="parquet",
+            partitioning=pa.dataset.partitioning(pa.schema([("day", pa.string())]), flavor="hive"),
+        )
+        expression = filter
+        day = pa.dataset.field("day")
+        if since is not None:
+            expression = (day >= since.isoformat()) if expression is None else expression & (day >= since.isoformat())
+        if until is not None:
+            expression = (day <= until.isoformat()) if expression is None else expression & (day <= until.isoformat())
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def error_messages(self, error_ids: List[int]) -> Dict[int, str]:
+        """Resolve deduplicated error ids back to their messages"""
+        pa = _pyarrow()
+        if not error_ids:
+            return {}
+        table = self.read("errors", filter=pa.dataset.field("error_id").isin(list(error_ids)))
+        return dict(zip(table.column("error_id").to_pylist(), table.column("message").to_pylist()))
@@ -0,0 +1,144 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .archive import HistoryArchive
+
+class HistoryQuery:
+    """Trend and flakiness queries over the hot test_runs/test_results tables and the archive.
+
+    Compaction moves runs out of the database, so each run lives in exactly one
+    tier and results from both tiers can simply be combined.
+    """
+
+    def __init__(self, db: Session, archive: Optional[HistoryArchive] = None):
+        self.db = db
+        self.archive = archive or HistoryArchive()
+
+    @staticmethod
+    def _since(days: int) -> date:
+        return (datetime.now() - timedelta(days=days)).date()
+
+    def _archived_runs(self, since: date, test_case_id: Optional[int], columns: List[str]):
+        import pyarrow.dataset as ds
+
+        run_filter = ds.field("test_case_id") == test_case_id if test_case_id is not None else None
+        return self.archive.read("runs", since=since, columns=columns, filter=run_filter)
+
+    def trend(self, days: int = 30, test_case_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Daily run counts by status"""
+        since = self._since(days)
+        counts: Dict[str, Counter] = defaultdict(Counter)
+
+        day = func.date(models.TestRun.start_time)
+        query = (
+            self.db.query(day, models.TestRun.status, func.count(models.TestRun.id))
+            .filter(models.TestRun.start_time >= datetime.combine(since, datetime.min.time()))
+            .group_by(day, models.TestRun.status)
+        )
+        if test_case_id is not None:
+            query = query.filter(models.TestRun.test_case_id == test_case_id)
+        for run_day, status, count in query:
+            counts[str(run_day)][status] += count
+
+        if self.archive.has_data("runs"):
+            import pyarrow as pa
+
+            table = self._archived_runs(since, test_case_id, ["day", "status", "test_run_id"])
+            table = table.set_column(1, "status", table.column("status").cast(pa.string()))
+            grouped = table.group_by(["day", "status"]).aggregate([("test_run_id", "count")])
+            for run_day, status, count in zip(
+                grouped.column("day").to_pylist(),
+                grouped.column("status").to_pylist(),
+                grouped.column("test_run_id_count").to_pylist(),
+            ):
+                counts[run_day][status] += count
+
+        return [
+            {"day": run_day, "runs": sum(statuses.values()), **dict(statuses)}
+            for run_day, statuses in sorted(counts.items())
+        ]
+
+    def flakiness(self, days: int = 30, test_case_id: Optional[int] = None, min_runs: int = 2) -> List[Dict[str, Any]]:
+        """Per test case: failure rate and how often the outcome flips between consecutive runs"""
+        since = self._since(days)
+        history: Dict[int, List[tuple]] = defaultdict(list)
+
+        query = (
+            self.db.query(models.TestRun.test_case_id, models.TestRun.start_time, models.TestRun.status)
+            .filter(
+                models.TestRun.start_time >= datetime.combine(since, datetime.min.time()),
+                models.TestRun.status != "running",
+            )
+        )
+        if test_case_id is not None:
+            query = query.filter(models.TestRun.test_case_id == test_case_id)
+        for case_id, start_time, status in query:
+            history[case_id].append((start_time.replace(tzinfo=None), status))
+
+        if self.archive.has_data("runs"):
+            table = self._archived_runs(since, test_case_id, ["test_case_id", "start_time", "status"])
+            for case_id, start_time, status in zip(
+                table.column("test_case_id").to_pylist(),
+                table.column("start_time").to_pylist(),
+                table.column("status").to_pylist(),
+            ):
+                history[case_id].append((start_time, status))
+
+        report = []
+        for case_id, runs in history.items():
+            if len(runs) < min_runs:
+                continue
+            statuses = [status for _, status in sorted(runs, key=lambda run: run[0])]
+            outcomes = [status == "passed" for status in statuses]
+            flips = sum(1 for previous, current in zip(outcomes, outcomes[1:]) if previous != current)
+            failures = outcomes.count(False)
+            report.append({
+                "test_case_id": case_id,
+                "runs": len(statuses),
+                "failures": failures,
+                "failure_rate": round(failures / len(statuses), 4),
+                "flips": flips,
+                "flip_rate": round(flips / (len(statuses) - 1), 4) if len(statuses) > 1 else 0.0,
+                "last_status": statuses[-1],
+            })
+
+        return sorted(report, key=lambda row: (row["flip_rate"], row["failure_rate"]), reverse=True)
+
+    def top_errors(self, days: int = 30, test_case_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most frequent step error messages"""
+        since = self._since(days)
+        counts: Counter = Counter()
+
+        query = (
+            self.db.query(models.TestResult.error_message, func.count(models.TestResult.id))
+            .join(models.TestRun, models.TestRun.id == models.TestResult.test_run_id)
+            .filter(
+                models.TestRun.start_time >= datetime.combine(since, datetime.min.time()),
+                models.TestResult.error_message.isnot(None),
+            )
+            .group_by(models.TestResult.error_message)
+        )
+        if test_case_id is not None:
+            query = query.filter(models.TestRun.test_case_id == test_case_id)
+        for message, count in query:
+            counts[message] += count
+
+        if self.archive.has_data("results"):
+            import pyarrow.dataset as ds
+
+            result_filter = ds.field("error_id").is_valid()
+            if test_case_id is not None:
+                result_filter = result_filter & (ds.field("test_case_id") == test_case_id)
+            table = self.archive.read("results", since=since, columns=["error_id"], filter=result_filter)
+            grouped = table.group_by("error_id").aggregate([("error_id", "count")])
+            ids = grouped.column("error_id").to_pylist()
+            messages = self.archive.error_messages(ids)
+            for message_id, count in zip(ids, grouped.column("error_id_count").to_pylist()):
+                counts[messages.get(message_id, f"<error {message_id}>")] += count
+
+        return [{"error_message": message, "count": count} for message, count in counts.most_common(limit)]
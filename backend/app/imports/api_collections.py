@@ -0,0 +1,103 @@
+from typing import List, Dict, Any, Optional
+
+import ijson
+
+from .streaming import POSTMAN_ITEM_PREFIX, NdjsonWriter, iter_nested_objects
+
+HTTP_METHODS = ("get", "post", "put", "patch", "delete", "head", "options")
+
+def _postman_url(url: Any) -> str:
+    if isinstance(url, str):
+        return url
+    if isinstance(url, dict):
+        if url.get("raw"):
+            return url["raw"]
+        host = ".".join(url.get("host") or [])
+        path = "/".join(url.get("path") or [])
+        protocol = url.get("protocol")
+        return f"{protocol + '://' if protocol else ''}{host}/{path}"
+    return ""
+
+def _postman_body(body: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not body:
+        return None
+    mode = body.get("mode")
+    return {"mode": mode, "content": body.get(mode)} if mode else None
+
+def import_postman_collection(path: str, output_file: str) -> Dict[str, Any]:
+    """Stream requests out of a Postman v2 collection into an NDJSON file"""
+    folders = 0
+    with open(path, "rb") as src, open(output_file, "w") as dst:
+        writer = NdjsonWriter(dst)
+        for item in iter_nested_objects(src, POSTMAN_ITEM_PREFIX.match, skip_key="item"):
+            request = item.get("request")
+            if request is None:
+                folders += 1
+                continue
+            if isinstance(request, str):
+                request = {"method": "GET", "url": request}
+            writer.write({
+                "name": item.get("name"),
+                "method": (request.get("method") or "GET").upper(),
+                "url": _postman_url(request.get("url")),
+                "headers": {
+                    header.get("key"): header.get("value")
+                    for header in request.get("header") or []
+                    if isinstance(header, dict) and not header.get("disabled")
+                },
+                "body": _postman_body(request.get("body")),
+            })
+    return {"requests": writer.count, "folders": folders, "items_file": output_file}
+
+def _swagger_base_url(path: str) -> str:
+    """Find the server URL (OpenAPI 3) or host/basePath (Swagger 2) with a streaming scan"""
+    with open(path, "rb") as f:
+        for server in ijson.items(f, "servers.item"):
+            if server.get("url"):
+                return server["url"].rstrip("/")
+
+    host = base_path = scheme = None
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if event != "string":
+                continue
+            if prefix == "host":
+                host = value
+            elif prefix == "basePath":
+                base_path = value
+            elif prefix == "schemes.item" and scheme is None:
+                scheme = value
+    if not host:
+        return base_path.rstrip("/") if base_path else ""
+    return f"{scheme or 'https'}://{host}{(base_path or '').rstrip('/')}"
+
+def import_swagger(path: str, output_file: str) -> Dict[str, Any]:
+    """Stream the operations of a Swagger 2 / OpenAPI 3 JSON document into an NDJSON file"""
+    base_url = _swagger_base_url(path)
+    paths = 0
+    with open(path, "rb") as src, open(output_file, "w") as dst:
+        writer = NdjsonWriter(dst)
+        # One path item at a time
+        for route, path_item in ijson.kvitems(src, "paths", use_float=True):
+            paths += 1
+            shared_parameters: List[Dict[str, Any]] = path_item.get("parameters") or []
+            for method in HTTP_METHODS:
+                operation = path_item.get(method)
+                if not isinstance(operation, dict):
+                    continue
+                parameters = shared_parameters + (operation.get("parameters") or [])
+                writer.write({
+                    "name": operation.get("operationId") or operation.get("summary") or f"{method.upper()} {route}",
+                    "method": method.upper(),
+                    "url": f"{base_url}{route}",
+                    "tags": operation.get("tags") or [],
+                    "parameters": [
+                        {"name": parameter.get("name"), "in": parameter.get("in"), "required": bool(parameter.get("required"))}
+                        for parameter in parameters
+                        if isinstance(parameter, dict) and "name" in parameter
+                    ],
+                    "has_body": "requestBody" in operation or any(
+                        isinstance(parameter, dict) and parameter.get("in") == "body" for parameter in parameters
+                    ),
+                })
+    return {"operations": writer.count, "paths": paths, "base_url": base_url, "items_file": output_file}
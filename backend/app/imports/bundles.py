@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tarfile
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Dict, Any, IO, Iterator, Tuple
+
+import ijson
+
+from .streaming import JsonArrayWriter
+
+# Files accepted from a recording bundle; everything else is ignored
+BUNDLE_EXTENSIONS = (".json", ".png", ".jpg", ".jpeg", ".webp")
+
+def _iter_zip_members(path: str) -> Iterator[Tuple[str, IO[bytes]]]:
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir():
+                with archive.open(info) as member:
+                    yield info.filename, member
+
+def _iter_tar_members(path: str) -> Iterator[Tuple[str, IO[bytes]]]:
+    # Stream mode reads the archive sequentially, also for compressed tarballs
+    with tarfile.open(path, mode="r|*") as archive:
+        for info in archive:
+            if info.isfile():
+                member = archive.extractfile(info)
+                if member is not None:
+                    yield info.name, member
+
+def iter_bundle_members(path: str) -> Iterator[Tuple[str, IO[bytes]]]:
+    """Yield (name, file object) for every file in a zip or tar recording bundle"""
+    if zipfile.is_zipfile(path):
+        return _iter_zip_members(path)
+    if tarfile.is_tarfile(path):
+        return _iter_tar_members(path)
+    raise ValueError("Recording bundles must be zip or tar archives")
+
+def import_recording_bundle(path: str, recordings_dir: str) -> Dict[str, Any]:
+    """Unpack a recording bundle (actions.json + screenshots) into a new recording.
+
+    Members are streamed to disk one at a time; actions.json is then rewritten
+    action by action so screenshot paths point into the new recording.
+    """
+    recording_id = f"recording_import_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    recording_path = os.path.join(recordings_dir, recording_id)
+    os.makedirs(recording_path, exist_ok=True)
+    source_actions = os.path.join(recording_path, "actions.source.json")
+
+    files = 0
+    total_bytes = 0
+    found_actions = False
+    try:
+        for name, member in iter_bundle_members(path):
+            # Flatten paths: bundles may nest files in a folder, and names must not escape the recording
+            basename = os.path.basename(name)
+            if not basename or basename.startswith(".") or not basename.lower().endswith(BUNDLE_EXTENSIONS):
+                continue
+
+            if basename == "actions.json":
+                if found_actions:
+                    raise ValueError("Bundle contains more than one actions.json")
+                found_actions = True
+                destination = source_actions
+            elif basename.endswith(".json"):
+                continue
+            else:
+                destination = os.path.join(recording_path, basename)
+
+            with open(destination, "wb") as out:
+                shutil.copyfileobj(member, out, length=1024 * 1024)
+            files += 1
+            total_bytes += os.path.getsize(destination)
+
+        if not found_actions:
+            raise ValueError("Bundle does not contain an actions.json")
+
+        actions_file = os.path.join(recording_path, "actions.json")
+        with open(source_actions, "rb") as src, open(actions_file, "w") as dst, JsonArrayWriter(dst) as writer:
+            for action in ijson.items(src, "item", use_float=True):
+                screenshot = action.get("screenshot")
+                if screenshot:
+                    local = os.path.join(recording_path, os.path.basename(screenshot))
+                    action["screenshot"] = local if os.path.exists(local) else None
+                writer.write(action)
+        os.remove(source_actions)
+    except Exception:
+        shutil.rmtree(recording_path, ignore_errors=True)
+        raise
+
+    return {
+        "recording_id": recording_id,
+        "actions_count": writer.count,
+        "files": files,
+        "bytes": total_bytes,
+    }
@@ -0,0 +1,85 @@
+import json
+import re
+from typing import Any, Callable, Iterator, IO
+
+import ijson
+
+def iter_nested_objects(f: IO[bytes], is_object_prefix: Callable[[str], bool], skip_key: str) -> Iterator[Any]:
+    """Stream objects found at any prefix accepted by is_object_prefix.
+
+    Objects can nest (e.g. Postman folders contain items under ``skip_key``);
+    each object is built without its ``skip_key`` children, which are yielded
+    as objects of their own, so only one object per nesting level is ever held
+    in memory.
+    """
+    stack = []  # (prefix, builder)
+
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if event == "start_map" and is_object_prefix(prefix):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            stack.append((prefix, builder))
+            continue
+
+        if not stack:
+            continue
+
+        base, builder = stack[-1]
+        if prefix == base and event == "end_map":
+            builder.event(event, value)
+            stack.pop()
+            yield builder.value
+            continue
+
+        children = f"{base}.{skip_key}"
+        if prefix == base and event == "map_key" and value == skip_key:
+            continue
+        if prefix == children or prefix.startswith(children + "."):
+            continue
+        builder.event(event, value)
+
+class JsonArrayWriter:
+    """Write a JSON array one element at a time"""
+
+    def __init__(self, f: IO[str], indent: int = 2):
+        self.f = f
+        self.indent = indent
+        self.count = 0
+
+    def __enter__(self):
+        self.f.write("[")
+        return self
+
+    def write(self, item: Any):
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(item, indent=self.indent))
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self.f.write("\n]" if self.count else "]")
+        return False
+
+class NdjsonWriter:
+    """Write one JSON document per line"""
+
+    def __init__(self, f: IO[str]):
+        self.f = f
+        self.count = 0
+
+    def write(self, item: Any):
+        self.f.write(json.dumps(item))
+        self.f.write("\n")
+        self.count += 1
+
+def iter_ndjson(path: str, offset: int = 0, limit: int = 100) -> Iterator[Any]:
+    """Read a page of documents from an NDJSON file without loading it whole"""
+    with open(path) as f:
+        for index, line in enumerate(f):
+            if index < offset:
+                continue
+            if index >= offset + limit:
+                return
+            yield json.loads(line)
+
+# Postman collection items live at item.item, folders nest as item.item.item.item, ...
+POSTMAN_ITEM_PREFIX = re.compile(r"^item\.item(\.item\.item)*$")
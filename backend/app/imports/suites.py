@@ -0,0 +1,105 @@
+import json
+from typing import Dict, Any, Iterator
+
+import ijson
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models import models
+from ..runner.profiles import load_profile
+
+# Steps are inserted in batches while the export is streamed in; the whole
+# import is one transaction, so a failed import leaves nothing behind and can be retried
+SUITE_BATCH_SIZE = 100
+
+STEP_FIELDS = ("order", "action_type", "selector", "selector_type", "value", "screenshot")
+
+def import_test_suite(path: str, db: Session, project_id: int) -> Dict[str, Any]:
+    """Import a suite export ({"test_cases": [...]}) case by case into a project.
+
+    Nothing is committed until every case has been read; the caller rolls back on error.
+    """
+    cases = 0
+    steps = 0
+    pending_steps = []
+
+    def flush():
+        if pending_steps:
+            db.execute(insert(models.TestStep), pending_steps)
+            pending_steps.clear()
+
+    with open(path, "rb") as f:
+        for case in ijson.items(f, "test_cases.item", use_float=True):
+            if not case.get("name") or not case.get("base_url"):
+                raise ValueError(f"Test case #{cases + 1} is missing name or base_url")
+            try:
+                load_profile(case.get("run_profile"))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Test case #{cases + 1} has an invalid run profile: {e}")
+
+            test_case = models.TestCase(
+                name=case["name"],
+                description=case.get("description"),
+                base_url=case["base_url"],
+                run_profile=case.get("run_profile"),
+                project_id=project_id,
+            )
+            db.add(test_case)
+            db.flush()
+
+            for index, step in enumerate(case.get("steps") or []):
+                row = {field: step.get(field) for field in STEP_FIELDS}
+                if row["order"] is None:
+                    row["order"] = index
+                row["test_case_id"] = test_case.id
+                pending_steps.append(row)
+                steps += 1
+
+            cases += 1
+            if cases % SUITE_BATCH_SIZE == 0:
+                flush()
+    flush()
+    db.commit()
+
+    return {"project_id": project_id, "test_cases": cases, "test_steps": steps}
+
+def iter_test_suite_export(db: Session, project_id: int, batch_size: int = SUITE_BATCH_SIZE) -> Iterator[str]:
+    """Stream a project's test cases and steps as a suite export document"""
+    yield '{"project_id": %d, "test_cases": [' % project_id
+
+    # One page of cases at a time (keyset pagination), with the steps of the whole page in one query
+    first = True
+    last_id = 0
+    while True:
+        test_cases = (
+            db.query(models.TestCase)
+            .filter(models.TestCase.project_id == project_id, models.TestCase.id > last_id)
+            .order_by(models.TestCase.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not test_cases:
+            break
+        last_id = test_cases[-1].id
+
+        steps_by_case: Dict[int, list] = {test_case.id: [] for test_case in test_cases}
+        steps = (
+            db.query(models.TestStep)
+            .filter(models.TestStep.test_case_id.in_(list(steps_by_case)))
+            .order_by(models.TestStep.test_case_id, models.TestStep.order)
+        )
+        for step in steps:
+            steps_by_case[step.test_case_id].append({field: getattr(step, field) for field in STEP_FIELDS})
+
+        for test_case in test_cases:
+            document = {
+                "name": test_case.name,
+                "description": test_case.description,
+                "base_url": test_case.base_url,
+                "run_profile": test_case.run_profile,
+                "steps": steps_by_case[test_case.id],
+            }
+            yield ("\n" if first else ",\n") + json.dumps(document)
+            first = False
+
+    yield "\n]}\n"
@@ -0,0 +1,49 @@
+import os
+from typing import Dict, Any
+
+from ..core import config
+from ..db.database import SessionLocal
+from .api_collections import import_postman_collection, import_swagger
+from .bundles import import_recording_bundle
+from .suites import import_test_suite
+from .uploads import UploadStore
+
+def items_path(store: UploadStore, upload_id: str) -> str:
+    """NDJSON file holding the parsed requests of a Postman/Swagger import"""
+    return os.path.join(store.upload_dir, "imports", f"{upload_id}.ndjson")
+
+def run_import(store: UploadStore, upload_id: str):
+    """Background task: parse a completed upload and record the outcome on it"""
+    meta = store.update(upload_id, status="importing")
+    data_path = store.data_path(upload_id)
+    kind = meta["kind"]
+
+    try:
+        if kind == "recording":
+            result = import_recording_bundle(data_path, config.RECORDINGS_DIR)
+        elif kind in ("postman", "swagger"):
+            output_file = items_path(store, upload_id)
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            if kind == "postman":
+                result = import_postman_collection(data_path, output_file)
+            else:
+                result = import_swagger(data_path, output_file)
+        elif kind == "suite":
+            db = SessionLocal()
+            try:
+                result = import_test_suite(data_path, db, meta["options"]["project_id"])
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        else:
+            raise ValueError(f"Unsupported upload kind: {kind}")
+    except Exception as e:
+        store.update(upload_id, status="failed", error=f"{type(e).__name__}: {e}")
+        return
+
+    # The staged file is no longer needed once its contents are imported
+    if os.path.exists(data_path):
+        os.remove(data_path)
+    store.update(upload_id, status="imported", result=result)
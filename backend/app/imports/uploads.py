@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Dict, Any, Optional, AsyncIterator
+
+import anyio
+
+from ..core import config
+from ..data_driven.datasets import detect_format
+
+UPLOAD_KINDS = ("recording", "postman", "swagger", "suite", "dataset")
+
+# Received chunk data is written to disk in blocks of this size, off the event loop
+WRITE_BLOCK_SIZE = 1024 * 1024
+
+class UploadError(Exception):
+    """Raised for invalid upload operations; status_code maps onto the HTTP response"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+class UploadStore:
+    """Resumable chunked uploads staged on disk.
+
+    Each upload is a ``<id>.part`` file that chunks are appended to at an
+    explicit offset, plus ``<id>.meta.json`` with its state. A client that loses
+    its connection asks for the current offset and resumes from there. Chunk
+    bodies are streamed straight to disk, so request size doesn't matter.
+    """
+
+    def __init__(self, upload_dir: str = config.UPLOADS_DIR, max_size: int = config.MAX_UPLOAD_SIZE):
+        self.upload_dir = upload_dir
+        self.max_size = max_size
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _path(self, upload_id: str, suffix: str) -> str:
+        # Upload ids are generated hex strings; refuse anything that could escape the directory
+        if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+            raise UploadError("Upload not found", status_code=404)
+        return os.path.join(self.upload_dir, f"{upload_id}{suffix}")
+
+    def data_path(self, upload_id: str) -> str:
+        return self._path(upload_id, ".part")
+
+    def _read_meta(self, upload_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(upload_id, ".meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError("Upload not found", status_code=404)
+
+    def _write_meta(self, meta: Dict[str, Any]):
+        meta["updated_at"] = time.time()
+        path = self._path(meta["upload_id"], ".meta.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.tmp", path)
+
+    def create(self, kind: str, filename: str, total_size: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if kind not in UPLOAD_KINDS:
+            raise UploadError(f"Unsupported upload kind: {kind}")
+        if kind == "swagger" and (filename or "").lower().endswith((".yaml", ".yml")):
+            raise UploadError("Only JSON Swagger/OpenAPI documents can be imported")
+        if kind == "dataset":
+            try:
+                detect_format(filename or "")
+            except ValueError as e:
+                raise UploadError(str(e))
+        if total_size is not None and (total_size < 0 or total_size > self.max_size):
+            raise UploadError(f"Upload size must be between 0 and {self.max_size} bytes", status_code=413)
+
+        os.makedirs(self.upload_dir, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        open(self._path(upload_id, ".part"), "wb").close()
+        meta = {
+            "upload_id": upload_id,
+            "kind": kind,
+            "filename": os.path.basename(filename or "upload"),
+            "total_size": total_size,
+            "offset": 0,
+            "status": "uploading",  # uploading, complete, importing, imported, failed
+            "options": options or {},
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+        }
+        self._write_meta(meta)
+        return meta
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        meta = self._read_meta(upload_id)
+        # The file on disk is the source of truth for how much has been received
+        if meta["status"] == "uploading":
+            meta["offset"] = os.path.getsize(self.data_path(upload_id))
+        return meta
+
+    def update(self, upload_id: str, **changes) -> Dict[str, Any]:
+        meta = self._read_meta(upload_id)
+        meta.update(changes)
+        self._write_meta(meta)
+        return meta
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        if upload_id not in self._locks:
+            self._locks[upload_id] = asyncio.Lock()
+        return self._locks[upload_id]
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Append a streamed chunk that starts at offset; returns the updated status"""
+        # File I/O runs in worker threads: this event loop also hosts the engine's browser sessions
+        async with self._lock(upload_id):
+            meta = await anyio.to_thread.run_sync(self.status, upload_id)
+            if meta["status"] != "uploading":
+                raise UploadError(f"Upload is {meta['status']}", status_code=409)
+            if offset != meta["offset"]:
+                # Tell the client where to resume from
+                raise UploadError(f"Offset mismatch: expected {meta['offset']}", status_code=409)
+
+            limit = meta["total_size"] if meta["total_size"] is not None else self.max_size
+            path = self.data_path(upload_id)
+            written = offset
+            f = await anyio.to_thread.run_sync(open, path, "r+b")
+            try:
+                f.seek(offset)
+                block = bytearray()
+                try:
+                    async for chunk in chunks:
+                        if written + len(chunk) > limit:
+                            raise UploadError("Chunk exceeds the declared upload size", status_code=413)
+                        block += chunk
+                        written += len(chunk)
+                        if len(block) >= WRITE_BLOCK_SIZE:
+                            await anyio.to_thread.run_sync(f.write, bytes(block))
+                            block.clear()
+                    if block:
+                        await anyio.to_thread.run_sync(f.write, bytes(block))
+                except BaseException:
+                    # Drop a partially received chunk so the client can resend it cleanly
+                    f.truncate(offset)
+                    raise
+            finally:
+                f.close()
+
+            meta["offset"] = written
+            await anyio.to_thread.run_sync(self._write_meta, meta)
+            return meta
+
+    def complete(self, upload_id: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Mark an upload as fully received, optionally verifying its checksum"""
+        meta = self.status(upload_id)
+        if meta["status"] != "uploading":
+            raise UploadError(f"Upload is {meta['status']}", status_code=409)
+        if meta["total_size"] is not None and meta["offset"] != meta["total_size"]:
+            raise UploadError(f"Upload incomplete: {meta['offset']} of {meta['total_size']} bytes received", status_code=409)
+
+        if sha256:
+            digest = hashlib.sha256()
+            with open(self.data_path(upload_id), "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            if digest.hexdigest() != sha256.lower():
+                raise UploadError("Checksum mismatch")
+
+        meta["status"] = "complete"
+        meta["total_size"] = meta["offset"]
+        self._write_meta(meta)
+        return meta
+
+    def delete(self, upload_id: str):
+        for suffix in (".part", ".meta.json"):
+            path = self._path(upload_id, suffix)
+            if os.path.exists(path):
+                os.remove(path)
+        self._locks.pop(upload_id, None)
+
+# Process-wide store; per-upload locks only guard appends within this process
+upload_store = UploadStore()
+
+def get_upload_store() -> UploadStore:
+    return upload_store
@@ -23,6 +23,7 @@ class Project(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     owner_id = Column(Integer, ForeignKey("users.id"))
+    run_profile = Column(JSON, nullable=True)  # Default run profile for the project's suite
     
     owner = relationship("User", back_populates="projects")
     test_cases = relationship("TestCase", back_populates="project")
@@ -37,6 +38,7 @@ class TestCase(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     project_id = Column(Integer, ForeignKey("projects.id"))
+    run_profile = Column(JSON, nullable=True)  # Overrides the project's run profile
     
     project = relationship("Project", back_populates="test_cases")
     steps = relationship("TestStep", back_populates="test_case")
@@ -52,7 +54,7 @@ class TestStep(Base):
     selector_type = Column(String, nullable=True)  # css, xpath, text, etc.
     value = Column(String, nullable=True)  # Value to type, assert, etc.
     screenshot = Column(String, nullable=True)  # Path to screenshot
-    test_case_id = Column(Integer, ForeignKey("test_cases.id"))
+    test_case_id = Column(Integer, ForeignKey("test_cases.id"), index=True)
     
     test_case = relationship("TestCase", back_populates="steps")
 
@@ -64,6 +66,8 @@ class TestRun(Base):
     end_time = Column(DateTime(timezone=True), nullable=True)
     status = Column(String)  # running, passed, failed, error
     browser = Column(String)
+    viewport = Column(String, nullable=True)  # e.g. "1280x720"; None is the browser default
+    matrix_job_id = Column(String, nullable=True, index=True)  # Groups the runs of one matrix job
     test_case_id = Column(Integer, ForeignKey("test_cases.id"))
     
     test_case = relationship("TestCase", back_populates="runs")
@@ -78,6 +82,7 @@ class TestResult(Base):
     error_message = Column(Text, nullable=True)
     screenshot = Column(String, nullable=True)  # Path to screenshot
     execution_time = Column(Integer, nullable=True)  # in milliseconds
+    data_row = Column(Integer, nullable=True)  # Dataset row index for data-driven runs
     test_run_id = Column(Integer, ForeignKey("test_runs.id"))
     
     test_run = relationship("TestRun", back_populates="results")
@@ -0,0 +1,119 @@
+import json
+import os
+from typing import List, Dict, Any, Optional
+
+# A navigation this soon after a click is treated as caused by the click
+CLICK_NAVIGATION_WINDOW = 5.0  # in seconds
+
+def _implied_by_click(previous: Dict[str, Any], navigation: Dict[str, Any], window: float) -> bool:
+    if previous.get("type") != "click":
+        return False
+    clicked_at = previous.get("timestamp")
+    navigated_at = navigation.get("timestamp")
+    if clicked_at is None or navigated_at is None:
+        return True
+    return 0 <= navigated_at - clicked_at <= window
+
+def compact_actions(actions: List[Dict[str, Any]], click_navigation_window: float = CLICK_NAVIGATION_WINDOW) -> List[Dict[str, Any]]:
+    """Collapse redundant recorded events.
+
+    - successive input events on the same selector become one input with the final value
+    - a navigation right after a click is dropped, replaying the click navigates anyway
+    - a navigation to the URL the page is already on is dropped
+    """
+    compacted: List[Dict[str, Any]] = []
+    raw_previous: Optional[Dict[str, Any]] = None
+
+    for action in actions:
+        previous = compacted[-1] if compacted else None
+        # Click implication looks at the raw event stream: one click implies at most one navigation
+        implied_by = raw_previous
+        raw_previous = action
+        action_type = action.get("type")
+
+        if previous is not None:
+            if (
+                action_type == "input"
+                and previous.get("type") == "input"
+                and previous.get("selector") == action.get("selector")
+            ):
+                # Keep the last keystroke's value, timestamp and screenshot
+                compacted[-1] = dict(action)
+                continue
+
+            if action_type == "navigation":
+                if implied_by is not None and _implied_by_click(implied_by, action, click_navigation_window):
+                    continue
+                if previous.get("url") == action.get("url"):
+                    continue
+
+        compacted.append(dict(action))
+
+    return compacted
+
+def _referenced_screenshots(actions: List[Dict[str, Any]]) -> set:
+    return {
+        os.path.abspath(action["screenshot"])
+        for action in actions
+        if action.get("screenshot")
+    }
+
+def compact_recording(recording_path: str, keep_original: bool = True, click_navigation_window: float = CLICK_NAVIGATION_WINDOW) -> Optional[Dict[str, Any]]:
+    """Compact a recording's actions.json in place and delete screenshots no step uses.
+
+    With keep_original the uncompacted actions are kept as actions.raw.json for
+    inspection only: screenshots referenced just by dropped events are deleted,
+    so some of its screenshot paths no longer exist. That file also marks the
+    recording as compacted; None is returned for a recording compacted before.
+    """
+    actions_file = os.path.join(recording_path, "actions.json")
+    if not os.path.exists(actions_file):
+        raise FileNotFoundError(f"Actions file not found: {actions_file}")
+
+    raw_file = os.path.join(recording_path, "actions.raw.json")
+    if keep_original and os.path.exists(raw_file):
+        return None
+
+    with open(actions_file, "r") as f:
+        actions = json.load(f)
+
+    if keep_original:
+        os.replace(actions_file, raw_file)
+
+    compacted = compact_actions(actions, click_navigation_window)
+
+    tmp_file = f"{actions_file}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(compacted, f, indent=2)
+    os.replace(tmp_file, actions_file)
+
+    removed, freed = prune_screenshots(recording_path, compacted, candidates=actions)
+
+    return {
+        "actions_before": len(actions),
+        "actions_after": len(compacted),
+        "screenshots_removed": removed,
+        "bytes_freed": freed,
+    }
+
+def prune_screenshots(recording_path: str, actions: List[Dict[str, Any]], candidates: Optional[List[Dict[str, Any]]] = None):
+    """Delete step screenshots in the recording directory that no action references.
+
+    Only files referenced by ``candidates`` (the pre-compaction actions) or named
+    like recorder screenshots (step_<n>.png) are considered. Returns
+    (files removed, bytes freed).
+    """
+    keep = _referenced_screenshots(actions)
+    targets = _referenced_screenshots(candidates or [])
+    for name in os.listdir(recording_path):
+        if name.startswith("step_") and name.endswith(".png"):
+            targets.add(os.path.abspath(os.path.join(recording_path, name)))
+
+    removed = 0
+    freed = 0
+    for path in targets - keep:
+        if os.path.isfile(path):
+            freed += os.path.getsize(path)
+            os.remove(path)
+            removed += 1
+    return removed, freed
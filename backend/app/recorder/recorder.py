@@ -12,6 +12,7 @@ class WebRecorder:
         self.recording_id = f"recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         self.recording_path = os.path.join(output_dir, self.recording_id)
         self.actions = []
+        self.playwright = None
         self.browser = None
         self.page = None
         
@@ -20,14 +21,14 @@ class WebRecorder:
     
     def start_recording(self, browser_type: str = "chromium", headless: bool = False):
         """Start a new recording session"""
-        playwright = sync_playwright().start()
+        self.playwright = sync_playwright().start()
         
         if browser_type == "chromium":
-            self.browser = playwright.chromium.launch(headless=headless)
+            self.browser = self.playwright.chromium.launch(headless=headless)
         elif browser_type == "firefox":
-            self.browser = playwright.firefox.launch(headless=headless)
+            self.browser = self.playwright.firefox.launch(headless=headless)
         elif browser_type == "webkit":
-            self.browser = playwright.webkit.launch(headless=headless)
+            self.browser = self.playwright.webkit.launch(headless=headless)
         else:
             raise ValueError(f"Unsupported browser type: {browser_type}")
         
@@ -126,17 +127,19 @@ class WebRecorder:
             return f".{element_class.replace(' ', '.')}"
         
         # Fall back to XPath
-        return self.page.eval_on_selector(element, "el => {
+        return self.page.eval_on_selector(element, """el => {
             const xpath = document.evaluate(
                 'xpath', el, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
             ).singleNodeValue;
             return xpath;
-        }")
+        }""")
     
     def stop_recording(self):
         """Stop the recording session and save the recorded actions"""
         if self.browser:
             self.browser.close()
+        if self.playwright:
+            self.playwright.stop()
         
         # Save actions to a JSON file
         actions_file = os.path.join(self.recording_path, "actions.json")
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..core import config
+from .runner import INPUT_ACTIONS, NAVIGATION_ACTIONS
+
+# Selector fragments that identify a password field
+PASSWORD_HINTS = ("password", "passwd", "pwd", "[type=password]", "[type='password']", '[type="password"]')
+
+def step_key(step: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """The parts of a step that decide whether two steps are the same action"""
+    return (step.get("action_type"), step.get("selector"), step.get("value") or None)
+
+def _is_password_fill(step: Dict[str, Any]) -> bool:
+    selector = (step.get("selector") or "").lower()
+    return step.get("action_type") in INPUT_ACTIONS and any(hint in selector for hint in PASSWORD_HINTS)
+
+def detect_login_prefix(steps: List[Dict[str, Any]]) -> int:
+    """Return the number of leading steps that make up a login flow (0 if none).
+
+    The login ends at the first click after a password field is filled, plus any
+    navigations that immediately follow it (post-login redirects). A form
+    submitted with Enter shows up as a navigation right after the fill.
+    """
+    password_index = next((i for i, step in enumerate(steps) if _is_password_fill(step)), None)
+    if password_index is None:
+        return 0
+
+    # Values bound to a dataset differ per row, so the state can't be shared
+    if any("${" in (step.get("value") or "") for step in steps[:password_index + 1]):
+        return 0
+
+    end = None
+    for i in range(password_index + 1, len(steps)):
+        action_type = steps[i].get("action_type")
+        if action_type == "click" or action_type in NAVIGATION_ACTIONS:
+            end = i
+            break
+        if action_type not in INPUT_ACTIONS:
+            return 0
+    if end is None:
+        return 0
+
+    while end + 1 < len(steps) and steps[end + 1].get("action_type") in NAVIGATION_ACTIONS:
+        end += 1
+
+    # Nothing left to run from the cached state
+    if end + 1 >= len(steps):
+        return 0
+    return end + 1
+
+def prefix_key(base_url: str, steps: List[Dict[str, Any]], browser_type: str = "chromium") -> str:
+    """Cache key for the state produced by running steps from base_url"""
+    payload = json.dumps([browser_type, base_url, [step_key(step) for step in steps]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def find_shared_prefixes(test_cases: List[Dict[str, Any]], min_cases: int = 2) -> List[Dict[str, Any]]:
+    """Group test cases by identical login prefix.
+
+    test_cases are dicts with ``id``, ``base_url`` and ``steps``. Returns one
+    entry per distinct prefix shared by at least min_cases test cases.
+    """
+    # Cache keys name the cached state files, so they are only used for grouping
+    groups: Dict[str, Dict[str, Any]] = {}
+    members = defaultdict(list)
+
+    for test_case in test_cases:
+        steps = test_case["steps"]
+        length = detect_login_prefix(steps)
+        if not length:
+            continue
+        key = prefix_key(test_case["base_url"], steps[:length])
+        members[key].append(test_case["id"])
+        groups.setdefault(key, {
+            "base_url": test_case["base_url"],
+            "prefix_length": length,
+            "steps": [
+                {"action_type": step.get("action_type"), "selector": step.get("selector")}
+                for step in steps[:length]
+            ],
+        })
+
+    shared = []
+    for key, group in groups.items():
+        if len(members[key]) >= min_cases:
+            shared.append({**group, "test_case_ids": members[key], "cases": len(members[key])})
+    return sorted(shared, key=lambda group: group["cases"], reverse=True)
+
+def session_expired(landed_url: str, cached_url: str) -> bool:
+    """Whether opening the cached post-login URL ended up elsewhere (typically
+    redirected back to the login page), meaning the cached session is no longer valid"""
+    landed, cached = urlsplit(landed_url), urlsplit(cached_url)
+    return (landed.scheme, landed.netloc, landed.path.rstrip("/")) != (cached.scheme, cached.netloc, cached.path.rstrip("/"))
+
+class AuthStateCache:
+    """Stores storage_state snapshots (cookies + localStorage) on disk with a TTL.
+
+    Each worker process keeps one lock per prefix, so concurrent sessions that
+    share a login wait for the first one to produce the state instead of all
+    logging in at once.
+    """
+
+    def __init__(self, cache_dir: str = config.AUTH_CACHE_DIR, ttl: int = config.AUTH_STATE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.meta.json")
+
+    def lock(self, key: str) -> asyncio.Lock:
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {"storage_state": path, "url": url, ...} if a fresh entry exists"""
+        state_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - meta.get("created_at", 0) > self.ttl or not os.path.exists(state_path):
+            self.invalidate(key)
+            return None
+        return {**meta, "storage_state": state_path}
+
+    def _write_private(self, path: str, data: Dict[str, Any]):
+        # Session cookies: the directory and files are readable by the server's user only,
+        # also when the directory already existed with looser permissions
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        os.chmod(self.cache_dir, 0o700)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # A leftover temporary file keeps its old mode
+        os.chmod(tmp_path, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def put(self, key: str, state: Dict[str, Any], url: str, prefix_length: int) -> Dict[str, Any]:
+        """Store a storage_state snapshot (as returned by context.storage_state()) and its metadata"""
+        state_path, meta_path = self._paths(key)
+        meta = {"created_at": time.time(), "url": url, "prefix_length": prefix_length}
+        self._write_private(state_path, state)
+        self._write_private(meta_path, meta)
+        return {**meta, "storage_state": state_path}
+
+    def invalidate(self, key: str):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def clear(self) -> int:
+        """Remove every cached state; returns the number of entries removed"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".meta.json"):
+                self.invalidate(name[:-len(".meta.json")])
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        if os.path.isdir(self.cache_dir):
+            entries = sum(1 for name in os.listdir(self.cache_dir) if name.endswith(".meta.json"))
+        return {"entries": entries, "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
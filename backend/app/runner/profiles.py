@@ -0,0 +1,252 @@
+import json
+import os
+from typing import List, Dict, Any, Optional, Union
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+
+from ..core import config
+
+# Hosts of common analytics/tracking services, matched as domain suffixes
+ANALYTICS_HOSTS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "analytics.google.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "fullstory.com",
+    "clarity.ms",
+    "newrelic.com",
+    "nr-data.net",
+    "sentry.io",
+    "intercom.io",
+]
+
+# Playwright request.resource_type values a profile may block
+BLOCKABLE_RESOURCE_TYPES = ["image", "font", "media", "stylesheet", "texttrack", "manifest", "other"]
+
+# Injected into every page when animations are disabled
+DISABLE_ANIMATIONS_SCRIPT = """
+(() => {
+    const css = '*, *::before, *::after { transition: none !important; transition-delay: 0s !important; animation: none !important; animation-delay: 0s !important; caret-color: transparent !important; scroll-behavior: auto !important; }';
+    const install = () => {
+        const style = document.createElement('style');
+        style.setAttribute('data-run-profile', 'disable-animations');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', install);
+    } else {
+        install();
+    }
+})();
+"""
+
+class RunProfile(BaseModel):
+    """Browser tuning applied to a test run (and emitted into generated tests)"""
+    name: str = "custom"
+    block_resource_types: List[str] = []
+    block_analytics: bool = False
+    block_third_party: bool = False
+    block_url_patterns: List[str] = []
+    disable_animations: bool = False
+    viewport: Optional[Dict[str, int]] = None
+    storage_state: Optional[str] = None  # Saved storage_state JSON file in STORAGE_STATE_DIR
+
+    @property
+    def routes_requests(self) -> bool:
+        return bool(self.block_resource_types or self.block_analytics or self.block_third_party or self.block_url_patterns)
+
+    def context_options(self) -> Dict[str, Any]:
+        """Keyword arguments for browser.new_context()"""
+        options: Dict[str, Any] = {}
+        if self.viewport:
+            options["viewport"] = dict(self.viewport)
+        if self.disable_animations:
+            options["reduced_motion"] = "reduce"
+        if self.storage_state:
+            path = storage_state_path(self.storage_state)
+            if os.path.exists(path):
+                options["storage_state"] = path
+        return options
+
+    def should_block(self, url: str, resource_type: str, first_party_host: Optional[str] = None) -> bool:
+        """Decide whether a request is aborted under this profile"""
+        if resource_type in self.block_resource_types:
+            return True
+        if any(pattern in url for pattern in self.block_url_patterns):
+            return True
+
+        host = (urlparse(url).hostname or "").lower()
+        if not host:
+            return False
+        if self.block_analytics and any(host == domain or host.endswith("." + domain) for domain in ANALYTICS_HOSTS):
+            return True
+        if self.block_third_party and first_party_host and not _same_site(host, first_party_host):
+            return True
+        return False
+
+    def _route_handler(self, first_party_host: Optional[str]):
+        def handler(route):
+            request = route.request
+            if self.should_block(request.url, request.resource_type, first_party_host):
+                return route.abort()
+            return route.continue_()
+        return handler
+
+    def apply(self, context, base_url: Optional[str] = None):
+        """Install request blocking and init scripts on a sync_api BrowserContext"""
+        if self.disable_animations:
+            context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)
+        if self.routes_requests:
+            context.route("**/*", self._route_handler(_host(base_url)))
+
+    async def apply_async(self, context, base_url: Optional[str] = None):
+        """Install request blocking and init scripts on an async_api BrowserContext"""
+        if self.disable_animations:
+            await context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)
+        if self.routes_requests:
+            handler = self._route_handler(_host(base_url))
+
+            async def async_handler(route):
+                await handler(route)
+
+            await context.route("**/*", async_handler)
+
+def storage_state_path(name: str) -> str:
+    """Resolve a profile's storage_state; it must be a file inside STORAGE_STATE_DIR"""
+    # Symlinks are resolved too, so a link in the directory cannot point elsewhere
+    base = os.path.realpath(config.STORAGE_STATE_DIR)
+    path = os.path.realpath(os.path.join(base, name))
+    if path == base or os.path.commonpath([base, path]) != base:
+        raise ValueError(f"storage_state must name a file in STORAGE_STATE_DIR: {name}")
+    return path
+
+def _host(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    return (urlparse(url).hostname or "").lower() or None
+
+def _site(host: str) -> str:
+    # Last two labels; good enough to treat www.example.com and cdn.example.com as first party
+    return ".".join(host.split(".")[-2:])
+
+def _same_site(host: str, first_party_host: str) -> bool:
+    return _site(host) == _site(first_party_host)
+
+PRESETS: Dict[str, RunProfile] = {
+    "default": RunProfile(name="default"),
+    "fast": RunProfile(
+        name="fast",
+        block_resource_types=["image", "font", "media"],
+        block_analytics=True,
+        disable_animations=True,
+        viewport={"width": 1280, "height": 720},
+    ),
+    "minimal": RunProfile(
+        name="minimal",
+        block_resource_types=["image", "font", "media", "texttrack", "manifest"],
+        block_analytics=True,
+        block_third_party=True,
+        disable_animations=True,
+        viewport={"width": 800, "height": 600},
+    ),
+}
+
+def load_profile(value: Union[None, str, Dict[str, Any], RunProfile]) -> Optional[RunProfile]:
+    """Build a RunProfile from a preset name, a JSON string or a stored dict.
+
+    A dict may name a ``preset`` whose settings the remaining keys override.
+    """
+    if value is None or isinstance(value, RunProfile):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        if value in PRESETS:
+            return PRESETS[value].copy(deep=True)
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError(f"Unknown run profile: {value}")
+    if not isinstance(value, dict):
+        raise ValueError("A run profile must be a preset name or an object")
+
+    settings = dict(value)
+    preset = settings.pop("preset", None)
+    if preset is not None:
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown run profile preset: {preset}")
+        base = PRESETS[preset].dict()
+        base.update(settings)
+        settings = base
+
+    unknown = set(settings.get("block_resource_types") or []) - set(BLOCKABLE_RESOURCE_TYPES)
+    if unknown:
+        raise ValueError(f"Unsupported resource types: {', '.join(sorted(unknown))}")
+    if settings.get("storage_state"):
+        storage_state_path(settings["storage_state"])
+    return RunProfile(**settings)
+
+def resolve_profile(test_case, override=None) -> Optional[RunProfile]:
+    """Pick the effective profile: explicit override, then the test case's, then its project's (suite)"""
+    if override:
+        return load_profile(override)
+    if test_case is not None and getattr(test_case, "run_profile", None):
+        return load_profile(test_case.run_profile)
+    project = getattr(test_case, "project", None) if test_case is not None else None
+    if project is not None and getattr(project, "run_profile", None):
+        return load_profile(project.run_profile)
+    return None
+
+def generated_profile_lines(profile: RunProfile, base_url: str) -> List[str]:
+    """Module-level code that generated tests use to apply a profile to their context"""
+    context_options = profile.context_options()
+    if profile.storage_state:
+        # The state file may only be created later (e.g. by a login run), so always reference it
+        context_options["storage_state"] = profile.storage_state
+
+    lines = [
+        f"# Run profile: {profile.name}",
+        f"BLOCKED_RESOURCE_TYPES = {sorted(profile.block_resource_types)!r}",
+        f"BLOCKED_URL_PATTERNS = {list(profile.block_url_patterns)!r}",
+        f"BLOCKED_HOSTS = {ANALYTICS_HOSTS if profile.block_analytics else []!r}",
+        f"FIRST_PARTY_SITE = {(_site(_host(base_url) or '') if profile.block_third_party else None)!r}",
+        f"CONTEXT_OPTIONS = {context_options!r}",
+    ]
+    if profile.disable_animations:
+        lines.append(f"DISABLE_ANIMATIONS_SCRIPT = {DISABLE_ANIMATIONS_SCRIPT.strip()!r}")
+    lines.extend([
+        "",
+        "def _route_request(route):",
+        "    request = route.request",
+        "    host = (urlparse(request.url).hostname or '').lower()",
+        "    if request.resource_type in BLOCKED_RESOURCE_TYPES:",
+        "        return route.abort()",
+        "    if any(pattern in request.url for pattern in BLOCKED_URL_PATTERNS):",
+        "        return route.abort()",
+        "    if host and any(host == domain or host.endswith('.' + domain) for domain in BLOCKED_HOSTS):",
+        "        return route.abort()",
+        "    if host and FIRST_PARTY_SITE and '.'.join(host.split('.')[-2:]) != FIRST_PARTY_SITE:",
+        "        return route.abort()",
+        "    return route.continue_()",
+        "",
+        "def apply_run_profile(context):",
+    ])
+    if profile.disable_animations:
+        lines.append("    context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)")
+    if profile.routes_requests:
+        lines.append("    context.route('**/*', _route_request)")
+    else:
+        lines.append("    pass")
+    lines.append("")
+    return lines
@@ -0,0 +1,480 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+from sqlalchemy import insert, or_, text, tuple_
+
+from ..core import config
+from ..db.database import SessionLocal
+from ..models import models
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = ("step_order", "status", "error_message", "screenshot", "execution_time", "data_row")
+
+def _lock(lock_file, wait: bool = False) -> bool:
+    """Lock an open file exclusively; without wait, False while another process holds it"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        if wait:
+            raise
+        return False
+
+class _LiveRun:
+    """In-memory progress of one test run, updated as results arrive"""
+
+    def __init__(self, window: int):
+        self.counts: Counter = Counter()
+        self.recent: deque = deque(maxlen=window)
+        self.pending = 0
+        self.status: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": sum(self.counts.values()),
+            "counts": dict(self.counts),
+            "pending": self.pending,
+            "status": self.status,
+            "results": list(self.recent),
+        }
+
+class ResultBuffer:
+    """Write-behind buffer for TestResult rows and run completions.
+
+    add() appends to a local journal and an in-memory live view and returns at
+    once; a background thread writes everything buffered in one transaction
+    (bulk insert plus run status updates) when flush_size records are waiting
+    or flush_interval seconds have passed. Each flush starts a new journal
+    segment and deletes the previous ones once committed. Segments left behind
+    by a crashed process are replayed by replay_orphans(), skipping results
+    that were already committed; while the database is unreachable the flusher
+    retries the replay.
+
+    When the same records fail max_attempts flushes in a row, the batch is
+    split until the records that fail on their own are found; while the
+    database is reachable those are moved to a dead-letter file so one bad
+    record cannot hold back every later run. With fsync, a separate thread
+    syncs the journal, so add() never waits for the disk.
+    """
+
+    def __init__(
+        self,
+        journal_dir: str = config.RESULT_JOURNAL_DIR,
+        flush_size: int = config.RESULT_FLUSH_SIZE,
+        flush_interval: float = config.RESULT_FLUSH_INTERVAL,
+        live_window: int = config.RESULT_LIVE_WINDOW,
+        fsync: bool = config.RESULT_JOURNAL_FSYNC,
+        max_attempts: int = config.RESULT_FLUSH_MAX_ATTEMPTS,
+        session_factory: Callable = SessionLocal,
+    ):
+        self.journal_dir = journal_dir
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.live_window = live_window
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self.dead_letter_path = os.path.join(journal_dir, "dead-letter.ndjson")
+        self.flushed = 0
+        self.flushes = 0
+        self.replayed = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self._attempts = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: List[Dict[str, Any]] = []
+        self._runs: Dict[int, _LiveRun] = {}
+        self._closed_segments: List[str] = []
+        self._segment = None
+        self._segment_seq = 0
+        self._process_dir: Optional[str] = None
+        self._lock_file = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._replay_lock = threading.Lock()
+        self._orphans_replayed = False
+        # Background fsync: segment descriptors (dups) written to since their last sync
+        self._sync_wakeup = threading.Condition(self._lock)
+        self._unsynced = False
+        self._unsynced_fds: List[int] = []
+        self._sync_thread: Optional[threading.Thread] = None
+
+    # Journal
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        path = os.path.join(self._process_dir, f"segment-{self._segment_seq:08d}.ndjson")
+        self._segment = open(path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        # Called with the lock held; the closed segment is covered by the batch being flushed
+        if self._segment is not None:
+            if self._unsynced:
+                # The sync thread still owes this segment an fsync
+                self._unsynced_fds.append(os.dup(self._segment.fileno()))
+            self._segment.close()
+            self._closed_segments.append(self._segment.name)
+        self._open_segment()
+
+    def _journal(self, record: Dict[str, Any]):
+        # Called on the engine's event loop: only a page cache write, the fsync happens in _sync_loop
+        self._segment.write(json.dumps(record, default=str) + "\n")
+        self._segment.flush()
+        if self.fsync:
+            self._unsynced = True
+            self._sync_wakeup.notify()
+
+    def _sync_loop(self):
+        while True:
+            with self._lock:
+                while not self._unsynced and not self._unsynced_fds and not self._stopping:
+                    self._sync_wakeup.wait()
+                if self._stopping and not self._unsynced and not self._unsynced_fds:
+                    return
+                fds = self._unsynced_fds
+                self._unsynced_fds = []
+                if self._unsynced:
+                    fds.append(os.dup(self._segment.fileno()))
+                    self._unsynced = False
+            for fd in fds:
+                try:
+                    os.fsync(fd)
+                except OSError:
+                    logger.exception("Syncing the result journal failed")
+                finally:
+                    os.close(fd)
+
+    def start(self):
+        """Start journaling and the flusher (idempotent); journals of dead processes are replayed in the background"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            os.makedirs(self.journal_dir, exist_ok=True)
+
+            # Each process journals into its own directory, locked while it lives
+            self._process_dir = os.path.join(self.journal_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            os.makedirs(self._process_dir)
+            self._lock_file = open(os.path.join(self._process_dir, "lock"), "a")
+            # A replaying process may hold it for a moment, until it sees there are no segments yet
+            _lock(self._lock_file, wait=True)
+            self._open_segment()
+
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="result-buffer-flusher", daemon=True)
+            self._thread.start()
+            if self.fsync:
+                self._sync_thread = threading.Thread(target=self._sync_loop, name="result-journal-sync", daemon=True)
+                self._sync_thread.start()
+
+    def replay_orphans(self):
+        """Write out the journals of dead processes; raises RuntimeError while the database is unreachable"""
+        with self._replay_lock:
+            if self._orphans_replayed:
+                return
+            os.makedirs(self.journal_dir, exist_ok=True)
+            for name in sorted(os.listdir(self.journal_dir)):
+                path = os.path.join(self.journal_dir, name)
+                if not os.path.isdir(path) or path == self._process_dir:
+                    continue
+                try:
+                    lock_file = open(os.path.join(path, "lock"), "r+")
+                except FileNotFoundError:
+                    continue  # Being created, or just cleaned up by another process
+                with lock_file:
+                    if not _lock(lock_file):
+                        continue  # Another live process owns it
+                    if not self._replay_dir(path):
+                        continue  # Its owner has not opened a segment yet
+                # Windows cannot remove a file that is still open
+                try:
+                    os.remove(os.path.join(path, "lock"))
+                    os.rmdir(path)
+                except OSError:
+                    pass  # Another process opened the lock file meanwhile and cleans up after itself
+            self._orphans_replayed = True
+
+    def _replay_dir(self, path: str) -> bool:
+        # False when there is nothing to replay: the directory may belong to a process still starting
+        records = []
+        segments = sorted(name for name in os.listdir(path) if name.endswith(".ndjson"))
+        if not segments:
+            return False
+        for name in segments:
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A torn last line from the crash; that result was never acknowledged
+                        logger.warning("Skipping unreadable journal line in %s", name)
+        if records:
+            _, remaining = self._write_isolating(records, replay=True)
+            if remaining:
+                raise RuntimeError(f"Database unavailable while replaying {len(remaining)} journaled records from {path}")
+            self.replayed += len(records)
+            logger.info("Replayed %d buffered records from %s", len(records), path)
+        for name in segments:
+            os.remove(os.path.join(path, name))
+        return True
+
+    # Buffering
+
+    def add(self, test_run_id: int, result: Dict[str, Any]):
+        """Buffer one step result; it is visible in live() immediately"""
+        record = {"kind": "result", "test_run_id": test_run_id, **{column: result.get(column) for column in RESULT_COLUMNS}}
+        self._append(record)
+
+    def finish(self, test_run_id: int, status: str):
+        """Buffer a run's final status; it is persisted together with its last results"""
+        self._append({"kind": "finish", "test_run_id": test_run_id, "status": status, "end_time": datetime.now().isoformat()})
+
+    def _append(self, record: Dict[str, Any]):
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            self._journal(record)
+            self._pending.append(record)
+
+            run = self._runs.get(record["test_run_id"])
+            if run is None:
+                run = self._runs[record["test_run_id"]] = _LiveRun(self.live_window)
+            if record["kind"] == "result":
+                run.counts[record["status"]] += 1
+                run.recent.append({column: record[column] for column in RESULT_COLUMNS})
+            else:
+                run.status = record["status"]
+            run.pending += 1
+
+            if len(self._pending) >= self.flush_size:
+                self._wakeup.notify()
+
+    def live(self, test_run_id: int) -> Optional[Dict[str, Any]]:
+        """Progress of a run still held by the buffer, None once it has been fully persisted"""
+        with self._lock:
+            run = self._runs.get(test_run_id)
+            return run.to_dict() if run else None
+
+    # Flushing
+
+    def _run(self):
+        while True:
+            if not self._orphans_replayed:
+                try:
+                    self.replay_orphans()
+                except Exception as e:
+                    logger.warning("Replaying journals of dead processes failed; will retry: %s", e)
+            with self._lock:
+                if not self._stopping and len(self._pending) < self.flush_size:
+                    self._wakeup.wait(self.flush_interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing buffered results failed; will retry")
+            if stopping:
+                return
+
+    def flush(self):
+        """Write everything buffered so far in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch = self._pending
+                self._pending = []
+                self._rotate()
+                segments = list(self._closed_segments)
+
+            try:
+                self._write(batch)
+                dead, remaining = [], []
+            except Exception:
+                self.failures += 1
+                self._attempts += 1
+                if self._attempts < self.max_attempts:
+                    with self._lock:
+                        # Keep the journal and retry the same records on the next flush
+                        self._pending = batch + self._pending
+                    raise
+                # The same records keep failing: write what can be written, set aside what cannot
+                logger.warning("Flushing %d records failed %d times; isolating the failing records", len(batch), self._attempts)
+                dead, remaining = self._write_isolating(batch)
+            self._attempts = 0
+
+            with self._lock:
+                self._pending = remaining + self._pending
+                settled = len(batch) - len(remaining)
+                if settled:
+                    self.flushes += 1
+                self.flushed += settled - len(dead)
+                unsettled = {id(record) for record in remaining}
+                for record in batch:
+                    if id(record) in unsettled:
+                        continue
+                    run = self._runs.get(record["test_run_id"])
+                    if run is not None:
+                        run.pending -= 1
+                        if run.status is not None and run.pending <= 0:
+                            # Fully persisted; readers fall back to the database
+                            del self._runs[record["test_run_id"]]
+                if remaining:
+                    # The database went away meanwhile; the journal still covers the rest
+                    return
+                self._closed_segments = [path for path in self._closed_segments if path not in segments]
+            for path in segments:
+                os.remove(path)
+
+    def _write_isolating(self, records: List[Dict[str, Any]], replay: bool = False):
+        """Write records in ever smaller groups; returns (dead-lettered, not yet written).
+
+        A record that fails on its own while the database answers is dead-lettered;
+        if the database stops answering, the records not yet written are returned.
+        """
+        dead: List[Dict[str, Any]] = []
+        groups = [records]
+        while groups:
+            group = groups.pop()
+            try:
+                self._write(group, replay=replay)
+                continue
+            except Exception as e:
+                error = e
+            if len(group) > 1:
+                middle = len(group) // 2
+                groups += [group[middle:], group[:middle]]
+                continue
+            if not self._reachable():
+                return dead, [record for pending in [group] + groups[::-1] for record in pending]
+            self._dead_letter(group[0], error)
+            dead.append(group[0])
+        return dead, []
+
+    def _reachable(self) -> bool:
+        db = self.session_factory()
+        try:
+            db.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+        finally:
+            db.close()
+
+    def _dead_letter(self, record: Dict[str, Any], error: Exception):
+        logger.error("Moving unwritable %s record of test run %s to %s: %s", record["kind"], record["test_run_id"], self.dead_letter_path, error)
+        entry = {"record": record, "error": f"{type(error).__name__}: {error}", "failed_at": datetime.now().isoformat()}
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+        self.dead_lettered += 1
+
+    def _write(self, records: List[Dict[str, Any]], replay: bool = False):
+        rows = [
+            {"test_run_id": record["test_run_id"], **{column: record.get(column) for column in RESULT_COLUMNS}}
+            for record in records
+            if record["kind"] == "result"
+        ]
+        finished = {record["test_run_id"]: record for record in records if record["kind"] == "finish"}
+
+        db = self.session_factory()
+        try:
+            if replay and rows:
+                rows = self._uncommitted(db, rows)
+            if rows:
+                db.execute(insert(models.TestResult), rows)
+            for test_run_id, record in finished.items():
+                db.query(models.TestRun).filter(models.TestRun.id == test_run_id).update(
+                    {"status": record["status"], "end_time": datetime.fromisoformat(record["end_time"])},
+                    synchronize_session=False,
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _uncommitted(db, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # A crash between commit and journal cleanup leaves records that were already
+        # written; a run has at most one result per (step, data row). IN never matches
+        # NULL, so results without a step order are looked up with IS NULL.
+        result = models.TestResult
+        keys = {(row["test_run_id"], row["step_order"], row["data_row"]) for row in rows}
+        ordered = {key[:2] for key in keys if key[1] is not None}
+        step_matches = [result.step_order.is_(None)] if any(key[1] is None for key in keys) else []
+        if ordered:
+            step_matches.append(tuple_(result.test_run_id, result.step_order).in_(ordered))
+        existing = set(
+            db.query(result.test_run_id, result.step_order, result.data_row)
+            .filter(result.test_run_id.in_({key[0] for key in keys}))
+            .filter(or_(*step_matches))
+        )
+        return [row for row in rows if (row["test_run_id"], row["step_order"], row["data_row"]) not in existing]
+
+    def stop(self):
+        """Flush what is buffered and stop the flusher thread"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._wakeup.notify()
+        thread.join()
+        if self._sync_thread is not None:
+            with self._lock:
+                self._sync_wakeup.notify()
+            self._sync_thread.join()
+            self._sync_thread = None
+
+        with self._lock:
+            self._thread = None
+            self._segment.close()
+            self._segment = None
+            self._lock_file.close()
+            if self._pending:
+                # The database is unreachable; leave the journal for replay on restart
+                logger.warning("%d buffered records left in the journal", len(self._pending))
+                self._process_dir = None
+                return
+            for name in os.listdir(self._process_dir):
+                os.remove(os.path.join(self._process_dir, name))
+            os.rmdir(self._process_dir)
+            self._process_dir = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "live_runs": len(self._runs),
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "replayed": self.replayed,
+                "failures": self.failures,
+                "dead_lettered": self.dead_lettered,
+                "flush_size": self.flush_size,
+                "flush_interval": self.flush_interval,
+            }
+
+# Process-wide buffer; started by the server's lifespan hook or on first use
+result_buffer = ResultBuffer()
+
+def get_result_buffer() -> ResultBuffer:
+    return result_buffer
@@ -0,0 +1,82 @@
+import time
+from typing import List, Dict, Any, Optional
+
+# Action types produced by the recorder and accepted from the API
+NAVIGATION_ACTIONS = ("navigation", "navigate")
+INPUT_ACTIONS = ("input", "type", "fill")
+
+class StepExecutionError(Exception):
+    """Raised when a test step cannot be executed"""
+
+    def __init__(self, step: Dict[str, Any], message: str):
+        super().__init__(message)
+        self.step = step
+
+def step_to_dict(step) -> Dict[str, Any]:
+    """Convert a TestStep model (or step dict) into the dict shape the runner executes"""
+    if isinstance(step, dict):
+        return step
+    return {
+        "order": step.order,
+        "action_type": step.action_type,
+        "selector": step.selector,
+        "selector_type": step.selector_type,
+        "value": step.value,
+        "screenshot": step.screenshot,
+    }
+
+def execute_step(page, step: Dict[str, Any], timeout: Optional[float] = None):
+    """Execute a single test step on a Playwright page"""
+    action_type = step.get("action_type")
+    selector = step.get("selector")
+    value = step.get("value") or ""
+
+    if action_type in NAVIGATION_ACTIONS:
+        page.goto(value, timeout=timeout)
+    elif action_type == "click":
+        page.click(selector, timeout=timeout)
+    elif action_type in INPUT_ACTIONS:
+        page.fill(selector, value, timeout=timeout)
+    elif action_type == "assert":
+        if selector:
+            text = page.text_content(selector, timeout=timeout) or ""
+            if value not in text:
+                raise StepExecutionError(step, f"Expected '{value}' in text of {selector}, got '{text}'")
+        elif page.url != value:
+            raise StepExecutionError(step, f"Expected URL '{value}', got '{page.url}'")
+    else:
+        raise StepExecutionError(step, f"Unsupported action type: {action_type}")
+
+class TestRunner:
+    """Execute test steps on a page and collect per-step results"""
+
+    def __init__(self, step_timeout: Optional[float] = 10000, stop_on_failure: bool = True):
+        self.step_timeout = step_timeout
+        self.stop_on_failure = stop_on_failure
+
+    def run_steps(self, page, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run steps in order, returning one result dict per executed step"""
+        results = []
+
+        for step in steps:
+            start = time.perf_counter()
+            status = "passed"
+            error_message = None
+
+            try:
+                execute_step(page, step, timeout=self.step_timeout)
+            except Exception as e:
+                status = "failed"
+                error_message = f"{type(e).__name__}: {e}"
+
+            results.append({
+                "step_order": step.get("order"),
+                "status": status,
+                "error_message": error_message,
+                "execution_time": int((time.perf_counter() - start) * 1000),
+            })
+
+            if status != "passed" and self.stop_on_failure:
+                break
+
+        return results
@@ -0,0 +1 @@
+# Test case search package initialization
@@ -0,0 +1,215 @@
+import bisect
+import math
+from collections import Counter
+from itertools import groupby
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+
+from .text import FIELD_WEIGHTS, index_terms
+
+# Phrase (adjacent word pair) matches count this much more than single words
+PAIR_BOOST = 2.0
+# A prefix expands to at most this many indexed words per field
+MAX_PREFIX_EXPANSIONS = 64
+# Term frequency levels: a posting keeps the cases holding its term at least 1, 2, 4 and 8 times
+FREQUENCY_LEVELS = 4
+
+class InvertedIndex:
+    """In-process inverted index over test cases and their steps.
+
+    Postings are keyed "field:term" and hold, per frequency level, the set of
+    test cases containing the term at least 1, 2, 4 or 8 times. Words are
+    matched across the whole case (all must occur, in any of the searched
+    fields); the last word also matches as a prefix. A case scores
+    weight x idf x (1 + log of its frequency level) per posting, plus a bonus
+    for adjacent word pairs.
+
+    Matching and scoring use set operations only: the candidates are split
+    into groups of equal score by each posting in turn, so even a query that
+    matches most of the index never visits cases one by one in Python.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, List[Set[int]]] = {}
+        self.case_keys: Dict[int, List[str]] = {}
+        self.projects: Dict[int, Optional[int]] = {}
+        self.project_cases: Dict[Optional[int], Set[int]] = {}
+        self.actions: Dict[str, Set[int]] = {}
+        self.case_actions: Dict[int, Tuple[str, ...]] = {}
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.case_keys)
+
+    def __contains__(self, case_id: int) -> bool:
+        return case_id in self.case_keys
+
+    def add(self, case_id: int, project_id: Optional[int], fields: Dict[str, Iterable[str]], actions: Iterable[str] = ()):
+        """Index (or re-index) a test case from its field values; step fields hold one value per step"""
+        self.remove(case_id)
+
+        counts: Counter = Counter()
+        for field, values in fields.items():
+            for value in values:
+                for term, count in index_terms(value).items():
+                    counts[f"{field}:{term}"] += count
+        for key, count in counts.items():
+            levels = self.postings.get(key)
+            if levels is None:
+                levels = self.postings[key] = []
+                if self._vocabulary is not None and " " not in key:
+                    bisect.insort(self._vocabulary, key)
+            for level in range(min(count.bit_length(), FREQUENCY_LEVELS)):
+                if level == len(levels):
+                    levels.append(set())
+                levels[level].add(case_id)
+        self.case_keys[case_id] = list(counts)
+
+        self.projects[case_id] = project_id
+        self.project_cases.setdefault(project_id, set()).add(case_id)
+        case_actions = tuple(set(filter(None, actions)))
+        for action in case_actions:
+            self.actions.setdefault(action, set()).add(case_id)
+        self.case_actions[case_id] = case_actions
+
+    def remove(self, case_id: int):
+        if case_id not in self.case_keys:
+            return
+        for key in self.case_keys.pop(case_id):
+            levels = self.postings[key]
+            for members in levels:
+                members.discard(case_id)
+            while levels and not levels[-1]:
+                levels.pop()
+            if not levels:
+                del self.postings[key]
+                if self._vocabulary is not None and " " not in key:
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, key)]
+
+        project_id = self.projects.pop(case_id)
+        cases = self.project_cases[project_id]
+        cases.discard(case_id)
+        if not cases:
+            del self.project_cases[project_id]
+        for action in self.case_actions.pop(case_id):
+            cases = self.actions[action]
+            cases.discard(case_id)
+            if not cases:
+                del self.actions[action]
+
+    def _keys(self, field: str, word: str, prefix: bool) -> List[str]:
+        key = f"{field}:{word}"
+        if not prefix:
+            return [key] if key in self.postings else []
+
+        # Sorted single-word keys (pairs contain a space), kept up to date once built
+        if self._vocabulary is None:
+            self._vocabulary = sorted(key for key in self.postings if " " not in key)
+        keys = []
+        position = bisect.bisect_left(self._vocabulary, key)
+        while position < len(self._vocabulary) and len(keys) < MAX_PREFIX_EXPANSIONS:
+            candidate = self._vocabulary[position]
+            if not candidate.startswith(key):
+                break
+            keys.append(candidate)
+            position += 1
+        return keys
+
+    def _weighted(self, fields: List[str], term: str, prefix: bool = False, boost: float = 1.0) -> List[Tuple[float, List[Set[int]]]]:
+        # (field weight x idf, frequency levels) for every indexed key the term expands to
+        weighted = []
+        for field in fields:
+            for key in self._keys(field, term, prefix):
+                levels = self.postings[key]
+                weighted.append((boost * FIELD_WEIGHTS[field] * math.log(1 + len(self.case_keys) / len(levels[0])), levels))
+        return weighted
+
+    @staticmethod
+    def _split(groups: List[Tuple[Set[int], float]], members: Set[int], gain: float) -> List[Tuple[Set[int], float]]:
+        split = []
+        for cases, score in groups:
+            inside = cases & members
+            if not inside:
+                split.append((cases, score))
+                continue
+            split.append((inside, score + gain))
+            if len(inside) < len(cases):
+                split.append((cases - inside, score))
+        return split
+
+    def search(
+        self,
+        query_words: List[str],
+        pairs: List[str],
+        fields: Iterable[str],
+        project_id: Optional[int] = None,
+        action_type: Optional[str] = None,
+        exact: bool = False,
+        prefix: bool = True,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[Tuple[int, float]]]:
+        """Total number of matching cases and the requested page of (case id, score), best first"""
+        if not query_words:
+            return 0, []
+        fields = list(fields)
+
+        words = [
+            self._weighted(fields, word, prefix and position == len(query_words) - 1)
+            for position, word in enumerate(query_words)
+        ]
+        pair_postings = [self._weighted(fields, pair, boost=PAIR_BOOST) for pair in pairs]
+
+        # Candidates: cases holding every word (and with exact, every pair), rarest first
+        required = words + pair_postings if exact else words
+        if not all(required):
+            return 0, []
+        matched = sorted((set().union(*[levels[0] for _, levels in postings]) for postings in required), key=len)
+        if action_type is not None:
+            matched.append(self.actions.get(action_type, set()))
+        if project_id is not None:
+            matched.append(self.project_cases.get(project_id, set()))
+        candidates = matched[0].intersection(*matched[1:])
+        if not candidates:
+            return 0, []
+
+        # Group the candidates by score, one posting and frequency level at a time, largest
+        # gains first. Groups that can no longer reach the requested page are dropped.
+        gains = sorted(
+            (
+                (weight if level == 0 else weight * math.log(2), members)
+                for postings in words + pair_postings
+                for weight, levels in postings
+                for level, members in enumerate(levels)
+            ),
+            key=lambda gain: gain[0],
+            reverse=True,
+        )
+        wanted = skip + limit
+        remaining = sum(gain for gain, _ in gains)
+        groups = [(candidates, 0.0)]
+        for gain, members in gains:
+            groups = self._split(groups, members, gain)
+            remaining -= gain
+            groups.sort(key=lambda group: group[1], reverse=True)
+            covered = 0
+            for cases, score in groups:
+                covered += len(cases)
+                if covered >= wanted:
+                    groups = [group for group in groups if group[1] + remaining >= score - 1e-9]
+                    break
+
+        # Best groups first; within a score the oldest cases come first, so pages are stable
+        page: List[Tuple[int, float]] = []
+        for score, tied in groupby(groups, key=lambda group: group[1]):
+            cases = sorted(set().union(*[members for members, _ in tied]))
+            page.extend((case_id, score) for case_id in cases[:wanted - len(page)])
+            if len(page) >= wanted:
+                break
+        return len(candidates), page[skip:]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cases": len(self.case_keys),
+            "terms": len(self.postings),
+            "postings": sum(len(keys) for keys in self.case_keys.values()),
+        }
@@ -0,0 +1,153 @@
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, case, exists, func, literal_column, or_, text
+from sqlalchemy.orm import Session
+
+from ..models import models
+
+logger = logging.getLogger(__name__)
+
+# Weighted document of a test case. The query repeats this expression verbatim
+# (qualified by table) so the planner uses the GIN index built on it. Fields are
+# split on non-alphanumerics first, as app.search.text does: the parser would
+# otherwise keep URLs and hosts whole ("example.com/login"), so "login" would
+# not match a base URL.
+FIELD_TEXT = "regexp_replace(coalesce({table}{field}, ''), '[^[:alnum:]]+', ' ', 'g')"
+CASE_DOCUMENT = (
+    "(setweight(to_tsvector('simple', " + FIELD_TEXT.replace("{field}", "name") + "), 'A') || "
+    "setweight(to_tsvector('simple', " + FIELD_TEXT.replace("{field}", "description") + "), 'B') || "
+    "setweight(to_tsvector('simple', " + FIELD_TEXT.replace("{field}", "base_url") + "), 'C'))"
+)
+FIELD_LABELS = {"name": "A", "description": "B", "base_url": "C"}
+
+SEARCH_INDEX_DDL = [
+    # Built on the document before fields were split into words
+    "DROP INDEX IF EXISTS ix_test_cases_search",
+    f"CREATE INDEX IF NOT EXISTS ix_test_cases_search_words ON test_cases USING gin ({CASE_DOCUMENT.format(table='')})",
+    # Trigram indexes serve the substring (ILIKE '%...%') matches on step selectors and values
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_test_steps_selector_trgm ON test_steps USING gin (selector gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_test_steps_value_trgm ON test_steps USING gin (value gin_trgm_ops)",
+]
+
+def create_search_indexes(bind) -> List[str]:
+    """Create the full-text and trigram indexes; returns the statements that failed"""
+    failed = []
+    for statement in SEARCH_INDEX_DDL:
+        try:
+            with bind.begin() as connection:
+                connection.execute(text(statement))
+        except Exception as e:
+            # pg_trgm needs a privileged role; search still works, only step matches scan
+            logger.warning("Search index statement failed (%s): %s", e.__class__.__name__, statement)
+            failed.append(statement)
+    return failed
+
+def _tsquery(query_words: List[str], labels: str, prefix: bool, operator: str = " & ") -> str:
+    # Words are alphanumeric runs, so they need no quoting
+    terms = []
+    for position, word in enumerate(query_words):
+        suffix = "*" if prefix and position == len(query_words) - 1 else ""
+        terms.append(f"{word}:{suffix}{labels}" if suffix or labels else word)
+    return operator.join(terms)
+
+def _like(word: str) -> str:
+    # Backslash is Postgres' default LIKE escape character
+    escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _adjacent(pair: str) -> str:
+    # Case-insensitive regex for two words separated only by non-alphanumerics ("checkout-button")
+    first, second = pair.split(" ")
+    return f"{first}[^[:alnum:]]+{second}"
+
+def search_postgres(
+    db: Session,
+    query: str,
+    query_words: List[str],
+    pairs: List[str],
+    fields: List[str],
+    project_id: Optional[int] = None,
+    action_type: Optional[str] = None,
+    exact: bool = False,
+    prefix: bool = True,
+    skip: int = 0,
+    limit: int = 50,
+) -> Tuple[int, List[Tuple[int, float]]]:
+    """Total number of matching cases and the requested page of (case id, score), best first.
+
+    As with the in-process index, every word (and with exact, every adjacent
+    pair) must occur somewhere in the case: in its name/description/base URL
+    or in the selector or value of any of its steps.
+    """
+    cases = models.TestCase
+    steps = models.TestStep
+    score = literal_column("0.0")
+
+    labels = "".join(FIELD_LABELS[field] for field in FIELD_LABELS if field in fields)
+    weights = "" if len(labels) == len(FIELD_LABELS) else labels
+    step_columns = [getattr(steps, field) for field in ("selector", "value") if field in fields]
+
+    # (tsquery on the case document, step column matches) per required term
+    terms = [
+        (
+            _tsquery([word], weights, prefix and position == len(query_words) - 1),
+            [column.ilike(_like(word)) for column in step_columns],
+        )
+        for position, word in enumerate(query_words)
+    ]
+    if exact:
+        terms += [
+            (_tsquery(pair.split(" "), weights, False, " <-> "), [column.op("~*")(_adjacent(pair)) for column in step_columns])
+            for pair in pairs
+        ]
+    conditions: List[list] = [[] for _ in terms]
+
+    if labels:
+        document = literal_column(CASE_DOCUMENT.format(table="test_cases."))
+        for condition, (tsquery, _) in zip(conditions, terms):
+            condition.append(document.op("@@")(func.to_tsquery(literal_column("'simple'"), tsquery)))
+        ranked = func.to_tsquery(literal_column("'simple'"), _tsquery(query_words, weights, prefix, " | "))
+        score = score + func.ts_rank(document, ranked)
+
+    if step_columns:
+        # One pass over the steps matching any term records which terms each case's steps hold
+        step_matches = [or_(*column_matches) for _, column_matches in terms]
+        similarity = func.greatest(*[func.word_similarity(query, func.coalesce(column, "")) for column in step_columns])
+        step_hits = (
+            db.query(
+                steps.test_case_id.label("test_case_id"),
+                func.count().label("hits"),
+                func.max(similarity).label("similarity"),
+                *[func.max(case((step_match, 1), else_=0)).label(f"term_{number}") for number, step_match in enumerate(step_matches)],
+            )
+            .filter(or_(*step_matches))
+            .group_by(steps.test_case_id)
+            .subquery()
+        )
+        for number, condition in enumerate(conditions):
+            condition.append(step_hits.c[f"term_{number}"] == 1)
+        score = score + func.coalesce(step_hits.c.similarity, 0) + 0.1 * func.ln(1 + func.coalesce(step_hits.c.hits, 0))
+
+    matched = db.query(cases.id.label("id"), score.label("score"))
+    if step_columns:
+        matched = matched.outerjoin(step_hits, step_hits.c.test_case_id == cases.id)
+    matched = matched.filter(and_(*[or_(*condition) for condition in conditions]))
+    if project_id is not None:
+        matched = matched.filter(cases.project_id == project_id)
+    if action_type is not None:
+        matched = matched.filter(exists().where(and_(steps.test_case_id == cases.id, steps.action_type == action_type)))
+
+    rows = (
+        matched.add_columns(func.count().over().label("total"))
+        .order_by(literal_column("score").desc(), cases.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    if rows:
+        total = rows[0].total
+    else:
+        total = matched.count() if skip else 0
+    return total, [(row.id, float(row.score)) for row in rows]
@@ -0,0 +1,321 @@
+import logging
+import threading
+import time
+from itertools import chain
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..core import config
+from ..db.database import SessionLocal, engine as default_engine
+from ..models import models
+from .memory import InvertedIndex
+from .postgres import search_postgres
+from .text import CASE_FIELDS, FIELD_WEIGHTS, STEP_FIELDS, matches, query_terms
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = tuple(FIELD_WEIGHTS)
+# Matched fields and steps listed per result
+MAX_MATCHES = 5
+# Test cases loaded per query while building the in-process index
+LOAD_BATCH_SIZE = 1000
+
+class TestCaseSearch:
+    """Search over test case names, descriptions, base URLs and step selectors/values.
+
+    On Postgres queries run against full-text and trigram indexes (created by
+    app.db.migrate), which the database keeps current. Elsewhere an in-process
+    InvertedIndex is built from the database once and then kept up to date from
+    ORM session events: commits of test cases and steps queue their cases, and a
+    background thread re-indexes them shortly after, so commits never wait for
+    it. It only sees commits made by its own process, so run a single server
+    process on SQLite.
+    """
+
+    def __init__(self, backend: str = config.SEARCH_BACKEND, bind=None, session_factory=SessionLocal):
+        bind = bind or default_engine
+        if backend == "auto":
+            backend = "postgres" if bind.dialect.name == "postgresql" else "memory"
+        if backend not in ("postgres", "memory"):
+            raise ValueError(f"Unknown search backend: {backend}")
+        self.backend = backend
+        self.session_factory = session_factory
+        self.index = InvertedIndex()
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._building = False
+        self._dirty: Set[int] = set()
+        self._listening = False
+        # Cases committed since, re-indexed by the background thread
+        self._queued: Set[int] = set()
+        self._reindexing = False
+        self._closing = False
+        self._reindex_wakeup = threading.Condition(self._lock)
+        self._reindexer: Optional[threading.Thread] = None
+
+    # Index maintenance
+
+    def _listen(self):
+        if not self._listening:
+            event.listen(Session, "after_flush", self._after_flush)
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_rollback", self._after_rollback)
+            self._listening = True
+
+    def close(self):
+        if self._listening:
+            event.remove(Session, "after_flush", self._after_flush)
+            event.remove(Session, "after_commit", self._after_commit)
+            event.remove(Session, "after_rollback", self._after_rollback)
+            self._listening = False
+        with self._lock:
+            self._closing = True
+            self._reindex_wakeup.notify_all()
+        if self._reindexer is not None:
+            self._reindexer.join()
+            self._reindexer = None
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        changed = session.info.setdefault("search_changed", set())
+        for obj in chain(session.new, session.dirty, session.deleted):
+            if isinstance(obj, models.TestCase):
+                changed.add(obj.id)
+            elif isinstance(obj, models.TestStep):
+                # A step moved to another case changes both
+                history = inspect(obj).attrs.test_case_id.history
+                changed.update(filter(None, chain([obj.test_case_id], history.deleted or ())))
+
+    def _after_commit(self, session):
+        changed = session.info.pop("search_changed", None)
+        if changed:
+            self.changed(changed)
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop("search_changed", None)
+
+    def changed(self, case_ids: Iterable[int]):
+        """Queue test cases whose rows were inserted, updated or deleted for re-indexing"""
+        case_ids = set(case_ids)
+        with self._lock:
+            if self._building:
+                # Picked up once the running build finishes
+                self._dirty |= case_ids
+                return
+            if self.built_at is None or self._closing:
+                return
+            self._queued |= case_ids
+            if self._reindexer is None:
+                self._reindexer = threading.Thread(target=self._reindex_loop, name="search-reindex", daemon=True)
+                self._reindexer.start()
+            self._reindex_wakeup.notify_all()
+
+    def _reindex_loop(self):
+        # Runs outside the committing sessions: _after_commit only queues case ids
+        while True:
+            with self._lock:
+                while not self._queued and not self._closing:
+                    self._reindex_wakeup.wait()
+                if not self._queued:
+                    return
+                case_ids = self._queued
+                self._queued = set()
+                self._reindexing = True
+            try:
+                self._reindex(self.index, case_ids)
+            except Exception:
+                logger.exception("Re-indexing %d test cases for search failed", len(case_ids))
+            finally:
+                with self._lock:
+                    self._reindexing = False
+                    self._reindex_wakeup.notify_all()
+
+    def wait_reindexed(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every committed change is in the index; False on timeout"""
+        with self._lock:
+            return self._reindex_wakeup.wait_for(lambda: not self._queued and not self._reindexing, timeout)
+
+    def _load(self, db: Session, case_ids: Optional[Set[int]] = None) -> Iterator[Tuple[Any, List[Any]]]:
+        """Yield (test case row, its step rows) in id order"""
+        cases = models.TestCase
+        steps = models.TestStep
+        case_query = db.query(cases.id, cases.project_id, cases.name, cases.description, cases.base_url)
+        step_query = (
+            db.query(steps.test_case_id, steps.order, steps.action_type, steps.selector, steps.value)
+            .filter(steps.test_case_id.isnot(None))
+        )
+        if case_ids is not None:
+            case_query = case_query.filter(cases.id.in_(case_ids))
+            step_query = step_query.filter(steps.test_case_id.in_(case_ids))
+
+        # Both sides are read in id order and merged, so a full build streams
+        step_rows = iter(step_query.order_by(steps.test_case_id, steps.order).yield_per(LOAD_BATCH_SIZE * 10))
+        step = next(step_rows, None)
+        for case in case_query.order_by(cases.id).yield_per(LOAD_BATCH_SIZE):
+            while step is not None and step.test_case_id < case.id:
+                step = next(step_rows, None)
+            case_steps = []
+            while step is not None and step.test_case_id == case.id:
+                case_steps.append(step)
+                step = next(step_rows, None)
+            yield case, case_steps
+
+    @staticmethod
+    def _add(index: InvertedIndex, case, steps: List[Any]):
+        fields = {field: [getattr(case, field)] for field in CASE_FIELDS}
+        fields.update({field: [getattr(step, field) for step in steps] for field in STEP_FIELDS})
+        index.add(case.id, case.project_id, fields, actions=[step.action_type for step in steps])
+
+    def _reindex(self, index: InvertedIndex, case_ids: Set[int]):
+        db = self.session_factory()
+        try:
+            loaded = list(self._load(db, case_ids))
+        finally:
+            db.close()
+        with self._lock:
+            for case, steps in loaded:
+                self._add(index, case, steps)
+            for case_id in case_ids - {case.id for case, _ in loaded}:
+                index.remove(case_id)
+
+    def build(self):
+        """Build the in-process index from the database (no-op on Postgres or once built)"""
+        if self.backend != "memory":
+            return
+        with self._build_lock:
+            if self.built_at is not None:
+                return
+            started = time.perf_counter()
+            self._listen()
+            with self._lock:
+                self._building = True
+                self._dirty.clear()
+
+            index = InvertedIndex()
+            try:
+                db = self.session_factory()
+                try:
+                    for case, steps in self._load(db):
+                        self._add(index, case, steps)
+                finally:
+                    db.close()
+
+                # Commits made while the build read the tables
+                while True:
+                    with self._lock:
+                        dirty = self._dirty
+                        self._dirty = set()
+                        if not dirty:
+                            self.index = index
+                            self.built_at = time.time()
+                            self._building = False
+                            break
+                    self._reindex(index, dirty)
+            except Exception:
+                with self._lock:
+                    self._building = False
+                raise
+
+            self.build_seconds = round(time.perf_counter() - started, 3)
+            logger.info("Indexed %d test cases for search in %.1fs", len(index), self.build_seconds)
+
+    # Querying
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        fields: Optional[List[str]] = None,
+        project_id: Optional[int] = None,
+        action_type: Optional[str] = None,
+        exact: bool = False,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """Ranked test cases matching every word of the query, with the fields and steps that matched"""
+        fields = list(fields or SEARCH_FIELDS)
+        unknown = set(fields) - set(SEARCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown search fields: {', '.join(sorted(unknown))}")
+        query_words, pairs = query_terms(query)
+        # The last word is completed as a prefix unless the query ends a word ("checkout ")
+        prefix = not exact and bool(query) and query[-1].isalnum()
+
+        started = time.perf_counter()
+        if not query_words:
+            total, hits = 0, []
+        elif self.backend == "postgres":
+            total, hits = search_postgres(db, query, query_words, pairs, fields, project_id, action_type, exact, prefix, skip, limit)
+        else:
+            self.build()
+            with self._lock:
+                total, hits = self.index.search(query_words, pairs, fields, project_id, action_type, exact, prefix, skip, limit)
+
+        return {
+            "query": query,
+            "backend": self.backend,
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+            "results": self._describe(db, hits, query_words, fields),
+        }
+
+    def _describe(self, db: Session, hits: List[Tuple[int, float]], query_words: List[str], fields: List[str]) -> List[Dict[str, Any]]:
+        if not hits:
+            return []
+        case_ids = {case_id for case_id, _ in hits}
+        loaded = {case.id: (case, steps) for case, steps in self._load(db, case_ids)}
+
+        results = []
+        for case_id, score in hits:
+            if case_id not in loaded:
+                continue  # Deleted since it was matched
+            case, steps = loaded[case_id]
+            found = [
+                {"field": field, "text": getattr(case, field)}
+                for field in CASE_FIELDS
+                if field in fields and matches(getattr(case, field), query_words)
+            ]
+            for step in steps:
+                for field in STEP_FIELDS:
+                    if field in fields and matches(getattr(step, field), query_words):
+                        found.append({"field": field, "text": getattr(step, field), "step_order": step.order, "action_type": step.action_type})
+            results.append({
+                "id": case.id,
+                "name": case.name,
+                "description": case.description,
+                "base_url": case.base_url,
+                "project_id": case.project_id,
+                "score": round(score, 4),
+                "matched_steps": len({match["step_order"] for match in found if "step_order" in match}),
+                "matches": found[:MAX_MATCHES],
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"backend": self.backend}
+        if self.backend == "memory":
+            with self._lock:
+                stats.update(self.index.stats())
+            stats.update({
+                "built": self.built_at is not None,
+                "building": self._building,
+                "build_seconds": self.build_seconds,
+                "reindex_queued": len(self._queued),
+            })
+        return stats
+
+# Process-wide search; the in-process index is built on first use or by the startup warmer
+test_case_search: Optional[TestCaseSearch] = None
+
+def get_test_case_search() -> TestCaseSearch:
+    global test_case_search
+    if test_case_search is None:
+        test_case_search = TestCaseSearch()
+    return test_case_search
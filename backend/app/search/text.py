@@ -0,0 +1,49 @@
+import re
+from collections import Counter
+from typing import List, Tuple
+
+# Searchable fields and their weight in the ranking
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "selector": 2.0,
+    "value": 1.0,
+    "description": 1.0,
+    "base_url": 1.0,
+}
+CASE_FIELDS = ("name", "description", "base_url")
+STEP_FIELDS = ("selector", "value")
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+# "checkoutButton" -> "checkout", "button"; "HTMLInput" -> "html", "input"
+CAMEL_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+def words(text: str) -> List[str]:
+    """Lower-cased alphanumeric runs, in order: "#checkout-button" -> ["checkout", "button"]"""
+    return [word.lower() for word in WORD_PATTERN.findall(text or "")]
+
+def index_terms(text: str) -> Counter:
+    """Terms a field value is indexed under: its words, their camelCase parts and
+    adjacent word pairs ("checkout button"), which rank phrase matches first"""
+    raw = WORD_PATTERN.findall(text or "")
+    terms = Counter(word.lower() for word in raw)
+    for word in raw:
+        parts = CAMEL_PATTERN.findall(word)
+        if len(parts) > 1:
+            terms.update(part.lower() for part in parts)
+    lowered = [word.lower() for word in raw]
+    terms.update(f"{first} {second}" for first, second in zip(lowered, lowered[1:]))
+    return terms
+
+def query_terms(query: str) -> Tuple[List[str], List[str]]:
+    """Distinct words of a query and its adjacent word pairs"""
+    query_words = list(dict.fromkeys(words(query)))
+    ordered = words(query)
+    pairs = list(dict.fromkeys(f"{first} {second}" for first, second in zip(ordered, ordered[1:])))
+    return query_words, pairs
+
+def matches(text: str, query_words: List[str]) -> bool:
+    """Whether a field value contains any query word; used to show where a case matched"""
+    if not text:
+        return False
+    lowered = text.lower()
+    return any(word in lowered for word in query_words)
@@ -2,6 +2,9 @@ import json
 import os
 from typing import List, Dict, Any, Optional
 
+from ..data_driven.bindings import bind_steps
+from ..runner.profiles import RunProfile, generated_profile_lines
+
 class TestGenerator:
     def __init__(self, recording_path: str):
         self.recording_path = recording_path
@@ -16,7 +19,7 @@ class TestGenerator:
         with open(self.actions_file, "r") as f:
             return json.load(f)
     
-    def generate_playwright_test(self, output_file: Optional[str] = None, test_name: str = "Recorded Test") -> str:
+    def generate_playwright_test(self, output_file: Optional[str] = None, test_name: str = "Recorded Test", profile: Optional[RunProfile] = None) -> str:
         """Generate a Playwright test script"""
         if not output_file:
             output_file = os.path.join(self.recording_path, "playwright_test.py")
@@ -26,16 +29,33 @@ class TestGenerator:
         script_lines = [
             "from playwright.sync_api import Playwright, sync_playwright, expect",
             "import pytest",
-            "",
+            ""
+        ]
+        
+        if profile:
+            script_lines[1:1] = ["from urllib.parse import urlparse"]
+            script_lines.extend(generated_profile_lines(profile, base_url))
+        
+        script_lines.extend([
             f"def test_{test_name.lower().replace(' ', '_')}(playwright: Playwright):",
             "    browser = playwright.chromium.launch(headless=True)",
-            "    context = browser.new_context()",
+        ])
+        
+        if profile:
+            script_lines.extend([
+                "    context = browser.new_context(**CONTEXT_OPTIONS)",
+                "    apply_run_profile(context)",
+            ])
+        else:
+            script_lines.append("    context = browser.new_context()")
+        
+        script_lines.extend([
             "    page = context.new_page()",
             "",
             f"    # Navigate to the base URL",
             f"    page.goto('{base_url}')",
             ""
-        ]
+        ])
         
         for i, action in enumerate(self.actions):
             action_type = action.get("type")
@@ -71,7 +91,7 @@ class TestGenerator:
         
         return output_file
     
-    def generate_pytest_test(self, output_file: Optional[str] = None, test_name: str = "Recorded Test") -> str:
+    def generate_pytest_test(self, output_file: Optional[str] = None, test_name: str = "Recorded Test", profile: Optional[RunProfile] = None) -> str:
         """Generate a pytest test script"""
         if not output_file:
             output_file = os.path.join(self.recording_path, "pytest_test.py")
@@ -81,7 +101,14 @@ class TestGenerator:
         script_lines = [
             "import pytest",
             "from playwright.sync_api import Playwright, sync_playwright, expect",
-            "",
+            ""
+        ]
+        
+        if profile:
+            script_lines[2:2] = ["from urllib.parse import urlparse"]
+            script_lines.extend(generated_profile_lines(profile, base_url))
+        
+        script_lines.extend([
             "@pytest.fixture(scope='function')",
             "def browser_context_args(browser_context_args):",
             "    return {",
@@ -89,14 +116,33 @@ class TestGenerator:
             "        'viewport': {",
             "            'width': 1920,",
             "            'height': 1080,",
-            "        }",
-            "    }",
-            "",
+            "        }"
+        ])
+        
+        if profile:
+            # The profile's context options (viewport, storage_state, ...) win over the defaults
+            script_lines[-1] = "        },"
+            script_lines.extend([
+                "        **CONTEXT_OPTIONS,",
+                "    }",
+                "",
+                "@pytest.fixture(autouse=True)",
+                "def run_profile(context):",
+                "    apply_run_profile(context)",
+                ""
+            ])
+        else:
+            script_lines.extend([
+                "    }",
+                ""
+            ])
+        
+        script_lines.extend([
             f"def test_{test_name.lower().replace(' ', '_')}(page):",
             f"    # Navigate to the base URL",
             f"    page.goto('{base_url}')",
             ""
-        ]
+        ])
         
         for i, action in enumerate(self.actions):
             action_type = action.get("type")
@@ -125,21 +171,30 @@ class TestGenerator:
         
         return output_file
     
-    def generate_test_steps(self) -> List[Dict[str, Any]]:
-        """Generate test steps for database storage"""
+    def generate_test_steps(self, bindings: Optional[Dict[int, str]] = None) -> List[Dict[str, Any]]:
+        """Generate test steps for database storage.
+
+        bindings optionally maps step order -> dataset column; bound steps get a
+        ${column} placeholder instead of the recorded value.
+        """
         test_steps = []
         
         for i, action in enumerate(self.actions):
             action_type = action.get("type")
+            # Navigation steps carry their target URL as the value so they can be replayed
+            default_value = action.get("url", "") if action_type == "navigation" else ""
             step = {
                 "order": i,
                 "action_type": action_type,
                 "selector": action.get("selector"),
                 "selector_type": "css",  # Default to CSS selector
-                "value": action.get("value", ""),
+                "value": action.get("value", default_value),
                 "screenshot": action.get("screenshot", "")
             }
             
             test_steps.append(step)
         
+        if bindings:
+            test_steps = bind_steps(test_steps, bindings)
+        
         return test_steps
@@ -0,0 +1 @@
+# Failure triage package initialization
@@ -0,0 +1,203 @@
+import hashlib
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .fingerprint import locator, normalize_error, shingles
+from .minhash import LSHIndex, MinHasher
+from .screenshots import dhash, hamming, hash_bands
+
+FAILED_STATUSES = ("failed", "error")
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent: Dict[Any, Any] = {}
+
+    def find(self, key):
+        parent = self.parent.setdefault(key, key)
+        if parent != key:
+            parent = self.parent[key] = self.find(parent)
+        return parent
+
+    def union(self, left, right):
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            self.parent[right] = left
+
+class FailureTriage:
+    """Groups failed step results that most likely share a cause.
+
+    Failures with the same normalized message always share a cluster. Distinct
+    messages join when their MinHash similarity reaches text_threshold and
+    they waited for the same locator, if any (timeouts differ in little else);
+    LSH keeps that from being a pairwise comparison. Screenshots add a second
+    signal: failures whose pages look alike (dHash within screenshot_distance
+    bits) join at the lower visual_text_threshold, so e.g. different timeouts
+    on the same error page end up together.
+    """
+
+    def __init__(
+        self,
+        text_threshold: float = 0.6,
+        visual_text_threshold: float = 0.3,
+        screenshot_distance: int = 6,
+        num_perm: int = 64,
+        bands: int = 16,
+        use_screenshots: bool = True,
+    ):
+        self.text_threshold = text_threshold
+        self.visual_text_threshold = visual_text_threshold
+        self.screenshot_distance = screenshot_distance
+        self.use_screenshots = use_screenshots
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+    def cluster(self, failures: Iterable[Dict[str, Any]], max_examples: int = 20) -> List[Dict[str, Any]]:
+        """Cluster failure dicts (result_id, test_run_id, step_order, error_message, screenshot), largest first"""
+        failures = list(failures)
+        fingerprints = [normalize_error(failure.get("error_message") or "") for failure in failures]
+
+        # Identical fingerprints are one unit; only unique ones are hashed and compared
+        signatures = {fingerprint: self.hasher.signature(shingles(fingerprint)) for fingerprint in set(fingerprints)}
+        groups = _DisjointSet()
+        for fingerprint in signatures:
+            groups.find(("text", fingerprint))
+
+        index = LSHIndex(self.bands, self.rows)
+        for fingerprint, signature in signatures.items():
+            index.add(fingerprint, signature)
+        for bucket in index.buckets():
+            self._join_bucket(groups, bucket, self._text_match(signatures), lambda key: ("text", key))
+
+        if self.use_screenshots:
+            self._join_screenshots(groups, failures, fingerprints, signatures)
+
+        members: Dict[Any, List[int]] = defaultdict(list)
+        for position, fingerprint in enumerate(fingerprints):
+            members[groups.find(("text", fingerprint))].append(position)
+
+        clusters = [self._describe([failures[position] for position in positions], [fingerprints[position] for position in positions], max_examples) for positions in members.values()]
+        clusters.sort(key=lambda cluster: (-cluster["size"], cluster["cluster_id"]))
+        return clusters
+
+    def _text_match(self, signatures):
+        def matches(left: str, right: str) -> bool:
+            return locator(left) == locator(right) and self._similarity(signatures, left, right) >= self.text_threshold
+        return matches
+
+    @staticmethod
+    def _similarity(signatures, left: str, right: str) -> float:
+        if left == right:
+            return 1.0
+        return MinHasher.similarity(signatures[left], signatures[right])
+
+    @staticmethod
+    def _join_bucket(groups: _DisjointSet, bucket: List, matches, node):
+        # Compare each key to one anchor per component already in the bucket rather
+        # than to every other key, so a hot bucket stays linear in practice
+        anchors: List = []
+        for key in bucket:
+            matched = False
+            for anchor in anchors:
+                if groups.find(node(anchor)) == groups.find(node(key)):
+                    matched = True
+                elif matches(anchor, key):
+                    groups.union(node(anchor), node(key))
+                    matched = True
+            if not matched:
+                anchors.append(key)
+
+    def _join_screenshots(self, groups: _DisjointSet, failures, fingerprints, signatures):
+        hashes: Dict[str, Optional[int]] = {}
+        units = set()
+        for failure, fingerprint in zip(failures, fingerprints):
+            path = failure.get("screenshot")
+            if path and path not in hashes:
+                hashes[path] = dhash(path)
+            value = hashes.get(path) if path else None
+            # A blank or uniform page hashes to 0 and says nothing about the cause
+            if value:
+                units.add((fingerprint, value))
+
+        # Hashes within (bands - 1) bits of each other share at least one band
+        buckets: Dict[tuple, List[tuple]] = defaultdict(list)
+        for unit in units:
+            for band in hash_bands(unit[1], bands=min(self.screenshot_distance + 2, 64)):
+                buckets[band].append(unit)
+
+        def matches(left, right):
+            return (
+                hamming(left[1], right[1]) <= self.screenshot_distance
+                and self._similarity(signatures, left[0], right[0]) >= self.visual_text_threshold
+            )
+
+        for bucket in buckets.values():
+            if len(bucket) > 1:
+                self._join_bucket(groups, bucket, matches, lambda unit: ("text", unit[0]))
+
+    @staticmethod
+    def _describe(failures: List[Dict[str, Any]], fingerprints: List[str], max_examples: int) -> Dict[str, Any]:
+        fingerprint_counts = Counter(fingerprints)
+        fingerprint = fingerprint_counts.most_common(1)[0][0]
+        first_seen = min((failure["start_time"] for failure in failures if failure.get("start_time")), default=None)
+        return {
+            "cluster_id": hashlib.blake2b(fingerprint.encode("utf-8"), digest_size=6).hexdigest(),
+            "size": len(failures),
+            "fingerprint": fingerprint,
+            "variants": len(fingerprint_counts),
+            "sample_error": next(failure["error_message"] for failure, value in zip(failures, fingerprints) if value == fingerprint),
+            "test_run_ids": sorted({failure["test_run_id"] for failure in failures}),
+            "step_orders": dict(Counter(failure.get("step_order") for failure in failures).most_common()),
+            "browsers": dict(Counter(failure.get("browser") for failure in failures if failure.get("browser")).most_common()),
+            "first_seen": first_seen,
+            "screenshots": [failure["screenshot"] for failure in failures if failure.get("screenshot")][:3],
+            "result_ids": [failure["result_id"] for failure in failures][:max_examples],
+        }
+
+def load_failures(
+    db: Session,
+    test_run_ids: Optional[List[int]] = None,
+    since: Optional[datetime] = None,
+    project_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Failed step results with their run context, newest runs first"""
+    query = (
+        db.query(
+            models.TestResult.id,
+            models.TestResult.test_run_id,
+            models.TestResult.step_order,
+            models.TestResult.error_message,
+            models.TestResult.screenshot,
+            models.TestRun.browser,
+            models.TestRun.start_time,
+        )
+        .join(models.TestRun, models.TestResult.test_run_id == models.TestRun.id)
+        .filter(models.TestResult.status.in_(FAILED_STATUSES))
+    )
+    if test_run_ids is not None:
+        query = query.filter(models.TestResult.test_run_id.in_(test_run_ids))
+    if since is not None:
+        query = query.filter(models.TestRun.start_time >= since)
+    if project_id is not None:
+        query = query.join(models.TestCase, models.TestRun.test_case_id == models.TestCase.id).filter(models.TestCase.project_id == project_id)
+    query = query.order_by(models.TestRun.id.desc(), models.TestResult.id)
+    if limit:
+        query = query.limit(limit)
+
+    return [
+        {
+            "result_id": result_id,
+            "test_run_id": test_run_id,
+            "step_order": step_order,
+            "error_message": error_message,
+            "screenshot": screenshot,
+            "browser": browser,
+            "start_time": start_time,
+        }
+        for result_id, test_run_id, step_order, error_message, screenshot, browser, start_time in query.yield_per(1000)
+    ]
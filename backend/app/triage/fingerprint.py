@@ -0,0 +1,56 @@
+import re
+from typing import List, Optional
+
+# Playwright appends a call log to its errors; it repeats the selector and timing
+# of every retry and says little about the cause. Its first "waiting for" line is
+# kept though: for timeouts it is the only part naming the locator.
+CALL_LOG_PATTERN = re.compile(r"\n?=+\s*logs\s*=+(.*)", re.DOTALL | re.IGNORECASE)
+WAITING_FOR_PATTERN = re.compile(r"waiting for (?:locator|selector|get_by)[^\n]*", re.IGNORECASE)
+
+# Python traceback frames: keep the file name and function, drop directories and line numbers
+PY_FRAME_PATTERN = re.compile(r'file "(?:[^"]*[\\/])?([^"\\/]+)", line \d+(?:, in (\S+))?')
+
+# JavaScript stack frames: "at fn (http://host/static/app.3f2a.js:12:345)"
+JS_FRAME_PATTERN = re.compile(r"\(?(?:https?://[^\s()]*/)?([\w.-]+\.m?js)(?::\d+)+\)?")
+
+UUID_PATTERN = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b")
+# Hashes, object ids and build hashes: 8+ hex characters including at least one digit
+HEX_PATTERN = re.compile(r"\b(?:0x)?(?=[0-9a-f]*\d)[0-9a-f]{8,}\b")
+QUERY_PATTERN = re.compile(r"(https?://[^\s?#\"']+)[?#][^\s\"']*")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+TOKEN_PATTERN = re.compile(r"<\w+>|[a-z_][a-z0-9_]*|[#.\[\]=:/]")
+
+def _waiting_for(call_log: re.Match) -> str:
+    line = WAITING_FOR_PATTERN.search(call_log.group(1))
+    return f" {line.group(0).strip()}" if line else ""
+
+def normalize_error(message: str) -> str:
+    """Reduce an error message or stack trace to its stable shape.
+
+    Volatile parts (ids, counters, timings, query strings, line numbers) become
+    placeholders so repeated failures of the same cause normalize identically.
+    """
+    text = CALL_LOG_PATTERN.sub(_waiting_for, message or "").lower()
+    text = PY_FRAME_PATTERN.sub(lambda m: f"file {m.group(1)} in {m.group(2) or ''}", text)
+    text = JS_FRAME_PATTERN.sub(lambda m: f"({m.group(1)})", text)
+    text = QUERY_PATTERN.sub(r"\1", text)
+    text = UUID_PATTERN.sub("<uuid>", text)
+    text = HEX_PATTERN.sub("<hex>", text)
+    text = NUMBER_PATTERN.sub("<n>", text)
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+def locator(fingerprint: str) -> Optional[str]:
+    """The locator a normalized message was waiting for, if its call log named one"""
+    line = WAITING_FOR_PATTERN.search(fingerprint)
+    return line.group(0) if line else None
+
+def tokens(fingerprint: str) -> List[str]:
+    return TOKEN_PATTERN.findall(fingerprint)
+
+def shingles(fingerprint: str, size: int = 3) -> set:
+    """Overlapping token n-grams of a normalized message"""
+    words = tokens(fingerprint)
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
@@ -0,0 +1,66 @@
+import hashlib
+import random
+from collections import defaultdict
+from typing import List, Dict, Iterable, Tuple
+
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod P
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+class MinHasher:
+    """MinHash signatures whose agreement estimates the Jaccard similarity of two sets"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._permutations = [
+            (rng.randint(1, MERSENNE_PRIME - 1), rng.randint(0, MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [_hash64(item) for item in items]
+        if not hashes:
+            return (MAX_HASH,) * self.num_perm
+        return tuple(
+            min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes)
+            for a, b in self._permutations
+        )
+
+    @staticmethod
+    def similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the sets behind two signatures"""
+        return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+class LSHIndex:
+    """Banded locality-sensitive hashing over MinHash signatures.
+
+    Signatures are cut into bands of rows; two keys become candidates when any
+    band matches exactly. With b bands of r rows the collision probability
+    rises steeply around a similarity of (1/b) ** (1/r).
+    """
+
+    def __init__(self, bands: int = 16, rows: int = 4):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: List[Dict[Tuple[int, ...], List]] = [defaultdict(list) for _ in range(bands)]
+
+    @property
+    def threshold(self) -> float:
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def add(self, key, signature: Tuple[int, ...]):
+        if len(signature) < self.bands * self.rows:
+            raise ValueError(f"Signature has {len(signature)} values, {self.bands * self.rows} needed")
+        for band, buckets in enumerate(self._buckets):
+            buckets[signature[band * self.rows:(band + 1) * self.rows]].append(key)
+
+    def buckets(self) -> Iterable[List]:
+        """Every bucket holding more than one key"""
+        for buckets in self._buckets:
+            for keys in buckets.values():
+                if len(keys) > 1:
+                    yield keys
@@ -0,0 +1,40 @@
+import os
+from typing import Optional
+
+HASH_BITS = 64
+
+def dhash(path: str, size: int = 8) -> Optional[int]:
+    """Difference hash of an image: one bit per horizontally adjacent pixel pair.
+
+    Returns None when the file is missing or unreadable, or when Pillow is not
+    installed; triage then relies on error messages alone.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(path) as image:
+            pixels = list(image.convert("L").resize((size + 1, size), Image.BILINEAR).getdata())
+    except (OSError, ValueError):
+        return None
+
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def hamming(left: int, right: int) -> int:
+    return bin(left ^ right).count("1")
+
+def hash_bands(value: int, bands: int = 4):
+    """Split a hash into bands; hashes within bands - 1 bits share at least one band"""
+    width = HASH_BITS // bands
+    mask = (1 << width) - 1
+    return [(band, (value >> (band * width)) & mask) for band in range(bands)]
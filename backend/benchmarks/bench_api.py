@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, Dict, List
+
+import httpx
+
+from app.db.database import Base, engine
+
+from .harness import Stopwatch, summarize_latencies
+
+
+async def _load(app, paths: List[str], total_requests: int, concurrency: int) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                watch = Stopwatch()
+                try:
+                    response = await client.get(path)
+                except Exception:
+                    # ASGITransport re-raises unhandled server errors
+                    errors += 1
+                    continue
+                latencies.append(watch.elapsed_ms)
+                if response.status_code >= 400:
+                    errors += 1
+
+        watch = Stopwatch()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = watch.elapsed
+
+    summary = summarize_latencies(latencies)
+    summary["errors"] = errors
+    summary["requests_per_sec"] = round(total_requests / elapsed, 1)
+    return summary
+
+
+async def _seed(app, cases: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        user = (await client.post("/api/users/", json={"email": "api-bench@example.com", "password": "x"})).json()
+        project = (await client.post("/api/projects/", json={"name": "API Bench", "owner_id": user["id"]})).json()
+        for i in range(cases):
+            await client.post("/api/test-cases/", json={
+                "name": f"Case {i}",
+                "base_url": "http://127.0.0.1/test.html",
+                "project_id": project["id"],
+            })
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure API p50/p99 latency under concurrent load (in-process ASGI transport)"""
+    from main import app
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    asyncio.run(_seed(app, 200))
+
+    total_requests = 500 if quick else 5000
+    results = {}
+    # Stay below the default threadpool size (40); beyond it sync routes
+    # waiting on the DB pool can starve the threads needed to release it
+    for concurrency in (1, 8, 32):
+        results[f"concurrency_{concurrency}"] = asyncio.run(_load(
+            app,
+            ["/", "/api/test-cases/?limit=100", "/api/projects/"],
+            total_requests,
+            concurrency,
+        ))
+    return results
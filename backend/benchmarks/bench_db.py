@@ -0,0 +1,79 @@
+import random
+from typing import Any, Dict
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.database import Base, engine
+from app.models import models
+
+from .harness import Stopwatch
+
+
+def _seed_parents(db: Session) -> int:
+    user = models.User(email="bench@example.com", hashed_password="bench")
+    db.add(user)
+    db.flush()
+    project = models.Project(name="Benchmark", owner_id=user.id)
+    db.add(project)
+    db.flush()
+    test_case = models.TestCase(name="Benchmark Case", base_url="http://127.0.0.1/", project_id=project.id)
+    db.add(test_case)
+    db.flush()
+    test_run = models.TestRun(test_case_id=test_case.id, status="running", browser="chromium")
+    db.add(test_run)
+    db.commit()
+    return test_run.id
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure bulk ingest of TestResult rows (rows per second)"""
+    total_rows = 20000 if quick else 200000
+    batch_size = 1000
+    rng = random.Random(0)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        test_run_id = _seed_parents(db)
+
+        # Bulk executemany inserts, committed per batch
+        watch = Stopwatch()
+        for start in range(0, total_rows, batch_size):
+            rows = []
+            for step_order in range(start, min(start + batch_size, total_rows)):
+                failed = rng.random() < 0.05
+                rows.append({
+                    "step_order": step_order,
+                    "status": "failed" if failed else "passed",
+                    "error_message": "TimeoutError: waiting for selector" if failed else None,
+                    "screenshot": None,
+                    "execution_time": rng.randint(5, 500),
+                    "test_run_id": test_run_id,
+                })
+            db.execute(insert(models.TestResult), rows)
+            db.commit()
+        bulk_sec = watch.elapsed
+
+        # ORM add + commit per row, the naive per-step pattern
+        per_row = min(2000, total_rows // 10)
+        watch = Stopwatch()
+        for step_order in range(per_row):
+            db.add(models.TestResult(
+                step_order=step_order,
+                status="passed",
+                execution_time=10,
+                test_run_id=test_run_id,
+            ))
+            db.commit()
+        per_row_sec = watch.elapsed
+
+    return {
+        "dialect": engine.dialect.name,
+        "bulk_rows": total_rows,
+        "bulk_batch_size": batch_size,
+        "bulk_rows_per_sec": round(total_rows / bulk_sec, 1),
+        "per_row_commit_rows": per_row,
+        "per_row_commit_rows_per_sec": round(per_row / per_row_sec, 1),
+    }
@@ -0,0 +1,62 @@
+import json
+import os
+import random
+import tempfile
+from typing import Any, Dict, List
+
+from app.test_generator.generator import TestGenerator
+
+from .harness import best_of
+
+
+def synthetic_actions(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Build a realistic mix of recorded navigation, click and input actions"""
+    rng = random.Random(seed)
+    actions = []
+    url = "http://127.0.0.1:8080/test.html"
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            url = f"http://127.0.0.1:8080/page_{rng.randint(0, 50)}.html"
+            action = {"type": "navigation", "url": url}
+        elif roll < 0.5:
+            action = {"type": "click", "url": url, "selector": f"#button_{rng.randint(0, 200)}"}
+        else:
+            action = {
+                "type": "input",
+                "url": url,
+                "selector": f"#field_{rng.randint(0, 200)}",
+                "value": f"value {rng.randint(0, 10 ** 6)}",
+            }
+        action["timestamp"] = 1700000000.0 + i * 0.25
+        action["screenshot"] = f"recordings/synthetic/step_{i}.png"
+        actions.append(action)
+    return actions
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure TestGenerator throughput (actions per second) on large recordings"""
+    sizes = [1000, 10000] if quick else [1000, 10000, 100000]
+    results = {}
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as recording_path:
+            with open(os.path.join(recording_path, "actions.json"), "w") as f:
+                json.dump(synthetic_actions(size), f)
+
+            # Best of several repeats keeps small workloads from being dominated by noise
+            repeats = 5 if size <= 10000 else 1
+            generator = TestGenerator(recording_path)
+            load_sec = best_of(lambda: TestGenerator(recording_path), repeats)
+            playwright_sec = best_of(lambda: generator.generate_playwright_test(test_name="Benchmark Test"), repeats)
+            pytest_sec = best_of(lambda: generator.generate_pytest_test(test_name="Benchmark Test"), repeats)
+            steps_sec = best_of(generator.generate_test_steps, repeats)
+
+        results[f"actions_{size}"] = {
+            "load_actions_per_sec": round(size / load_sec, 1),
+            "playwright_actions_per_sec": round(size / playwright_sec, 1),
+            "pytest_actions_per_sec": round(size / pytest_sec, 1),
+            "test_steps_actions_per_sec": round(size / steps_sec, 1),
+        }
+
+    return results
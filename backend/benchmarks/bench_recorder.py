@@ -0,0 +1,59 @@
+import os
+import tempfile
+from typing import Any, Dict
+
+from .harness import DEFAULT_SITE_DIR, DEFAULT_SITE_PAGE, Stopwatch, serve_static_site, summarize_latencies
+
+
+def run(quick: bool = False, site_dir: str = DEFAULT_SITE_DIR) -> Dict[str, Any]:
+    """Measure recorder event-to-persist latency and screenshot throughput"""
+    try:
+        from playwright.sync_api import Error as PlaywrightError
+        from app.recorder.recorder import WebRecorder
+    except ImportError as e:
+        return {"skipped": f"playwright is not available: {e}"}
+
+    events = 20 if quick else 200
+    screenshot_seconds = 2.0 if quick else 10.0
+
+    with tempfile.TemporaryDirectory() as output_dir, serve_static_site(site_dir) as site_url:
+        recorder = WebRecorder(base_url=f"{site_url}/{DEFAULT_SITE_PAGE}", output_dir=output_dir)
+        try:
+            recorder.start_recording(browser_type="chromium", headless=True)
+        except PlaywrightError as e:
+            if recorder.playwright:
+                recorder.playwright.stop()
+            return {"skipped": f"chromium could not be launched: {e.message.splitlines()[0]}"}
+
+        try:
+            # Event-to-persist: from the recorder receiving an event until the
+            # screenshot is on disk and the action is appended
+            latencies = []
+            for i in range(events):
+                watch = Stopwatch()
+                if i % 2:
+                    recorder._record_action("click", {"class": "button"})
+                else:
+                    recorder._record_input({"target": {"id": f"field_{i}"}, "value": f"value {i}"})
+                latencies.append(watch.elapsed_ms)
+
+            # Raw screenshot throughput, independent of action bookkeeping
+            screenshot_path = os.path.join(recorder.recording_path, "throughput.png")
+            screenshots = 0
+            watch = Stopwatch()
+            while watch.elapsed < screenshot_seconds:
+                recorder.page.screenshot(path=screenshot_path)
+                screenshots += 1
+            screenshots_per_sec = screenshots / watch.elapsed
+        finally:
+            watch = Stopwatch()
+            result = recorder.stop_recording()
+            stop_ms = watch.elapsed_ms
+
+    return {
+        "events": events,
+        "event_to_persist": summarize_latencies(latencies),
+        "stop_and_persist_ms": round(stop_ms, 3),
+        "actions_persisted": result["actions_count"],
+        "screenshots_per_sec": round(screenshots_per_sec, 2),
+    }
@@ -0,0 +1,112 @@
+import random
+from typing import Any, Dict
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import models
+from app.search.service import TestCaseSearch
+
+from .harness import Stopwatch, summarize_latencies
+
+# Page and element names are drawn with Zipf-like frequencies: a few are everywhere,
+# most appear in a handful of cases, as in a real suite
+PAGES = ["login", "signup", "cart", "checkout", "search", "profile", "settings", "orders"] + [f"feature{n}" for n in range(300)]
+ELEMENTS = ["button", "input", "link", "submit", "email", "password", "total", "coupon", "menu", "avatar"] + [f"widget{n}" for n in range(50)]
+PAGE_WEIGHTS = [1 / (rank + 1) for rank in range(len(PAGES))]
+ELEMENT_WEIGHTS = [1 / (rank + 1) for rank in range(len(ELEMENTS))]
+# From broad ("button", in most cases) to selective ("feature250 widget40")
+QUERIES = ["#checkout-button", "checkout button", "button", "coupon input", "profile avat", "feature250 widget40"]
+
+
+def _seed(total_cases: int, rng: random.Random) -> None:
+    with Session(engine) as db:
+        user = models.User(email="bench@example.com", hashed_password="bench")
+        db.add(user)
+        db.flush()
+        project = models.Project(name="Benchmark", owner_id=user.id)
+        db.add(project)
+        db.commit()
+
+        batch_size = 1000
+        for start in range(1, total_cases + 1, batch_size):
+            cases = []
+            steps = []
+            for case_id in range(start, min(start + batch_size, total_cases + 1)):
+                page = rng.choices(PAGES, PAGE_WEIGHTS)[0]
+                cases.append({
+                    "id": case_id,
+                    "name": f"{page.title()} flow {case_id}",
+                    "description": f"Covers the {page} page",
+                    "base_url": f"https://shop.example.com/{page}",
+                    "project_id": project.id,
+                })
+                for order in range(rng.randint(4, 12)):
+                    element = rng.choices(ELEMENTS, ELEMENT_WEIGHTS)[0]
+                    steps.append({
+                        "order": order,
+                        "action_type": "type" if element in ("input", "email", "password", "coupon") else "click",
+                        "selector": f"#{rng.choices(PAGES, PAGE_WEIGHTS)[0]}-{element}",
+                        "selector_type": "css",
+                        "value": f"value {rng.randint(0, 999)}" if element == "input" else None,
+                        "test_case_id": case_id,
+                    })
+            db.execute(insert(models.TestCase), cases)
+            db.execute(insert(models.TestStep), steps)
+            db.commit()
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure the in-process search index: build time, query latency and incremental updates"""
+    total_cases = 20000 if quick else 200000
+    rng = random.Random(0)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    _seed(total_cases, rng)
+
+    search = TestCaseSearch(backend="memory")
+    try:
+        watch = Stopwatch()
+        search.build()
+        build_sec = watch.elapsed
+
+        latencies = {query: [] for query in QUERIES}
+        matched = {}
+        with Session(engine) as db:
+            for _ in range(5 if quick else 20):
+                for query in QUERIES:
+                    watch = Stopwatch()
+                    matched[query] = search.search(db, query, limit=20)["total"]
+                    latencies[query].append(watch.elapsed_ms)
+        all_latencies = [latency for samples in latencies.values() for latency in samples]
+
+        # Commit a new case with steps and wait for the background re-index to pick it up
+        updates = []
+        db = SessionLocal()
+        try:
+            for number in range(50):
+                watch = Stopwatch()
+                test_case = models.TestCase(name=f"Added {number}", base_url="https://shop.example.com/new", project_id=1)
+                db.add(test_case)
+                db.flush()
+                db.add(models.TestStep(order=0, action_type="click", selector="#brand-new-button", test_case_id=test_case.id))
+                db.commit()
+                search.wait_reindexed()
+                updates.append(watch.elapsed_ms)
+        finally:
+            db.close()
+        assert search.index.search(["brand", "new"], [], ["selector"])[0] == 50
+    finally:
+        search.close()
+
+    return {
+        "cases": total_cases,
+        "terms": search.index.stats()["terms"],
+        "build_cases_per_sec": round(total_cases / build_sec, 1),
+        "query": summarize_latencies(all_latencies),
+        "query_p50_by_query_ms": {query: round(sorted(samples)[len(samples) // 2], 3) for query, samples in latencies.items()},
+        "matches_by_query": matched,
+        "commit_and_reindex": summarize_latencies(updates),
+    }
@@ -0,0 +1,81 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+from .harness import BACKEND_DIR, Stopwatch
+
+
+def _env(**overrides) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    env.update(overrides)
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_command(code: str, env: Dict[str, str]) -> float:
+    watch = Stopwatch()
+    subprocess.run([sys.executable, "-W", "ignore", "-c", code], env=env, check=True, capture_output=True)
+    return watch.elapsed_ms
+
+
+def _time_to_ready(env: Dict[str, str], timeout: float = 30.0) -> float:
+    """Milliseconds from spawning uvicorn until GET / answers"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/"
+    watch = Stopwatch()
+    process = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR, "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while watch.elapsed < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return watch.elapsed_ms
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"Server not ready after {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def _median(samples: List[float]) -> float:
+    return round(statistics.median(samples), 1)
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure cold start: interpreter, `import main`, and spawn-to-first-response (in milliseconds)"""
+    repeats = 3 if quick else 7
+    env = _env(MIGRATE_ON_STARTUP="false", WARM_BROWSERS="")
+
+    # The schema is migrated once up front, as a deployment would
+    subprocess.run([sys.executable, "-W", "ignore", "-m", "app.db.migrate"], env=env, check=True, capture_output=True, cwd=BACKEND_DIR)
+
+    interpreter = [_time_command("pass", env) for _ in range(repeats)]
+    imports = [_time_command("import main", env) for _ in range(repeats)]
+    ready = [_time_to_ready(env) for _ in range(repeats)]
+    ready_migrating = [_time_to_ready(_env(MIGRATE_ON_STARTUP="true", WARM_BROWSERS="")) for _ in range(repeats)]
+
+    return {
+        "interpreter_ms": _median(interpreter),
+        "import_main_ms": _median(imports),
+        "ready_ms": _median(ready),
+        "ready_with_migrate_ms": _median(ready_migrating),
+    }
@@ -0,0 +1,163 @@
+import contextlib
+import functools
+import http.server
+import json
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+# Local static site used by the browser benchmarks (no network access required)
+DEFAULT_SITE_DIR = os.path.join(REPO_DIR, "public")
+DEFAULT_SITE_PAGE = "test.html"
+
+DEFAULT_RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values using linear interpolation"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, float]:
+    """Summarize a list of latencies (in milliseconds)"""
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(statistics.mean(latencies_ms), 3) if latencies_ms else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3) if latencies_ms else 0.0,
+    }
+
+
+class Stopwatch:
+    """Measure elapsed wall-clock time with perf_counter"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.elapsed * 1000.0
+
+
+def best_of(fn: Callable[[], Any], repeats: int = 3) -> float:
+    """Run fn repeats times and return the fastest wall-clock time in seconds"""
+    timings = []
+    for _ in range(repeats):
+        watch = Stopwatch()
+        fn()
+        timings.append(watch.elapsed)
+    return min(timings)
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_static_site(directory: str = DEFAULT_SITE_DIR) -> Iterator[str]:
+    """Serve a directory over HTTP on an ephemeral localhost port, yielding its base URL"""
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def git_commit() -> Optional[str]:
+    """Return the current git commit hash, if available"""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine the benchmarks ran on"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(results: Dict[str, Any], output_dir: str = DEFAULT_RESULTS_DIR) -> str:
+    """Save benchmark results as JSON, named after the commit and timestamp"""
+    os.makedirs(output_dir, exist_ok=True)
+    commit = results.get("commit") or "nocommit"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = os.path.join(output_dir, f"bench_{timestamp}_{commit[:10]}.json")
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    return output_file
+
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """Compare two result files and flag regressions larger than threshold.
+
+    Metrics ending in ``_per_sec`` are higher-is-better; metrics ending in
+    ``_ms`` are lower-is-better. Other numeric values are reported but never
+    flagged.
+    """
+    old = _flatten(baseline.get("benchmarks", {}))
+    new = _flatten(current.get("benchmarks", {}))
+    rows = []
+    for name in sorted(set(old) & set(new)):
+        before, after = old[name], new[name]
+        change = (after - before) / before if before else 0.0
+        if name.endswith("_per_sec"):
+            regressed = change < -threshold
+        elif name.endswith("_ms"):
+            regressed = change > threshold
+        else:
+            regressed = False
+        rows.append({
+            "metric": name,
+            "baseline": before,
+            "current": after,
+            "change_pct": round(change * 100, 2),
+            "regressed": regressed,
+        })
+    return rows
@@ -0,0 +1,99 @@
+"""Run the offline benchmark suite and save the results as JSON.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.run                      # full suite
+    python -m benchmarks.run --quick              # smaller workloads
+    python -m benchmarks.run --only generator,db  # a subset
+    python -m benchmarks.run --compare benchmarks/results/bench_<...>.json
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from .harness import (
+    BACKEND_DIR,
+    DEFAULT_RESULTS_DIR,
+    DEFAULT_SITE_DIR,
+    compare_results,
+    environment_info,
+    git_commit,
+    save_results,
+)
+
+BENCHMARKS = ["recorder", "generator", "db", "api", "startup", "search"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the backend benchmark suite")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--quick", action="store_true", help="Use smaller workloads")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_DIR, help="Directory for result JSON files")
+    parser.add_argument("--site-dir", default=DEFAULT_SITE_DIR, help="Static site served to the recorder benchmark")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold (fraction)")
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(",") if args.only else BENCHMARKS
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    output_dir = os.path.abspath(args.output)
+    site_dir = os.path.abspath(args.site_dir)
+    # Read the baseline before chdir (it may be a relative path) and before spending time on the suite
+    baseline = None
+    if args.compare:
+        try:
+            with open(os.path.abspath(args.compare)) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot read baseline {args.compare}: {e}")
+    workdir = tempfile.mkdtemp(prefix="bench_")
+
+    # Everything runs against a throwaway SQLite database and recordings directory
+    # so the suite never needs Postgres or network access
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["RECORDINGS_DIR"] = os.path.join(workdir, "recordings")
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(workdir)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "quick": args.quick,
+        "environment": environment_info(),
+        "benchmarks": {},
+    }
+
+    for name in selected:
+        print(f"Running {name} benchmark...", flush=True)
+        module = importlib.import_module(f"benchmarks.bench_{name}")
+        kwargs = {"quick": args.quick}
+        if name == "recorder":
+            kwargs["site_dir"] = site_dir
+        results["benchmarks"][name] = module.run(**kwargs)
+
+    output_file = save_results(results, output_dir)
+    print(json.dumps(results["benchmarks"], indent=2))
+    print(f"Results saved to {output_file}")
+
+    if baseline is not None:
+        rows = compare_results(baseline, results, args.threshold)
+        regressions = [row for row in rows if row["regressed"]]
+        for row in rows:
+            marker = "REGRESSION" if row["regressed"] else ""
+            print(f"{row['metric']:<60} {row['baseline']:>12} -> {row['current']:>12} ({row['change_pct']:+.1f}%) {marker}")
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,68 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import anyio
+import asyncio
+import logging
 import os
 
 from app.api.endpoints import router as api_router
-from app.db.database import Base, engine
+from app.core import config
+from app.db.database import warm_pool
+from app.engine.engine import get_engine
+from app.engine.matrix import parse_list
+from app.runner.result_buffer import get_result_buffer
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+async def warm_pools():
+    """Open database connections and launch browsers before the first requests need them"""
+    try:
+        if config.WARM_DB_CONNECTIONS:
+            await anyio.to_thread.run_sync(warm_pool, config.WARM_DB_CONNECTIONS)
+        browser_types = parse_list(config.WARM_BROWSERS)
+        if browser_types:
+            await get_engine().warm(browser_types)
+        if config.SEARCH_WARM_INDEX:
+            from app.search.service import get_test_case_search
+            await anyio.to_thread.run_sync(get_test_case_search().build)
+    except Exception:
+        # Warming is an optimization; requests still connect and launch on demand
+        logger.warning("Warming pools failed", exc_info=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes normally run as a separate step (python -m app.db.migrate)
+    if config.MIGRATE_ON_STARTUP:
+        from app.db.migrate import migrate
+        await anyio.to_thread.run_sync(migrate)
+
+    # Persist step results a crashed predecessor left in the journal
+    buffer = get_result_buffer()
+    await anyio.to_thread.run_sync(buffer.start)
+    try:
+        await anyio.to_thread.run_sync(buffer.replay_orphans)
+    except Exception:
+        # Serve anyway; the journal is kept and the buffer's flusher retries the replay
+        logger.exception("Replaying the result journal failed")
+
+    # Serve right away; pools fill in the background
+    warmup = asyncio.create_task(warm_pools())
+    yield
+
+    warmup.cancel()
+    await asyncio.gather(warmup, return_exceptions=True)
+    # Cancel live recordings/runs and close the shared browsers
+    await get_engine().shutdown()
+    # Write out buffered results, including those of the runs just cancelled
+    await anyio.to_thread.run_sync(get_result_buffer().stop)
 
 app = FastAPI(
     title="Web Automation Testing Tool",
     description="A tool for recording web interactions and generating automated tests",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -28,10 +78,10 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api")
 
 # Create recordings directory if it doesn't exist
-os.makedirs("recordings", exist_ok=True)
+os.makedirs(config.RECORDINGS_DIR, exist_ok=True)
 
 # Mount static files for recordings
-app.mount("/recordings", StaticFiles(directory="recordings"), name="recordings")
+app.mount("/recordings", StaticFiles(directory=config.RECORDINGS_DIR), name="recordings")
 
 @app.get("/")
 async def root():
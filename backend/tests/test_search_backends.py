@@ -0,0 +1,124 @@
+"""Both search backends must match the same test cases for the same query.
+
+The Postgres cases run against the database in TEST_POSTGRES_URL (its tables
+are dropped afterwards) and are skipped when it is not set:
+
+    TEST_POSTGRES_URL=postgresql://localhost/search_test python -m pytest tests
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.migrate import migrate
+from app.models import models
+from app.search import service
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+SHOP = "https://shop.example.com"
+
+# name, description, base URL, steps as (action type, selector, value)
+CASES = [
+    ("Checkout as guest", None, SHOP, [("type", "#email", "guest@example.com"), ("click", "#pay", None)]),
+    ("Checkout with coupon", "Applies a discount", SHOP, [("type", "#coupon-input", "SAVE10")]),
+    ("Login", "Signs in with email and password", SHOP, [("type", "#email", None), ("type", "#password", None), ("click", "#login-button", None)]),
+    ("Newsletter", None, SHOP, [("click", "#checkout-button", None), ("type", "#emailInput", "news@example.com")]),
+    ("Update avatar", None, f"{SHOP}/account/settings", [("click", "#avatar-upload", None)]),
+]
+
+# query, exact, fields, expected case names
+QUERIES = [
+    # Words found in different fields of a case: "checkout" in the name, "email" in a selector
+    ("checkout email", False, None, {"Checkout as guest", "Newsletter"}),
+    ("checkout", False, None, {"Checkout as guest", "Checkout with coupon", "Newsletter"}),
+    ("checkout butt", False, None, {"Newsletter"}),
+    ("login password", False, None, {"Login"}),
+    ("coupon save10", False, None, {"Checkout with coupon"}),
+    ("email", False, ["name", "description"], {"Login"}),
+    ("checkout email", False, ["name"], set()),
+    ("checkout button", True, None, {"Newsletter"}),
+    ("email checkout", True, None, set()),
+    # Base URLs are split into words like every other field
+    ("settings", False, None, {"Update avatar"}),
+    ("account avatar", False, None, {"Update avatar"}),
+    ("settings", False, ["name"], set()),
+]
+
+DATABASES = [
+    pytest.param(("sqlite", "memory"), id="memory-sqlite"),
+    pytest.param(("postgresql", "memory"), id="memory-postgresql"),
+    pytest.param(("postgresql", "postgres"), id="postgres"),
+]
+
+@pytest.fixture(scope="module")
+def databases(tmp_path_factory):
+    binds = {"sqlite": create_engine(f"sqlite:///{tmp_path_factory.mktemp('search') / 'search.db'}")}
+    if POSTGRES_URL:
+        binds["postgresql"] = create_engine(POSTGRES_URL)
+
+    for bind in binds.values():
+        migrate(bind)
+        db = sessionmaker(bind=bind)()
+        try:
+            user = models.User(email="search@example.com", hashed_password="search")
+            project = models.Project(name="Search", owner=user)
+            db.add(project)
+            for name, description, base_url, steps in CASES:
+                db.add(models.TestCase(
+                    name=name,
+                    description=description,
+                    base_url=base_url,
+                    project=project,
+                    steps=[
+                        models.TestStep(order=order, action_type=action_type, selector=selector, selector_type="css", value=value)
+                        for order, (action_type, selector, value) in enumerate(steps)
+                    ],
+                ))
+            db.commit()
+        finally:
+            db.close()
+    yield binds
+
+    for bind in binds.values():
+        Base.metadata.drop_all(bind=bind)
+        bind.dispose()
+
+@pytest.fixture(params=DATABASES)
+def search(request, databases):
+    database, backend = request.param
+    if database not in databases:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    session_factory = sessionmaker(bind=databases[database])
+    search = service.TestCaseSearch(backend=backend, bind=databases[database], session_factory=session_factory)
+    db = session_factory()
+    yield search, db
+    db.close()
+    search.close()
+
+@pytest.mark.parametrize("query, exact, fields, expected", QUERIES)
+def test_backends_match_the_same_cases(search, query, exact, fields, expected):
+    search, db = search
+    found = search.search(db, query, fields=fields or list(service.SEARCH_FIELDS), exact=exact)
+    assert {result["name"] for result in found["results"]} == expected
+    assert found["total"] == len(expected)
+
+def test_committed_changes_are_found(search):
+    search, db = search
+    assert search.search(db, "wishlist share")["total"] == 0
+
+    test_case = models.TestCase(name="Wishlist", base_url=SHOP, project_id=1)
+    test_case.steps = [models.TestStep(order=0, action_type="click", selector="#share-link", selector_type="css")]
+    db.add(test_case)
+    db.commit()
+    # The in-process index is updated in the background, after commit() returns
+    assert search.wait_reindexed(timeout=10)
+    assert [result["name"] for result in search.search(db, "wishlist share")["results"]] == ["Wishlist"]
+
+    db.delete(test_case.steps[0])
+    db.delete(test_case)
+    db.commit()
+    assert search.wait_reindexed(timeout=10)
+    assert search.search(db, "wishlist share")["total"] == 0
@@ -9,16 +9,36 @@ const api = axios.create({
   },
 })
 
+export interface PageParams {
+  skip?: number
+  limit?: number
+}
+
+// List endpoints stream one page; the total across all pages is in X-Total-Count
+export const getTotalCount = (response: { headers: Record<string, any> }) =>
+  Number(response.headers['x-total-count'] ?? 0)
+
 // Test Cases API
-export const getTestCases = () => api.get('/test-cases')
+export const getTestCases = (params: PageParams = {}) => api.get('/test-cases', { params })
 export const getTestCase = (id: number) => api.get(`/test-cases/${id}`)
+export const searchTestCases = (params: {
+  q: string
+  project_id?: number
+  action_type?: string
+  fields?: string
+  exact?: boolean
+  skip?: number
+  limit?: number
+}) => api.get('/test-cases/search', { params })
 export const createTestCase = (data: any) => api.post('/test-cases', data)
 export const updateTestCase = (id: number, data: any) => api.put(`/test-cases/${id}`, data)
 export const deleteTestCase = (id: number) => api.delete(`/test-cases/${id}`)
 
 // Test Runs API
-export const getTestRuns = () => api.get('/test-runs')
+export const getTestRuns = (params: PageParams & { test_case_id?: number } = {}) =>
+  api.get('/test-runs', { params })
 export const getTestRun = (id: number) => api.get(`/test-runs/${id}`)
+export const getTestRunResults = (id: number) => api.get(`/test-runs/${id}/results`)
 export const startTestRun = (data: any) => api.post('/test-runs/start', data)
 
 // Recorder API
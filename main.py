@@ -1,14 +1,24 @@
-from fastapi import FastAPI, HTTPException, Depends, Form, File, UploadFile
+from fastapi import FastAPI, HTTPException, Depends, Form, File, UploadFile, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import List, Optional
+from types import SimpleNamespace
+from typing import List, Optional, Iterable, Iterator
 import os
 import json
 from datetime import datetime
 
-# Import configuration
-import config
+from mock_data import load_fixtures
+
+# Import configuration; config.py is local to each checkout, so fall back to the environment
+try:
+    import config
+except ImportError:
+    config = SimpleNamespace(
+        GOOGLE_API_KEY=os.getenv("GOOGLE_API_KEY", ""),
+        RECORDINGS_DIR=os.getenv("RECORDINGS_DIR", "recordings"),
+    )
 
 app = FastAPI(
     title="Web Automation Testing Tool",
@@ -23,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 # Create recordings directory if it doesn't exist
@@ -52,52 +63,35 @@ class TestRun(BaseModel):
     browser: str
     duration: Optional[int] = None
 
-# Mock data
-test_cases = [
-    {
-        "id": 1,
-        "name": "Login Test",
-        "description": "Test user login functionality",
-        "base_url": "https://example.com/login",
-        "created_at": datetime(2023, 10, 15, 10, 30),
-        "updated_at": datetime(2023, 10, 15, 14, 45),
-        "steps_count": 5,
-        "last_run_status": "passed",
-    },
-    {
-        "id": 2,
-        "name": "Registration Test",
-        "description": "Test user registration process",
-        "base_url": "https://example.com/register",
-        "created_at": datetime(2023, 10, 14, 9, 15),
-        "updated_at": datetime(2023, 10, 14, 11, 20),
-        "steps_count": 8,
-        "last_run_status": "failed",
-    },
-]
-
-test_runs = [
-    {
-        "id": 1,
-        "test_case_id": 1,
-        "test_case_name": "Login Test",
-        "start_time": datetime(2023, 10, 15, 14, 30),
-        "end_time": datetime(2023, 10, 15, 14, 31, 5),
-        "status": "passed",
-        "browser": "chromium",
-        "duration": 65,
-    },
-    {
-        "id": 2,
-        "test_case_id": 2,
-        "test_case_name": "Registration Test",
-        "start_time": datetime(2023, 10, 15, 13, 45),
-        "end_time": datetime(2023, 10, 15, 13, 46, 30),
-        "status": "failed",
-        "browser": "firefox",
-        "duration": 90,
-    },
-]
+# Fixture data: static by default, or millions of synthetic records (see mock_data.py)
+fixtures = load_fixtures()
+
+# Largest page a list endpoint serves; pages are streamed, never built in memory
+MAX_PAGE_SIZE = int(os.getenv("MOCK_MAX_PAGE_SIZE", "100000"))
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def stream_json_array(items: Iterable[dict], batch_size: int = 500) -> Iterator[str]:
+    """Serialize items as a JSON array, a batch of items per chunk"""
+    yield "["
+    separator = ""
+    batch = []
+    for item in items:
+        batch.append(json.dumps(item, default=_json_default))
+        if len(batch) >= batch_size:
+            yield separator + ",".join(batch)
+            separator = ","
+            batch = []
+    if batch:
+        yield separator + ",".join(batch)
+    yield "]"
+
+def paged_response(items: Iterable[dict], total: int) -> StreamingResponse:
+    # The total goes in a header so the body can be streamed as a plain array
+    return StreamingResponse(stream_json_array(items), media_type="application/json", headers={"X-Total-Count": str(total)})
 
 @app.get("/")
 async def root():
@@ -111,27 +105,43 @@ async def get_config():
         "recordingsDir": config.RECORDINGS_DIR
     }
 
-@app.get("/api/test-cases", response_model=List[TestCase])
-async def get_test_cases():
-    return test_cases
+@app.get("/api/test-cases")
+def get_test_cases(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)):
+    """A page of test cases (a JSON array of TestCase); the total is in X-Total-Count"""
+    return paged_response(fixtures.iter_test_cases(skip, limit), fixtures.test_case_count)
 
 @app.get("/api/test-cases/{test_case_id}", response_model=TestCase)
-async def get_test_case(test_case_id: int):
-    for test_case in test_cases:
-        if test_case["id"] == test_case_id:
-            return test_case
-    raise HTTPException(status_code=404, detail="Test case not found")
+def get_test_case(test_case_id: int):
+    test_case = fixtures.get_test_case(test_case_id)
+    if not test_case:
+        raise HTTPException(status_code=404, detail="Test case not found")
+    return test_case
 
-@app.get("/api/test-runs", response_model=List[TestRun])
-async def get_test_runs():
-    return test_runs
+@app.get("/api/test-runs")
+def get_test_runs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    test_case_id: Optional[int] = None
+):
+    """A page of test runs, newest first (a JSON array of TestRun); the total is in X-Total-Count"""
+    return paged_response(
+        fixtures.iter_test_runs(skip, limit, test_case_id),
+        fixtures.count_test_runs(test_case_id)
+    )
 
 @app.get("/api/test-runs/{test_run_id}", response_model=TestRun)
-async def get_test_run(test_run_id: int):
-    for test_run in test_runs:
-        if test_run["id"] == test_run_id:
-            return test_run
-    raise HTTPException(status_code=404, detail="Test run not found")
+def get_test_run(test_run_id: int):
+    test_run = fixtures.get_test_run(test_run_id)
+    if not test_run:
+        raise HTTPException(status_code=404, detail="Test run not found")
+    return test_run
+
+@app.get("/api/test-runs/{test_run_id}/results")
+def get_test_run_results(test_run_id: int):
+    """Step results of a test run, streamed as a JSON array"""
+    if not fixtures.get_test_run(test_run_id):
+        raise HTTPException(status_code=404, detail="Test run not found")
+    return StreamingResponse(stream_json_array(fixtures.iter_test_results(test_run_id)), media_type="application/json")
 
 @app.post("/api/recordings/start")
 async def start_recording(url: str = Form(...), browser_type: str = Form("chromium")):
@@ -177,18 +187,14 @@ async def start_test_run(
     browser_type: str = Form("chromium")
 ):
     # Check if test case exists
-    test_case = None
-    for tc in test_cases:
-        if tc["id"] == test_case_id:
-            test_case = tc
-            break
+    test_case = fixtures.get_test_case(test_case_id)
 
     if not test_case:
         raise HTTPException(status_code=404, detail="Test case not found")
 
     # In a real app, you would start the test run here
 
-    test_run_id = len(test_runs) + 1
+    test_run_id = fixtures.count_test_runs() + 1
 
     return {
         "test_run_id": test_run_id,
@@ -0,0 +1,281 @@
+"""Fixture data for the mock API server (main.py).
+
+MOCK_DATA=static (the default) serves a few hand-written test cases and runs.
+MOCK_DATA=synthetic generates MOCK_TEST_CASES test cases with
+MOCK_RUNS_PER_CASE runs each, plus their step results, from MOCK_SEED.
+
+Synthetic records are derived from the seed and their id alone. Any page is
+therefore produced without generating the records before it, nothing is held
+in memory, and the same seed always yields the same data.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterator
+
+STATIC_TEST_CASES = [
+    {
+        "id": 1,
+        "name": "Login Test",
+        "description": "Test user login functionality",
+        "base_url": "https://example.com/login",
+        "created_at": datetime(2023, 10, 15, 10, 30),
+        "updated_at": datetime(2023, 10, 15, 14, 45),
+        "steps_count": 5,
+        "last_run_status": "passed",
+    },
+    {
+        "id": 2,
+        "name": "Registration Test",
+        "description": "Test user registration process",
+        "base_url": "https://example.com/register",
+        "created_at": datetime(2023, 10, 14, 9, 15),
+        "updated_at": datetime(2023, 10, 14, 11, 20),
+        "steps_count": 8,
+        "last_run_status": "failed",
+    },
+]
+
+STATIC_TEST_RUNS = [
+    {
+        "id": 1,
+        "test_case_id": 1,
+        "test_case_name": "Login Test",
+        "start_time": datetime(2023, 10, 15, 14, 30),
+        "end_time": datetime(2023, 10, 15, 14, 31, 5),
+        "status": "passed",
+        "browser": "chromium",
+        "duration": 65,
+    },
+    {
+        "id": 2,
+        "test_case_id": 2,
+        "test_case_name": "Registration Test",
+        "start_time": datetime(2023, 10, 15, 13, 45),
+        "end_time": datetime(2023, 10, 15, 13, 46, 30),
+        "status": "failed",
+        "browser": "firefox",
+        "duration": 90,
+    },
+]
+
+class StaticFixtures:
+    """Serves fixed lists of test cases and runs"""
+
+    def __init__(self, test_cases: List[Dict[str, Any]], test_runs: List[Dict[str, Any]]):
+        self.test_cases = test_cases
+        self.test_runs = test_runs
+
+    @property
+    def test_case_count(self) -> int:
+        return len(self.test_cases)
+
+    def count_test_runs(self, test_case_id: Optional[int] = None) -> int:
+        return sum(1 for _ in self._runs(test_case_id))
+
+    def get_test_case(self, test_case_id: int) -> Optional[Dict[str, Any]]:
+        return next((test_case for test_case in self.test_cases if test_case["id"] == test_case_id), None)
+
+    def get_test_run(self, test_run_id: int) -> Optional[Dict[str, Any]]:
+        return next((test_run for test_run in self.test_runs if test_run["id"] == test_run_id), None)
+
+    def iter_test_cases(self, skip: int = 0, limit: int = 100) -> Iterator[Dict[str, Any]]:
+        return iter(self.test_cases[skip:skip + limit])
+
+    def _runs(self, test_case_id: Optional[int]) -> Iterator[Dict[str, Any]]:
+        runs = sorted(self.test_runs, key=lambda test_run: test_run["start_time"], reverse=True)
+        return (test_run for test_run in runs if test_case_id is None or test_run["test_case_id"] == test_case_id)
+
+    def iter_test_runs(self, skip: int = 0, limit: int = 100, test_case_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Newest first"""
+        runs = list(self._runs(test_case_id))
+        return iter(runs[skip:skip + limit])
+
+    def iter_test_results(self, test_run_id: int) -> Iterator[Dict[str, Any]]:
+        return iter(())
+
+# Vocabulary for synthetic test cases
+AREAS = [
+    ("login", "Login"), ("signup", "Registration"), ("cart", "Shopping cart"), ("checkout", "Checkout"),
+    ("search", "Product search"), ("account/profile", "Profile"), ("account/settings", "Account settings"),
+    ("orders", "Order history"), ("wishlist", "Wishlist"), ("support", "Support form"),
+    ("admin/users", "User admin"), ("admin/reports", "Reports"), ("blog", "Blog"), ("pricing", "Pricing"),
+]
+SCENARIOS = [
+    "happy path", "invalid input", "empty state", "validation errors", "keyboard navigation",
+    "session timeout", "mobile layout", "pagination", "sorting", "guest user", "returning user", "bulk edit",
+]
+HOSTS = ["https://shop.example.com", "https://staging.example.com", "https://app.example.org"]
+ELEMENTS = ["submit-button", "email-input", "password-input", "search-box", "add-to-cart", "checkout-button",
+            "coupon-code", "next-page", "user-menu", "save-button", "close-dialog", "terms-checkbox"]
+ERRORS = [
+    "TimeoutError: waiting for selector \"#{element}\" failed: timeout 30000ms exceeded",
+    "AssertionError: expected \"#{element}\" to be visible",
+    "Error: element \"#{element}\" is not attached to the DOM",
+    "AssertionError: expected text \"Order confirmed\" but got \"Payment declined\"",
+    "net::ERR_CONNECTION_RESET at {url}",
+]
+# Weighted: most runs use Chromium
+BROWSERS = ["chromium"] * 6 + ["firefox"] * 3 + ["webkit"]
+
+CASE, RUN, RESULT = 1, 2, 3
+
+class SyntheticFixtures:
+    """Generates test cases, runs and step results on demand from a seed.
+
+    Cases are created over the first half of `days`. Run i belongs to test
+    case (i - 1) % test_cases + 1, so each case's runs and its latest status
+    can be derived without a lookup table. Run ids follow start time: a case's
+    first run starts just after it is created, and the later rounds are spread
+    over the second half, once every case exists.
+    """
+
+    def __init__(self, seed: int = 0, test_cases: int = 1_000_000, runs_per_case: int = 5, start: datetime = datetime(2024, 1, 1), days: int = 180):
+        self.seed = seed
+        self.test_case_count = test_cases
+        self.runs_per_case = runs_per_case
+        self.test_run_count = test_cases * runs_per_case
+        self.start = start
+        self.span = timedelta(days=days)
+
+    def _draws(self, kind: int, record_id: int) -> random.Random:
+        # One generator per record, seeded from (seed, kind, id)
+        return random.Random(((self.seed << 2 | kind) << 40) | record_id)
+
+    # Test cases
+
+    def _case_basics(self, test_case_id: int):
+        draws = self._draws(CASE, test_case_id)
+        path, area = draws.choice(AREAS)
+        scenario = draws.choice(SCENARIOS)
+        host = draws.choice(HOSTS)
+        steps_count = draws.randint(3, 25)
+        # Most cases are stable; some are flaky or often broken
+        bucket = draws.randrange(100)
+        failure_rate = 0.02 if bucket < 75 else 0.15 if bucket < 93 else 0.45
+        return draws, path, area, scenario, host, steps_count, failure_rate
+
+    def _created_at(self, test_case_id: int) -> datetime:
+        # Cases are created over the first half of the span, oldest first
+        return self.start + self.span * ((test_case_id - 1) / self.test_case_count / 2)
+
+    def get_test_case(self, test_case_id: int) -> Optional[Dict[str, Any]]:
+        if not 1 <= test_case_id <= self.test_case_count:
+            return None
+        draws, path, area, scenario, host, steps_count, _ = self._case_basics(test_case_id)
+
+        created_at = self._created_at(test_case_id)
+        edited = draws.random() < 0.6
+        updated_at = created_at + timedelta(minutes=draws.randrange(60 * 24 * 30)) if edited else None
+        last_run = self.get_test_run(self._last_run_id(test_case_id)) if self.runs_per_case else None
+        return {
+            "id": test_case_id,
+            "name": f"{area} - {scenario} #{test_case_id}",
+            "description": f"Checks the {area.lower()} flow ({scenario})",
+            "base_url": f"{host}/{path}",
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "steps_count": steps_count,
+            "last_run_status": last_run["status"] if last_run else None,
+        }
+
+    def iter_test_cases(self, skip: int = 0, limit: int = 100) -> Iterator[Dict[str, Any]]:
+        """Oldest first"""
+        for test_case_id in range(skip + 1, min(skip + limit, self.test_case_count) + 1):
+            yield self.get_test_case(test_case_id)
+
+    # Test runs
+
+    def _last_run_id(self, test_case_id: int) -> int:
+        return test_case_id + (self.runs_per_case - 1) * self.test_case_count
+
+    def _run_outcome(self, test_run_id: int):
+        test_case_id = (test_run_id - 1) % self.test_case_count + 1
+        case = self._case_basics(test_case_id)
+        steps_count, failure_rate = case[5], case[6]
+        draws = self._draws(RUN, test_run_id)
+        roll = draws.random()
+        if roll < 0.01:
+            status = "error"
+        elif roll < 0.01 + failure_rate:
+            status = "failed"
+        else:
+            status = "passed"
+        # Failed and errored runs stop at the failing step
+        steps_run = steps_count if status == "passed" else draws.randint(1, steps_count)
+        return draws, case, test_case_id, status, steps_run
+
+    def count_test_runs(self, test_case_id: Optional[int] = None) -> int:
+        if test_case_id is None:
+            return self.test_run_count
+        return self.runs_per_case if 1 <= test_case_id <= self.test_case_count else 0
+
+    def get_test_run(self, test_run_id: int) -> Optional[Dict[str, Any]]:
+        if not 1 <= test_run_id <= self.test_run_count:
+            return None
+        draws, case, test_case_id, status, steps_run = self._run_outcome(test_run_id)
+        _, _, area, scenario, _, _, _ = case
+        if test_run_id <= self.test_case_count:
+            start_time = self._created_at(test_case_id)
+        else:
+            later = (test_run_id - 1 - self.test_case_count) / (self.test_run_count - self.test_case_count)
+            start_time = self.start + self.span * (1 + later) / 2
+        start_time += timedelta(seconds=draws.randrange(60))
+        # One to four seconds per step
+        duration = steps_run + draws.randrange(3 * steps_run + 1)
+        return {
+            "id": test_run_id,
+            "test_case_id": test_case_id,
+            "test_case_name": f"{area} - {scenario} #{test_case_id}",
+            "start_time": start_time,
+            "end_time": start_time + timedelta(seconds=duration),
+            "status": status,
+            "browser": draws.choice(BROWSERS),
+            "duration": duration,
+        }
+
+    def iter_test_runs(self, skip: int = 0, limit: int = 100, test_case_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Newest first"""
+        if test_case_id is None:
+            newest = self.test_run_count - skip
+            ids = range(newest, max(newest - limit, 0), -1)
+        else:
+            if not 1 <= test_case_id <= self.test_case_count:
+                return
+            rounds = range(self.runs_per_case - 1 - skip, max(self.runs_per_case - 1 - skip - limit, -1), -1)
+            ids = (test_case_id + round_index * self.test_case_count for round_index in rounds)
+        for test_run_id in ids:
+            yield self.get_test_run(test_run_id)
+
+    # Step results
+
+    def iter_test_results(self, test_run_id: int) -> Iterator[Dict[str, Any]]:
+        if not 1 <= test_run_id <= self.test_run_count:
+            return
+        _, case, _, status, steps_run = self._run_outcome(test_run_id)
+        _, path, _, _, host, _, _ = case
+        draws = self._draws(RESULT, test_run_id)
+        for step_order in range(steps_run):
+            failing = status != "passed" and step_order == steps_run - 1
+            element = draws.choice(ELEMENTS)
+            error = draws.choice(ERRORS).format(element=element, url=f"{host}/{path}") if failing else None
+            yield {
+                "test_run_id": test_run_id,
+                "step_order": step_order,
+                "status": status if failing else "passed",
+                "error_message": error,
+                "execution_time": 50 + draws.randrange(3000 if failing else 800),
+            }
+
+def load_fixtures():
+    """Fixture source selected by the MOCK_* environment variables"""
+    mode = os.getenv("MOCK_DATA", "static")
+    if mode == "static":
+        return StaticFixtures(STATIC_TEST_CASES, STATIC_TEST_RUNS)
+    if mode == "synthetic":
+        return SyntheticFixtures(
+            seed=int(os.getenv("MOCK_SEED", "0")),
+            test_cases=int(os.getenv("MOCK_TEST_CASES", "1000000")),
+            runs_per_case=int(os.getenv("MOCK_RUNS_PER_CASE", "5")),
+        )
+    raise ValueError(f"Unknown MOCK_DATA mode: {mode} (expected static or synthetic)")